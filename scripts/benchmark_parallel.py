@@ -0,0 +1,65 @@
+import sys
+import time
+
+import pyregistryutils as reg
+
+# Benchmark for parallel subtree enumeration (list_subkeys(parallel=True) / walk(parallel=True)).
+#
+# Runs against an in-memory registry, so it works on any platform. Each backend call sleeps for
+# LATENCY seconds to stand in for the cost of a winreg system call; like winreg, sleep() releases
+# the GIL, so the results show how enumeration scales with the number of worker threads.
+#
+# Usage: python scripts/benchmark_parallel.py [fanout] [depth] [latency_us]
+
+FANOUT  = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+DEPTH   = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+LATENCY = (int(sys.argv[3]) if len(sys.argv) > 3 else 50) / 1e6
+WORKERS = [1, 2, 4, 8, 16, 32]
+
+rootpath = "HKLM:SOFTWARE\\Benchmark"
+
+
+class LatencyBackend(reg.MemoryBackend):
+    def open_key(self, key, sub_key, access):
+        time.sleep(LATENCY)
+        return super().open_key(key, sub_key, access)
+
+    def enum_key(self, handle, index):
+        time.sleep(LATENCY)
+        return super().enum_key(handle, index)
+
+
+
+# Build a tree with FANOUT subkeys per key, DEPTH levels deep
+backend = LatencyBackend()
+reg.set_backend(backend)
+with backend.create_key(reg.HKLM, "SOFTWARE\\Benchmark", reg.winreg.KEY_ALL_ACCESS) as root:
+    stack = [(root, 0)]
+    while stack:
+        handle, depth = stack.pop()
+        if depth == DEPTH:
+            continue
+        for i in range(FANOUT):
+            child = backend.create_key(handle, f"key{i}", reg.winreg.KEY_ALL_ACCESS)
+            stack.append((child, depth+1))
+nkeys = sum(FANOUT**d for d in range(1, DEPTH+1))
+print(f"Tree: fanout={FANOUT}, depth={DEPTH}, {nkeys} keys, {LATENCY*1e6:.0f}us per call")
+print("")
+
+
+# Serial baseline
+start = time.perf_counter()
+correct = reg.list_subkeys(rootpath)
+serial = time.perf_counter() - start
+assert len(correct) == nkeys
+print(f"{'mode':>12} {'seconds':>10} {'speedup':>8}")
+print(f"{'serial':>12} {serial:>10.3f} {1.0:>8.2f}")
+
+# Parallel, with an increasing number of workers
+for workers in WORKERS:
+    start = time.perf_counter()
+    actual = reg.list_subkeys(rootpath, parallel=True, max_workers=workers)
+    elapsed = time.perf_counter() - start
+    assert actual == correct    # Same order as the serial enumeration
+    print(f"{f'{workers} workers':>12} {elapsed:>10.3f} {serial/elapsed:>8.2f}")
+print("")
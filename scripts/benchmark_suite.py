@@ -0,0 +1,298 @@
+import argparse
+import gc
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import pyregistryutils as reg
+
+# Benchmark suite for path parsing, enumeration, populate and bulk writes.
+#
+# Runs against an in-memory registry, so it works on any platform (no winreg system calls: the results
+# measure the package's own overhead). Builds a synthetic tree with FANOUT subkeys per key, DEPTH levels
+# deep, and VALUES values per key, then times each benchmark REPEAT times and keeps the fastest run.
+#
+# Each benchmark also records a digest of its result. Parallel benchmarks must return the same result as their
+# serial counterparts, and every benchmark the same result as in the baseline: a benchmark whose result differs
+# is reported as a mismatch instead of being timed against the baseline (a change which drops keys is not a
+# speedup), and the exit code is 1.
+#
+# Results are written as JSON (--output), and compared against a stored baseline (--baseline): benchmarks
+# slower than the baseline by more than THRESHOLD are reported as regressions, and the exit code is 1.
+# Store a baseline on the machine which runs the comparison (timings from other machines are meaningless):
+#
+#   python scripts/benchmark_suite.py --size 1e4 --output scripts/benchmark_baseline.json
+#   ...change the code...
+#   python scripts/benchmark_suite.py --size 1e4 --baseline scripts/benchmark_baseline.json
+#
+# Usage: python scripts/benchmark_suite.py [--size 1e3|1e4|1e5|1e6] [--fanout F] [--depth D] [--values V]
+#                                          [--repeat N] [--only NAME ...] [--output FILE] [--baseline FILE]
+#                                          [--threshold RATIO]
+
+# Tree shape (fanout, depth) of each size: about 10^3 to 10^6 keys
+SIZES = {
+    "1e3": (10, 3),
+    "1e4": (10, 4),
+    "1e5": (10, 5),
+    "1e6": (10, 6),
+}
+
+parser = argparse.ArgumentParser(description="Benchmark suite for pyregistryutils, on an in-memory registry.")
+parser.add_argument("--size", choices=SIZES, default="1e3", help="Number of keys in the tree (default: 1e3)")
+parser.add_argument("--fanout", type=int, help="Subkeys per key (overrides --size)")
+parser.add_argument("--depth", type=int, help="Levels of subkeys below the root (overrides --size)")
+parser.add_argument("--values", type=int, default=4, help="Values per key (default: 4)")
+parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark; the fastest is kept (default: 5)")
+parser.add_argument("--only", nargs="+", metavar="NAME", help="Run only these benchmarks")
+parser.add_argument("--output", help="Write the results to this JSON file")
+parser.add_argument("--baseline", help="Compare the results against this JSON file (written by --output)")
+parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown reported as a regression (default: 0.10, i.e. 10%%)")
+args = parser.parse_args()
+
+FANOUT = args.fanout if args.fanout is not None else SIZES[args.size][0]
+DEPTH  = args.depth if args.depth is not None else SIZES[args.size][1]
+VALUES = args.values
+REPEAT = max(1, args.repeat)
+
+rootpath = "HKLM:SOFTWARE\\Benchmark"
+nkeys = sum(FANOUT**d for d in range(0, DEPTH+1))
+
+
+
+###############################################################################
+## Setup
+###############################################################################
+
+def build():
+    # Build the tree directly through the backend (not timed), replacing any previous tree
+    backend = reg.MemoryBackend()
+    reg.set_backend(backend)
+    with backend.create_key(reg.HKLM, "SOFTWARE\\Benchmark", reg.winreg.KEY_ALL_ACCESS) as root:
+        stack = [(root, 0)]
+        while stack:
+            handle, depth = stack.pop()
+            for v in range(VALUES):
+                backend.set_value(handle, f"value{v}", reg.TYPE_REG_SZ if v % 2 == 0 else reg.TYPE_DWORD, f"data{v}" if v % 2 == 0 else v)
+            if depth < DEPTH:
+                for i in range(FANOUT):
+                    stack.append((backend.create_key(handle, f"key{i}", reg.winreg.KEY_ALL_ACCESS), depth+1))
+            if handle is not root:
+                handle.Close()
+
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+
+###############################################################################
+## Benchmarks
+###############################################################################
+
+# Each benchmark is (setup, run, items): setup() is called before each run (not timed), and returns the argument
+# of run(); items is the number of operations in one run, for the time per item. run() returns its result, which
+# is digested (not timed) to check that every run, and the serial and parallel versions, return the same result.
+
+def setup_paths():
+    reg.disable_path_cache()
+    return [f"HKEY_LOCAL_MACHINE\\SOFTWARE\\Benchmark\\key{i % FANOUT}\\key{i % 7}\\Name{i}" for i in range(nkeys)]
+
+def run_paths(paths):
+    return [reg.split_abspath(path) for path in paths]
+
+def run_list_subkeys(_):
+    return reg.list_subkeys(rootpath)
+
+def run_list_subkeys_parallel(_):
+    return reg.list_subkeys(rootpath, parallel=True)
+
+def run_walk(_):
+    return list(reg.walk(rootpath))
+
+def run_walk_parallel(_):
+    return list(reg.walk(rootpath, parallel=True))
+
+def run_search(_):
+    return list(reg.search(rootpath, "data2"))
+
+def run_search_parallel(_):
+    return list(reg.search(rootpath, "data2", parallel=True))
+
+def setup_keypaths():
+    return [rootpath] + reg.list_subkeys(rootpath)
+
+def run_list_values(keypaths):
+    return [reg.list_values(path) for path in keypaths]
+
+def run_populate(_):
+    return reg.Key(rootpath, populate=True)
+
+def run_populate_parallel(_):
+    key = reg.Key(rootpath)
+    key.populate(parallel=True)
+    return key
+
+def setup_key():
+    return reg.Key(rootpath, populate=True)
+
+def run_load(key):
+    key.load()
+    return key
+
+def run_save(key):
+    return key.save(force=True)     # Writes every value of every key
+
+def setup_delete():
+    build()
+
+def run_delete(_):
+    return reg.delete_key(rootpath)
+
+
+BENCHMARKS = {
+    "split_abspath":            (setup_paths,       run_paths,                  nkeys),
+    "list_subkeys":             (lambda: None,      run_list_subkeys,           nkeys),
+    "list_subkeys (parallel)":  (lambda: None,      run_list_subkeys_parallel,  nkeys),
+    "walk":                     (lambda: None,      run_walk,                   nkeys),
+    "walk (parallel)":          (lambda: None,      run_walk_parallel,          nkeys),
+    "search":                   (lambda: None,      run_search,                 nkeys),
+    "search (parallel)":        (lambda: None,      run_search_parallel,        nkeys),
+    "list_values":              (setup_keypaths,    run_list_values,            nkeys),
+    "Key.populate":             (lambda: None,      run_populate,               nkeys),
+    "Key.populate (parallel)":  (lambda: None,      run_populate_parallel,      nkeys),
+    "Key.load":                 (setup_key,         run_load,                   nkeys),
+    "Key.save":                 (setup_key,         run_save,                   nkeys),
+    "delete_key":               (setup_delete,      run_delete,                 nkeys),
+}
+PARALLEL = " (parallel)"   # Suffix of parallel benchmarks; without it, the name of their serial counterpart
+
+
+
+def digest(result):
+    # Digest of a benchmark's result. Keys are digested as their values and the values of their members.
+    if isinstance(result, reg.Key):
+        result = (result.abspath, result.values, [(name, member.values) for name, member in result.members.items()])
+    return hashlib.sha256(repr(result).encode()).hexdigest()[:16]
+
+
+
+def measure(setup, run):
+    runs = []
+    digests = set()
+    for _ in range(REPEAT):
+        argument = setup()
+        gc.collect()
+        start = time.perf_counter()
+        result = run(argument)
+        runs.append(time.perf_counter() - start)
+        digests.add(digest(result))
+        result = None
+    return runs, digests
+
+
+
+###############################################################################
+## Main
+###############################################################################
+
+for name in args.only or []:
+    if name not in BENCHMARKS:
+        parser.error(f"unknown benchmark: {name} (choose from {', '.join(BENCHMARKS)})")
+names = [name for name in BENCHMARKS if not args.only or name in args.only]    # delete_key runs last
+
+build()
+print(f"Tree: fanout={FANOUT}, depth={DEPTH}, {nkeys} keys, {nkeys*VALUES} values, best of {REPEAT} runs")
+print("")
+
+# Check the results before the timings: a benchmark which returns a different result is not comparable
+mismatches = []
+def mismatch(name, reason):
+    mismatches.append(name)
+    print(f"{name:>24} RESULT MISMATCH: {reason}")
+
+results = {}
+print(f"{'benchmark':>24} {'seconds':>10} {'median':>10} {'us/item':>10}")
+for name in names:
+    setup, run, items = BENCHMARKS[name]
+    runs, digests = measure(setup, run)
+    results[name] = {"seconds": min(runs), "median": statistics.median(runs), "runs": runs, "items": items,
+                     "result": digests.pop() if len(digests) == 1 else None}
+    print(f"{name:>24} {min(runs):>10.4f} {statistics.median(runs):>10.4f} {min(runs)/items*1e6:>10.2f}")
+print("")
+
+for name in names:
+    serial = name[:-len(PARALLEL)] if name.endswith(PARALLEL) else None
+    if results[name]["result"] is None:
+        mismatch(name, "runs returned different results")
+    elif serial in results and results[serial]["result"] is not None and results[name]["result"] != results[serial]["result"]:
+        mismatch(name, f"differs from {serial}")
+if mismatches:
+    print("")
+
+report = {
+    "meta": {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "fanout": FANOUT,
+        "depth": DEPTH,
+        "values": VALUES,
+        "keys": nkeys,
+        "repeat": REPEAT,
+    },
+    "results": results,
+}
+if args.output:
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    print("")
+
+
+# Compare against the baseline
+regressions = []
+if args.baseline:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    shape = ("fanout", "depth", "values")
+    same_shape = all(baseline["meta"].get(k) == report["meta"][k] for k in shape)
+    if not same_shape:
+        before = ", ".join(f"{k}={baseline['meta'].get(k)}" for k in shape)
+        print(f"Warning: baseline tree ({before}) differs from this run; comparing time per item")
+    print(f"Baseline: commit {baseline['meta'].get('commit')}, {baseline['meta'].get('time')}")
+    print(f"{'benchmark':>24} {'baseline':>10} {'current':>10} {'change':>8}    (us/item)")
+    for name in names:
+        if name not in baseline["results"]:
+            print(f"{name:>24} {'-':>10} {results[name]['seconds']/results[name]['items']*1e6:>10.2f} {'new':>8}")
+            continue
+        if name in mismatches:
+            continue
+        expected = baseline["results"][name].get("result")
+        if expected is not None and same_shape and results[name]["result"] != expected:
+            mismatch(name, "differs from the baseline (not timed)")
+            continue
+        before = baseline["results"][name]["seconds"] / baseline["results"][name]["items"]
+        after = results[name]["seconds"] / results[name]["items"]
+        change = after / before - 1
+        flag = "  REGRESSION" if change > args.threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:>24} {before*1e6:>10.2f} {after*1e6:>10.2f} {change:>+8.1%}{flag}")
+    print("")
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+if mismatches:
+    print(f"{len(mismatches)} result mismatch(es): {', '.join(mismatches)}")
+
+sys.exit(1 if regressions or mismatches else 0)
@@ -0,0 +1,65 @@
+import gc
+import sys
+import time
+import tracemalloc
+
+import pyregistryutils as reg
+
+# Memory comparison between Key.populate() and TreeStore.from_registry().
+#
+# Builds a synthetic tree in an in-memory registry, then populates it both ways and reports
+# the memory allocated, the number of objects tracked by the garbage collector, and the time
+# of a full garbage collection with each representation alive.
+#
+# Usage: python scripts/benchmark_treestore.py [fanout] [depth] [values_per_key]
+
+FANOUT = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+DEPTH  = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+VALUES = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+rootpath = "HKCR:Benchmark"
+
+
+# Build a tree with FANOUT subkeys per key, DEPTH levels deep, and VALUES values per key
+backend = reg.MemoryBackend()
+reg.set_backend(backend)
+with backend.create_key(reg.HKCR, "Benchmark", reg.winreg.KEY_ALL_ACCESS) as root:
+    stack = [(root, 0)]
+    while stack:
+        handle, depth = stack.pop()
+        for v in range(VALUES):
+            backend.set_value(handle, f"value{v}", reg.TYPE_REG_SZ, f"data{v}")
+        if depth == DEPTH:
+            continue
+        for i in range(FANOUT):
+            child = backend.create_key(handle, f"key{i}", reg.winreg.KEY_ALL_ACCESS)
+            stack.append((child, depth+1))
+nkeys = sum(FANOUT**d for d in range(0, DEPTH+1))
+print(f"Tree: fanout={FANOUT}, depth={DEPTH}, {nkeys} keys, {nkeys*VALUES} values")
+print("")
+
+
+def measure(build):
+    gc.collect()
+    objects = len(gc.get_objects())
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    objects = len(gc.get_objects()) - objects
+    start = time.perf_counter()
+    gc.collect()
+    collect = time.perf_counter() - start
+    return result, allocated, objects, elapsed, collect
+
+
+print(f"{'representation':>16} {'MiB':>8} {'gc objects':>11} {'build (s)':>10} {'gc (ms)':>8}")
+key, *row = measure(lambda: reg.Key(rootpath, populate=True))
+print(f"{'Key.populate':>16} {row[0]/2**20:>8.2f} {row[1]:>11} {row[2]:>10.2f} {row[3]*1e3:>8.1f}")
+del key
+store, *row = measure(lambda: reg.TreeStore.from_registry(rootpath))
+print(f"{'TreeStore':>16} {row[0]/2**20:>8.2f} {row[1]:>11} {row[2]:>10.2f} {row[3]*1e3:>8.1f}")
+assert len(store) == nkeys
+print("")
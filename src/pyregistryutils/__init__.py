@@ -1,5 +1,17 @@
+from .backend import *
 from .common import *
 from .key import *
+from .session import *
+from .batch import *
+from .treestore import *
+from .diff import *
+from .search import *
+from .mirror import *
+from .watch import *
+from .instrument import *
+from .snapshot import *
+from .regfile import *
+from .regf import *
 from .filetype import *
 
 # To import from this package: use
@@ -0,0 +1,300 @@
+import asyncio
+import functools
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable
+
+from . import common
+from .key import Key
+
+# asyncio counterparts of the functions in common.py and the Key methods. Registry calls block, so they are
+# run on a bounded thread pool, and the event loop stays free while they wait:
+#
+#   from pyregistryutils import aio
+#   values = await aio.load_values("HKLM:Software\\MyApp", {"a": None, "b": None})
+#   async for keypath, subkey_names, values in aio.walk("HKLM:Software"):
+#       ...
+#
+# Traversals run in steps: walk(), load_key() and save_key() run one key per thread pool call, and iter_subkeys()
+# and populate_key() up to ITERATE_BATCH_SIZE keys per call. A cancelled task stops after the step being run,
+# and other tasks are served between steps.
+
+DEFAULT_MAX_WORKERS = 4
+
+# Number of items read per thread pool call by iter_subkeys() and populate_key()
+ITERATE_BATCH_SIZE = 64
+
+
+
+###############################################################################
+## Internal Functions
+###############################################################################
+
+__executor__ = None
+__max_workers__ = DEFAULT_MAX_WORKERS
+__executor_lock__ = threading.Lock()
+
+
+
+def __get_executor__(
+    )-> ThreadPoolExecutor:
+    """
+    Returns the thread pool registry calls are run on, creating it on first use.
+    """
+
+    global __executor__
+    with __executor_lock__:
+        if __executor__ is None:
+            __executor__ = ThreadPoolExecutor(max_workers=__max_workers__, thread_name_prefix="pyregistryutils")
+        return __executor__
+
+
+
+async def __run__(
+        function:Callable,
+        *args:Any,
+        **kwargs:Any
+    )-> Any:
+    """
+    Runs a blocking function on the thread pool, and returns its result.
+    """
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(__get_executor__(), functools.partial(function, *args, **kwargs))
+
+
+
+def __wrap__(
+        function:Callable
+    )-> Callable:
+    """
+    Returns an async version of a function in common.py, with the same parameters and documentation.
+    """
+
+    @functools.wraps(function)
+    async def wrapper(*args:Any, **kwargs:Any)-> Any:
+        return await __run__(function, *args, **kwargs)
+    return wrapper
+
+
+
+def __next_items__(
+        iterator:Any,
+        count:int
+    )-> list[Any]:
+    """
+    Reads up to count items from a blocking iterator. Fewer items are returned only at the end of the iterator.
+    """
+
+    return list(itertools.islice(iterator, count))
+
+
+
+async def __iterate__(
+        iterator:Any,
+        batch:int = 1
+    )-> AsyncIterator[Any]:
+    """
+    Iterates over a blocking iterator (a generator from common.py), reading up to batch items per thread pool call.
+
+    If the iteration is stopped or its task is cancelled, no more items are read, and the iterator is closed
+    (closing its handles) once the items being read have been returned.
+    """
+
+    future = None   # concurrent.futures.Future of the items being read
+    try:
+        while True:
+            future = __get_executor__().submit(__next_items__, iterator, batch)
+            items = await asyncio.wrap_future(future)
+            future = None
+            for item in items:
+                yield item
+            if len(items) < batch:
+                return
+    finally:
+        if future is not None:  # Cancelled while reading: the iterator cannot be closed until the read is done
+            future.add_done_callback(lambda _: iterator.close())
+        else:
+            iterator.close()
+
+
+
+###############################################################################
+## Thread Pool
+###############################################################################
+
+def set_max_workers(
+        max_workers:int
+    )-> int:
+    """
+    Sets the number of threads registry calls are run on: the number of calls which can wait on the registry
+    at the same time. Calls already running finish on the previous thread pool.
+
+    Parameters:
+    -----------
+    max_workers
+        Number of threads (at least 1).
+
+    Returns:
+    --------
+    previous
+        The previous number of threads.
+    """
+
+    global __executor__, __max_workers__
+    with __executor_lock__:
+        previous, __max_workers__ = __max_workers__, max(1, max_workers)
+        if __executor__ is not None:
+            __executor__.shutdown(wait=False)
+            __executor__ = None
+    return previous
+
+
+
+def shutdown(
+    )-> None:
+    """
+    Shuts down the thread pool, after the calls already submitted have finished. It is created again if needed.
+    """
+
+    global __executor__
+    with __executor_lock__:
+        executor, __executor__ = __executor__, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+
+###############################################################################
+## Functions
+###############################################################################
+
+load_value = __wrap__(common.load_value)
+load_values = __wrap__(common.load_values)
+save_value = __wrap__(common.save_value)
+save_values = __wrap__(common.save_values)
+delete_value = __wrap__(common.delete_value)
+delete_all_values = __wrap__(common.delete_all_values)
+list_values = __wrap__(common.list_values)
+create_key = __wrap__(common.create_key)
+delete_key = __wrap__(common.delete_key)
+
+
+
+def walk(
+        abspath:str,
+        topdown:bool = True,
+        maxdepth:int = -1,
+        onerror:Callable[[OSError],None]|None = None,
+        session:"Session|None" = None
+    )-> AsyncIterator[tuple[str, list[str], dict[str, tuple[Any,int]]]]:
+    """
+    Async version of walk(), for "async for": walks the tree of keys under abspath, reading one key per
+    thread pool call.
+
+    Subkeys removed from subkey_names (topdown=True) are skipped, as with walk(). If the iteration is stopped
+    or its task is cancelled, no more keys are read.
+
+    Parameters:
+    -----------
+    abspath, topdown, maxdepth, onerror, session
+        See walk().
+
+    Yields:
+    -------
+    (keypath, subkey_names, values)
+        See walk().
+    """
+
+    return __iterate__(common.walk(abspath, topdown=topdown, maxdepth=maxdepth, onerror=onerror, session=session))
+
+
+
+def iter_subkeys(
+        abspath:str,
+        maxdepth:int = -1,
+        session:"Session|None" = None
+    )-> AsyncIterator[str]:
+    """
+    Async version of iter_subkeys(), for "async for": yields the absolute paths of the subkeys under abspath,
+    reading up to ITERATE_BATCH_SIZE subkeys per thread pool call.
+    """
+
+    return __iterate__(common.iter_subkeys(abspath, maxdepth, session=session), batch=ITERATE_BATCH_SIZE)
+
+
+
+async def list_subkeys(
+        abspath:str,
+        maxdepth:int = -1,
+        session:"Session|None" = None
+    )-> list[str]:
+    """
+    Async version of list_subkeys(). Same as [path async for path in iter_subkeys(abspath, maxdepth)].
+    """
+
+    return [path async for path in iter_subkeys(abspath, maxdepth, session=session)]
+
+
+
+###############################################################################
+## Keys
+###############################################################################
+
+async def populate_key(
+        key:Key,
+        recurse:bool|int = -1,
+        session:"Session|None" = None
+    )-> None:
+    """
+    Async version of Key.populate(): adds up to ITERATE_BATCH_SIZE keys per thread pool call.
+
+    If the task is cancelled, no more keys are read: the keys added so far are kept.
+    """
+
+    async for _ in __iterate__(key._iter_populate(recurse=recurse, session=session), batch=ITERATE_BATCH_SIZE):
+        pass
+
+
+
+async def load_key(
+        key:Key,
+        recurse:bool = True,
+        session:"Session|None" = None
+    )-> None:
+    """
+    Async version of Key.load(): loads the key, then each of its members (if recurse is True),
+    one key per thread pool call.
+    """
+
+    await __run__(key.load, recurse=False, session=session)
+    if recurse is True:
+        for member in list(key.members.values()):
+            await load_key(member, recurse=recurse, session=session)
+
+
+
+async def save_key(
+        key:Key,
+        recurse:bool = True,
+        session:"Session|None" = None,
+        force:bool = False
+    )-> list[str]:
+    """
+    Async version of Key.save(): saves the key, then each of its members (if recurse is True),
+    one key per thread pool call. Keys with no changes are skipped without a thread pool call.
+
+    Returns:
+    --------
+    modified_keys
+        Paths of keys which were modified.
+    """
+
+    modified_keys = []
+    if force or key.is_dirty(recurse=False):
+        modified_keys += await __run__(key.save, recurse=False, session=session, force=force)
+    if recurse is True:
+        for member in list(key.members.values()):
+            modified_keys += await save_key(member, recurse=recurse, session=session, force=force)
+    return modified_keys
@@ -0,0 +1,720 @@
+import ctypes
+import threading
+import time
+from ctypes import wintypes
+from typing import Any, Callable
+
+try:
+    import winreg
+    WINREG_AVAILABLE = True
+except ImportError:     # Not running on Windows; only the constants are available
+    from . import winreg_compat as winreg
+    WINREG_AVAILABLE = False
+
+
+
+###############################################################################
+## Backend Interface
+###############################################################################
+
+class Backend:
+    """
+    Interface through which common.py and Key access a registry.
+
+    Methods mirror the winreg functions of the same (CamelCase) name:
+     - "key" arguments are either a predefined hive handle (HKLM, HKCU, etc.) or a handle
+       previously returned by open_key() / create_key().
+     - "sub_key" arguments are paths relative to "key", using "\\" as a separator.
+     - Failures raise OSError (FileNotFoundError if the key or value does not exist,
+       PermissionError if access is denied), like winreg.
+     - Handles can be used as context managers, and are closed on exit (like winreg.HKEYType).
+    """
+
+    # True if delete_tree() is implemented
+    supports_delete_tree = False
+
+    # True if notify() and cancel_notify() are implemented
+    supports_notify = False
+
+
+    def open_key(self, key:Any, sub_key:str, access:int)-> Any:
+        """Opens an existing key. Same as winreg.OpenKeyEx()."""
+        raise NotImplementedError
+
+    def create_key(self, key:Any, sub_key:str, access:int)-> Any:
+        """Opens a key, creating it and any missing parents. Same as winreg.CreateKeyEx()."""
+        raise NotImplementedError
+
+    def close_key(self, handle:Any)-> None:
+        """Closes a handle. Same as winreg.CloseKey()."""
+        raise NotImplementedError
+
+    def query_info_key(self, handle:Any)-> tuple[int,int,int]:
+        """Returns (number of subkeys, number of values, last write time). Same as winreg.QueryInfoKey()."""
+        raise NotImplementedError
+
+    def enum_key(self, handle:Any, index:int)-> str:
+        """Returns the name of the subkey at index. Same as winreg.EnumKey()."""
+        raise NotImplementedError
+
+    def enum_value(self, handle:Any, index:int)-> tuple[str,Any,int]:
+        """Returns (name, data, type) of the value at index. Same as winreg.EnumValue()."""
+        raise NotImplementedError
+
+    def query_value(self, handle:Any, name:str)-> tuple[Any,int]:
+        """Returns (data, type) of a named value. Same as winreg.QueryValueEx()."""
+        raise NotImplementedError
+
+    def set_value(self, handle:Any, name:str, type:int, data:Any)-> None:
+        """Stores a named value. Same as winreg.SetValueEx()."""
+        raise NotImplementedError
+
+    def delete_value(self, handle:Any, name:str)-> None:
+        """Deletes a named value. Same as winreg.DeleteValue()."""
+        raise NotImplementedError
+
+    def delete_key(self, key:Any, sub_key:str)-> None:
+        """Deletes a key which has no subkeys. Same as winreg.DeleteKeyEx()."""
+        raise NotImplementedError
+
+    def delete_tree(self, key:Any, sub_key:str)-> None:
+        """Deletes a key, including all of its subkeys and values. Only available if supports_delete_tree is True."""
+        raise NotImplementedError
+
+    def notify(self, key:Any, sub_key:str, subtree:bool, callback:Callable[[],None])-> Any:
+        """
+        Calls callback() each time the key (or, if subtree is True, any key below it) changes: its values, its subkeys,
+        or its deletion. Like RegNotifyChangeKeyValue(), the callback is not told what changed, and it may be called
+        from another thread. Returns a token for cancel_notify(). Only available if supports_notify is True.
+        """
+        raise NotImplementedError
+
+    def cancel_notify(self, token:Any)-> None:
+        """Stops the callbacks registered by notify(). Only available if supports_notify is True."""
+        raise NotImplementedError
+
+
+
+###############################################################################
+## winreg Backend
+###############################################################################
+
+class WinregBackend(Backend):
+    """
+    Backend for the live Windows Registry, implemented with the winreg module.
+    """
+
+    supports_delete_tree = True
+    supports_notify = True
+    _win32 = None   # (kernel32, advapi32) with declared prototypes; see _api()
+
+    def __init__(self)-> None:
+        if not WINREG_AVAILABLE:
+            raise RuntimeError("The winreg module is only available on Windows.")
+
+    @classmethod
+    def _api(cls)-> tuple[Any,Any]:
+        # Functions winreg does not wrap, called through ctypes. Return and argument types are declared, so that
+        # HANDLEs are not truncated to a C int on 64-bit Windows. Private WinDLL instances are used, so that the
+        # prototypes do not change ctypes.windll for other code.
+        if cls._win32 is None:
+            kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+            advapi32 = ctypes.WinDLL("advapi32", use_last_error=True)
+            kernel32.CreateEventW.restype = wintypes.HANDLE
+            kernel32.CreateEventW.argtypes = (ctypes.c_void_p, wintypes.BOOL, wintypes.BOOL, wintypes.LPCWSTR)
+            kernel32.SetEvent.restype = wintypes.BOOL
+            kernel32.SetEvent.argtypes = (wintypes.HANDLE,)
+            kernel32.CloseHandle.restype = wintypes.BOOL
+            kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+            kernel32.WaitForMultipleObjects.restype = wintypes.DWORD
+            kernel32.WaitForMultipleObjects.argtypes = (wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE), wintypes.BOOL, wintypes.DWORD)
+            advapi32.RegNotifyChangeKeyValue.restype = wintypes.LONG
+            advapi32.RegNotifyChangeKeyValue.argtypes = (wintypes.HKEY, wintypes.BOOL, wintypes.DWORD, wintypes.HANDLE, wintypes.BOOL)
+            advapi32.RegDeleteTreeW.restype = wintypes.LONG
+            advapi32.RegDeleteTreeW.argtypes = (wintypes.HKEY, wintypes.LPCWSTR)
+            cls._win32 = (kernel32, advapi32)
+        return cls._win32
+
+    def open_key(self, key, sub_key, access):
+        return winreg.OpenKeyEx(key, sub_key, 0, access)
+
+    def create_key(self, key, sub_key, access):
+        return winreg.CreateKeyEx(key, sub_key, 0, access)
+
+    def close_key(self, handle):
+        winreg.CloseKey(handle)
+
+    def query_info_key(self, handle):
+        return winreg.QueryInfoKey(handle)
+
+    def enum_key(self, handle, index):
+        return winreg.EnumKey(handle, index)
+
+    def enum_value(self, handle, index):
+        return winreg.EnumValue(handle, index)
+
+    def query_value(self, handle, name):
+        return winreg.QueryValueEx(handle, name)
+
+    def set_value(self, handle, name, type, data):
+        winreg.SetValueEx(handle, name, 0, type, data)
+
+    def delete_value(self, handle, name):
+        winreg.DeleteValue(handle, name)
+
+    def delete_key(self, key, sub_key):
+        winreg.DeleteKeyEx(key, sub_key)
+
+    def delete_tree(self, key, sub_key):
+        # winreg does not wrap RegDeleteTreeW, so it is called through ctypes
+        error = self._api()[1].RegDeleteTreeW(int(key), sub_key)
+        if error != 0:
+            raise ctypes.WinError(error)
+
+    def notify(self, key, sub_key, subtree, callback):
+        # winreg does not wrap RegNotifyChangeKeyValue, so it is called through ctypes, by a thread per notification.
+        # The notification is registered again after each change, and stops when the "stop" event is set.
+        kernel32, advapi32 = self._api()
+        handle = winreg.OpenKeyEx(key, sub_key, 0, winreg.KEY_NOTIFY)
+        stop = kernel32.CreateEventW(None, True, False, None)
+        changed = kernel32.CreateEventW(None, False, False, None)
+        events = (wintypes.HANDLE * 2)(stop, changed)
+        notify_filter = winreg.REG_NOTIFY_CHANGE_NAME | winreg.REG_NOTIFY_CHANGE_LAST_SET
+
+        def run()-> None:
+            try:
+                while True:
+                    # Registered by this thread, which must stay alive while the notification is pending
+                    if advapi32.RegNotifyChangeKeyValue(int(handle), bool(subtree), notify_filter, changed, True) != 0:
+                        break   # The key was deleted
+                    if kernel32.WaitForMultipleObjects(2, events, False, 0xFFFFFFFF) != 1:
+                        break   # Stopped (or the wait failed)
+                    callback()
+            finally:
+                winreg.CloseKey(handle)
+                kernel32.CloseHandle(changed)
+
+        thread = threading.Thread(target=run, name="pyregistryutils-notify", daemon=True)
+        thread.start()
+        return (thread, stop)
+
+    def cancel_notify(self, token):
+        thread, stop = token
+        kernel32 = self._api()[0]
+        kernel32.SetEvent(stop)
+        if thread is not threading.current_thread():
+            thread.join()
+        kernel32.CloseHandle(stop)
+
+
+
+###############################################################################
+## In-Memory Backend
+###############################################################################
+
+# Offset between the Unix epoch and the Windows FILETIME epoch (1601-01-01), in 100ns intervals
+FILETIME_EPOCH_OFFSET = 116444736000000000
+
+# Predefined keys which exist in every MemoryBackend
+MEMORY_HIVES = (
+    winreg.HKEY_CLASSES_ROOT,
+    winreg.HKEY_CURRENT_USER,
+    winreg.HKEY_LOCAL_MACHINE,
+    winreg.HKEY_USERS,
+    winreg.HKEY_PERFORMANCE_DATA,
+    winreg.HKEY_CURRENT_CONFIG,
+    winreg.HKEY_DYN_DATA
+)
+
+
+
+class MemoryNode:
+    """
+    A single key stored by MemoryBackend.
+    """
+
+    __slots__ = ("name", "parent", "subkeys", "values", "last_write", "sorted_subkeys", "value_list", "deleted")
+
+    def __init__(self, name:str, parent:"MemoryNode|None", last_write:int)-> None:
+        self.name = name
+        self.parent = parent
+        self.subkeys = {}           # {casefolded name: MemoryNode}
+        self.values = {}            # {casefolded name: (name, data, type)}, in insertion order
+        self.last_write = last_write
+        self.sorted_subkeys = None  # Cached enumeration order of subkeys; None when invalid
+        self.value_list = None      # Cached enumeration order of values; None when invalid
+        self.deleted = False
+
+
+
+class MemoryHandle:
+    """
+    Open handle to a MemoryNode. Can be used as a context manager, like winreg.HKEYType.
+    """
+
+    __slots__ = ("node", "access", "closed")
+
+    def __init__(self, node:MemoryNode, access:int)-> None:
+        self.node = node
+        self.access = access
+        self.closed = False
+
+    def Close(self)-> None:
+        self.closed = True
+
+    def __enter__(self)-> "MemoryHandle":
+        return self
+
+    def __exit__(self, *args)-> None:
+        self.Close()
+
+
+
+class MemoryBackend(Backend):
+    """
+    Pure-Python registry, held entirely in memory.
+
+    Follows the semantics of the Windows Registry:
+     - Key and value names are case-insensitive, but keep the case they were created with.
+     - Subkeys are enumerated in case-insensitive sorted order; values in creation order.
+     - Values are typed, and are validated and converted like winreg.SetValueEx() does.
+     - Each key has a last write time (FILETIME), updated when its values or direct subkeys change.
+     - Keys with subkeys cannot be deleted by delete_key(), and handles respect their access rights.
+     - Change notifications (see notify()) are delivered synchronously, by the thread which made the change,
+       after the change is complete.
+    """
+
+    supports_delete_tree = True
+    supports_notify = True
+
+    def __init__(self)-> None:
+        self._lock = threading.RLock()
+        self._clock = 0
+        self._hives = {hive: MemoryNode("", None, self._now()) for hive in MEMORY_HIVES}
+        self._notifications = {}    # {MemoryNode: {token: (subtree, callback)}}
+        self._changed = []          # Nodes changed since notifications were last dispatched
+        self._tokens = 0
+
+
+    # Private methods
+    def _now(self)-> int:
+        # FILETIME timestamps, strictly increasing so that every write is observable
+        self._clock = max(self._clock + 1, time.time_ns() // 100 + FILETIME_EPOCH_OFFSET)
+        return self._clock
+
+    def _node(self, key:Any, access:int=0)-> MemoryNode:
+        # Resolves a hive handle (int) or MemoryHandle to its node, checking access rights
+        if isinstance(key, MemoryHandle):
+            if key.closed:
+                raise OSError("The handle is invalid.")
+            if key.node.deleted:
+                raise OSError("Illegal operation attempted on a registry key that has been marked for deletion.")
+            if key.access & access != access:
+                raise PermissionError("Access is denied.")
+            return key.node
+        if key in self._hives:
+            return self._hives[key]
+        raise OSError("The handle is invalid.")
+
+    def _walk(self, node:MemoryNode, sub_key:str, create:bool)-> MemoryNode:
+        # Follows sub_key from node, optionally creating missing keys
+        for name in sub_key.split("\\"):
+            if name == "":
+                continue
+            child = node.subkeys.get(name.casefold())
+            if child is None:
+                if not create:
+                    raise FileNotFoundError("The system cannot find the file specified.")
+                if len(name) > 255:
+                    raise OSError("The parameter is incorrect.")
+                child = MemoryNode(name, node, self._now())
+                node.subkeys[name.casefold()] = child
+                node.sorted_subkeys = None
+                node.last_write = child.last_write
+                self._change(node)
+            node = child
+        return node
+
+    @staticmethod
+    def _convert(type:int, data:Any)-> Any:
+        # Validates and converts data to the form winreg would store and return it in
+        if type == winreg.REG_DWORD or type == winreg.REG_QWORD:
+            bits = 32 if type == winreg.REG_DWORD else 64
+            if data is None:
+                return 0
+            if not isinstance(data, int) or isinstance(data, bool):
+                raise TypeError("Value must be an integer")
+            if data < 0 or data >= 1 << bits:
+                raise OverflowError("int too big to convert")
+            return data
+        if type == winreg.REG_SZ or type == winreg.REG_EXPAND_SZ:
+            if data is None:
+                return ""
+            if not isinstance(data, str):
+                raise TypeError("Value must be a string")
+            return data
+        if type == winreg.REG_MULTI_SZ:
+            if data is None:
+                return []
+            if not isinstance(data, list) or not all(isinstance(s, str) for s in data):
+                raise TypeError("Value must be a list of strings")
+            return list(data)
+        # All other types are stored as raw bytes
+        if data is None:
+            return None
+        try:
+            data = bytes(memoryview(data))
+        except TypeError:
+            raise TypeError(f"Objects of type '{data.__class__.__name__}' can not be used as binary registry values") from None
+        return data if len(data) > 0 else None
+
+    @staticmethod
+    def _copy(data:Any)-> Any:
+        return list(data) if isinstance(data, list) else data
+
+    def _change(self, node:MemoryNode)-> None:
+        # Records a change to node, for notifications. Called with the lock held.
+        if self._notifications:
+            self._changed.append(node)
+
+    def _dispatch(self)-> None:
+        # Calls the notification callbacks for the recorded changes, once each, without holding the lock
+        with self._lock:
+            changed, self._changed = self._changed, []
+            callbacks = {}
+            for node in changed:
+                ancestor = node
+                while ancestor is not None:
+                    for token, (subtree, callback) in self._notifications.get(ancestor, {}).items():
+                        if ancestor is node or subtree:
+                            callbacks[token] = callback
+                    ancestor = ancestor.parent
+        for callback in callbacks.values():
+            callback()
+
+
+    # Backend interface
+    def open_key(self, key, sub_key, access):
+        with self._lock:
+            return MemoryHandle(self._walk(self._node(key), sub_key or "", create=False), access)
+
+    def create_key(self, key, sub_key, access):
+        with self._lock:
+            node = self._node(key)
+            try:
+                node = self._walk(node, sub_key or "", create=False)
+            except FileNotFoundError:
+                if isinstance(key, MemoryHandle):
+                    self._node(key, winreg.KEY_CREATE_SUB_KEY)
+                node = self._walk(node, sub_key or "", create=True)
+            handle = MemoryHandle(node, access)
+        if self._changed:
+            self._dispatch()
+        return handle
+
+    def close_key(self, handle):
+        handle.Close()
+
+    def query_info_key(self, handle):
+        with self._lock:
+            node = self._node(handle, winreg.KEY_QUERY_VALUE)
+            return (len(node.subkeys), len(node.values), node.last_write)
+
+    def enum_key(self, handle, index):
+        with self._lock:
+            node = self._node(handle, winreg.KEY_ENUMERATE_SUB_KEYS)
+            if node.sorted_subkeys is None:
+                node.sorted_subkeys = [node.subkeys[k].name for k in sorted(node.subkeys)]
+            if index < 0 or index >= len(node.sorted_subkeys):
+                raise OSError("No more data is available.")
+            return node.sorted_subkeys[index]
+
+    def enum_value(self, handle, index):
+        with self._lock:
+            node = self._node(handle, winreg.KEY_QUERY_VALUE)
+            if node.value_list is None:
+                node.value_list = list(node.values.values())
+            if index < 0 or index >= len(node.value_list):
+                raise OSError("No more data is available.")
+            name, data, type = node.value_list[index]
+            return (name, self._copy(data), type)
+
+    def query_value(self, handle, name):
+        with self._lock:
+            node = self._node(handle, winreg.KEY_QUERY_VALUE)
+            tup = node.values.get((name or "").casefold())
+            if tup is None:
+                raise FileNotFoundError("The system cannot find the file specified.")
+            return (self._copy(tup[1]), tup[2])
+
+    def set_value(self, handle, name, type, data):
+        with self._lock:
+            node = self._node(handle, winreg.KEY_SET_VALUE)
+            name = name or ""
+            data = self._convert(type, data)
+            folded = name.casefold()
+            if folded in node.values:   # Keep the original name and position
+                name = node.values[folded][0]
+            node.values[folded] = (name, data, type)
+            node.value_list = None
+            node.last_write = self._now()
+            self._change(node)
+        if self._changed:
+            self._dispatch()
+
+    def delete_value(self, handle, name):
+        with self._lock:
+            node = self._node(handle, winreg.KEY_SET_VALUE)
+            if node.values.pop((name or "").casefold(), None) is None:
+                raise FileNotFoundError("The system cannot find the file specified.")
+            node.value_list = None
+            node.last_write = self._now()
+            self._change(node)
+        if self._changed:
+            self._dispatch()
+
+    def delete_key(self, key, sub_key):
+        with self._lock:
+            node = self._walk(self._node(key), sub_key or "", create=False)
+            if node.parent is None:
+                raise PermissionError("Access is denied.")  # Cannot delete a hive
+            if len(node.subkeys) > 0:
+                raise PermissionError("Access is denied.")
+            self._unlink(node)
+        if self._changed:
+            self._dispatch()
+
+    def delete_tree(self, key, sub_key):
+        with self._lock:
+            node = self._walk(self._node(key), sub_key or "", create=False)
+            if node.parent is None:
+                raise PermissionError("Access is denied.")  # Cannot delete a hive
+            stack = [node]
+            while stack:
+                n = stack.pop()
+                n.deleted = True
+                self._change(n)
+                stack.extend(n.subkeys.values())
+            self._unlink(node)
+        if self._changed:
+            self._dispatch()
+
+    def notify(self, key, sub_key, subtree, callback):
+        with self._lock:
+            node = self._walk(self._node(key), sub_key or "", create=False)
+            self._tokens += 1
+            self._notifications.setdefault(node, {})[self._tokens] = (subtree, callback)
+            return (node, self._tokens)
+
+    def cancel_notify(self, token):
+        with self._lock:
+            node, token = token
+            callbacks = self._notifications.get(node, {})
+            callbacks.pop(token, None)
+            if not callbacks:
+                self._notifications.pop(node, None)
+
+    def _unlink(self, node:MemoryNode)-> None:
+        parent = node.parent
+        del parent.subkeys[node.name.casefold()]
+        parent.sorted_subkeys = None
+        parent.last_write = self._now()
+        node.deleted = True
+        self._change(node)
+        self._change(parent)
+
+
+
+###############################################################################
+## Read-Only Backends
+###############################################################################
+
+class MountedHandle:
+    """
+    Open handle to a key in a MountedBackend. Can be used as a context manager, like winreg.HKEYType.
+    """
+
+    __slots__ = ("node", "depth")
+
+    def __init__(self, node:Any, depth:int)-> None:
+        self.node = node        # Key in the backend's own format, or None for a key above the root key
+        self.depth = depth      # Number of keys below the hive, for keys above the root key
+
+    def Close(self)-> None:
+        pass
+
+    def __enter__(self)-> "MountedHandle":
+        return self
+
+    def __exit__(self, *args)-> None:
+        self.Close()
+
+
+
+class MountedBackend(Backend):
+    """
+    Base class for read-only backends which serve a stored tree of keys (a file), mounted at a location in the registry.
+
+    Subclasses set self.root to the location of the tree's root key (a RegPath), and implement the _key_* methods
+    below for their own representation of keys ("nodes"). The keys above the root key, up to the hive, can also be
+    opened; they have no values, and a single subkey on the way to the root key. Writes raise PermissionError.
+    """
+
+    root = None
+
+
+    # Methods implemented by subclasses
+    def _root_node(self)-> Any:
+        """Returns the root key of the tree."""
+        raise NotImplementedError
+
+    def _key_info(self, node:Any)-> tuple[int, int, int]:
+        """Returns (number of subkeys, number of values, last write time) of a key."""
+        raise NotImplementedError
+
+    def _key_subkey(self, node:Any, index:int)-> str:
+        """Returns the name of a key's subkey, by index. Raises OSError if the index is out of range."""
+        raise NotImplementedError
+
+    def _key_find(self, node:Any, folded:str)-> Any|None:
+        """Returns a key's subkey, by casefolded name, or None if it does not exist."""
+        raise NotImplementedError
+
+    def _key_value(self, node:Any, index:int)-> tuple[str, Any, int]:
+        """Returns (name, data, type) of a key's value, by index. Raises OSError if the index is out of range."""
+        raise NotImplementedError
+
+    def _key_query(self, node:Any, folded:str)-> tuple[Any, int]|None:
+        """Returns (data, type) of a key's value, by casefolded name, or None if it does not exist."""
+        raise NotImplementedError
+
+
+    # Private methods
+    def _handle(self, key:Any)-> MountedHandle:
+        # Converts a hive or handle to a MountedHandle
+        if isinstance(key, MountedHandle):
+            return key
+        if key == self.root.hive:
+            return MountedHandle(self._root_node() if self.root.depth == 0 else None, 0)
+        raise FileNotFoundError("The system cannot find the file specified.")
+
+    def __enter__(self)-> "MountedBackend":
+        return self
+
+    def __exit__(self, *args)-> None:
+        self.close()
+
+
+    # Backend interface
+    def open_key(self, key, sub_key, access):
+        handle = self._handle(key)
+        node, depth = handle.node, handle.depth
+        for name in (sub_key or "").split("\\"):
+            if name == "":
+                continue
+            folded = name.casefold()
+            if node is None:    # Above the root key
+                if folded != self.root.components[depth].casefold():
+                    raise FileNotFoundError("The system cannot find the file specified.")
+                depth += 1
+                if depth == self.root.depth:
+                    node = self._root_node()
+                continue
+            node = self._key_find(node, folded)
+            if node is None:
+                raise FileNotFoundError("The system cannot find the file specified.")
+        return MountedHandle(node, depth)
+
+    def create_key(self, key, sub_key, access):
+        raise PermissionError("Access is denied.")
+
+    def close_key(self, handle):
+        handle.Close()
+
+    def query_info_key(self, handle):
+        handle = self._handle(handle)
+        if handle.node is None:
+            return (1, 0, 0)
+        return self._key_info(handle.node)
+
+    def enum_key(self, handle, index):
+        handle = self._handle(handle)
+        if handle.node is not None:
+            return self._key_subkey(handle.node, index)
+        if index == 0:
+            return self.root.components[handle.depth]
+        raise OSError("No more data is available.")
+
+    def enum_value(self, handle, index):
+        handle = self._handle(handle)
+        if handle.node is not None:
+            return self._key_value(handle.node, index)
+        raise OSError("No more data is available.")
+
+    def query_value(self, handle, name):
+        handle = self._handle(handle)
+        value = self._key_query(handle.node, (name or "").casefold()) if handle.node is not None else None
+        if value is None:
+            raise FileNotFoundError("The system cannot find the file specified.")
+        return value
+
+    def set_value(self, handle, name, type, data):
+        raise PermissionError("Access is denied.")
+
+    def delete_value(self, handle, name):
+        raise PermissionError("Access is denied.")
+
+    def delete_key(self, key, sub_key):
+        raise PermissionError("Access is denied.")
+
+
+    # Public methods
+    def close(self)-> None:
+        """
+        Close the underlying file. Handles opened from this backend can no longer be used.
+        """
+
+        pass
+
+
+
+###############################################################################
+## Backend Selection
+###############################################################################
+
+BACKEND = WinregBackend() if WINREG_AVAILABLE else None
+
+
+
+def get_backend()-> Backend|None:
+    """
+    Returns the backend used by common.py functions and Key objects.
+
+    Defaults to WinregBackend on Windows, or None on other platforms.
+    """
+
+    return BACKEND
+
+
+
+def set_backend(
+        backend:Backend|None
+    )-> Backend|None:
+    """
+    Sets the backend used by common.py functions and Key objects.
+
+    Parameters:
+    -----------
+    backend
+        Backend object (for example, MemoryBackend()), or None to disable registry access.
+
+    Returns:
+    --------
+    previous_backend
+        The backend which was in use before this call.
+    """
+
+    global BACKEND
+    previous = BACKEND
+    BACKEND = backend
+    return previous
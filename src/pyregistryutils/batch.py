@@ -0,0 +1,300 @@
+from typing import Any
+
+from .common import *
+from .common import __get_backend__, __open_handle__, __print_error__, __invalidate_read_cache__
+
+
+
+class BatchOperation:
+    """
+    An operation queued in a Batch, and its outcome once the batch is committed.
+    """
+
+    PENDING = "pending"         # Queued, not committed yet
+    APPLIED = "applied"         # Written to the registry
+    CANCELLED = "cancelled"     # Made redundant by a later operation in the same batch (not written)
+    FAILED = "failed"           # Error; see self.error
+
+    __slots__ = ("operation", "abspath", "name", "value", "status", "result", "error")
+
+    def __init__(self, operation:str, abspath:str, name:str|None = None, value:tuple[Any,int]|None = None)-> None:
+        self.operation = operation  # Name of the common.py function this operation stands for
+        self.abspath = abspath
+        self.name = name
+        self.value = value
+        self.status = BatchOperation.PENDING
+        self.result = None          # Return value of the equivalent common.py function
+        self.error = None           # Exception which caused the operation to fail
+
+    def __repr__(self)-> str:
+        name = f", \"{self.name}\"" if self.name is not None else ""
+        return f"BatchOperation({self.operation}, \"{self.abspath}\"{name}: {self.status})"
+
+
+
+class BatchKey:
+    """
+    Operations queued for one key in a Batch.
+    """
+
+    __slots__ = ("path", "create", "values")
+
+    def __init__(self, path:RegPath)-> None:
+        self.path = path
+        self.create = []    # Queued create_key operations
+        self.values = {}    # Latest queued save or delete per value: {casefolded name: BatchOperation}
+
+
+
+class Batch:
+    """
+    Queue of write operations, applied together by commit().
+
+    Operations are queued with the same arguments as the functions of the same name in common.py,
+    and applied when commit() is called, or when leaving a "with" block without an exception:
+
+        with Batch() as batch:
+            batch.save_value("HKCU:Software\\MyApp", "a", (1, reg.TYPE_DWORD))
+            batch.delete_value("HKCU:Software\\MyApp", "b")
+        report = batch.report
+
+    Redundant operations are cancelled when they are queued: a value saved or deleted again replaces
+    the earlier operation, and delete_key() replaces all operations queued below the deleted key.
+    On commit, key deletions are applied first, then the remaining operations are applied key by key
+    (parents before children), with one handle per key.
+    """
+
+    def __init__(self,
+            session:"Session|None" = None
+        )-> None:
+        """
+        Create a new, empty Batch.
+
+        Parameters
+        ----------
+        session (Optional; Default=None)
+            Session whose cached handles are used on commit (see Session).
+        """
+
+        self.session = session
+        self.report = []        # All operations, in the order they were queued
+        self._keys = {}         # {RegPath.key: BatchKey}
+        self._deletes = {}      # Queued delete_key operations: {RegPath.key: (RegPath, BatchOperation)}
+
+
+    # Private methods
+    def __len__(self)-> int:
+        return sum(op.status == BatchOperation.PENDING for op in self.report)
+
+    def __enter__(self)-> "Batch":
+        return self
+
+    def __exit__(self, exc_type, *args)-> None:
+        if exc_type is None:
+            self.commit()
+
+    def _queue(self, operation:str, abspath:str, name:str|None = None, value:tuple[Any,int]|None = None)-> tuple[BatchOperation, RegPath|None]:
+        # Add an operation to the report. Returns the operation, and its parsed path (None if the operation failed validation).
+        op = BatchOperation(operation, abspath, name, value)
+        self.report.append(op)
+        path = RegPath.parse(abspath)
+        if path is None:
+            op.status, op.error = BatchOperation.FAILED, ValueError(f"Invalid path: \"{abspath}\"")
+            return op, None
+        op.abspath = path.abspath
+        return op, path
+
+    def _batchkey(self, path:RegPath)-> BatchKey:
+        batchkey = self._keys.get(path.key)
+        if batchkey is None:
+            batchkey = self._keys[path.key] = BatchKey(path)
+        return batchkey
+
+    def _set_value(self, operation:str, abspath:str, name:str, value:tuple[Any,int]|None)-> BatchOperation:
+        op, path = self._queue(operation, abspath, name, value)
+        if path is None:
+            return op
+        if name is None:
+            op.status, op.error = BatchOperation.FAILED, ValueError("Value name cannot be None")
+            return op
+        batchkey = self._batchkey(path)
+        previous = batchkey.values.get(name.casefold())
+        if previous is not None:    # Only the last save or delete of a value is applied
+            previous.status = BatchOperation.CANCELLED
+        batchkey.values[name.casefold()] = op
+        return op
+
+    def _cancel(self, ops:list[BatchOperation])-> None:
+        for op in ops:
+            op.status = BatchOperation.CANCELLED
+
+    def _apply(self, backend:Any, batchkey:BatchKey, ops:list[BatchOperation], creates:bool)-> None:
+        # Apply the operations queued for one key, through a single handle
+        path = batchkey.path
+        if creates:     # Open the key for writing, creating it if it does not exist
+            lease = __open_handle__(path.abspath, MODE_WRITE, self.session)
+        else:           # Only deletes values, so a missing key has nothing to delete
+            try:
+                lease = backend.open_key(path.hive, path.localpath, winreg.KEY_WRITE)
+            except FileNotFoundError:
+                for op in ops:
+                    op.status, op.result = BatchOperation.APPLIED, path.abspath
+                return
+            except Exception as e:
+                __print_error__(e, f"Error opening WRITE handle for key: \"{path.abspath}\"")
+                lease = None
+        if lease is None:   # Error opening handle
+            for op in ops:
+                op.status = BatchOperation.FAILED
+            return
+
+        with lease as handle:
+            for op in ops:
+                try:
+                    if op.operation == "save_value":
+                        backend.set_value(handle, op.name, op.value[1], op.value[0])   # value tuple must be (data, type)
+                    elif op.operation == "delete_value":
+                        try:
+                            backend.delete_value(handle, op.name)
+                        except FileNotFoundError:  # This is fine, because we were trying to delete the value anyway
+                            pass
+                except Exception as e:
+                    __print_error__(e, f"Error applying {op.operation} to key: \"{path.abspath}\"")
+                    op.status, op.error = BatchOperation.FAILED, e
+                    continue
+                op.status, op.result = BatchOperation.APPLIED, path.abspath
+        __invalidate_read_cache__(backend, path.abspath)
+
+
+    # Public methods
+    def create_key(self,
+            abspath:str
+        )-> BatchOperation:
+        """
+        Queue the creation of a key (see common.create_key()). Returns the queued operation.
+        """
+
+        op, path = self._queue("create_key", abspath)
+        if path is not None:
+            self._batchkey(path).create.append(op)
+        return op
+
+
+
+    def save_value(self,
+            abspath:str,
+            name:str,
+            value:tuple[Any,int]|None
+        )-> BatchOperation:
+        """
+        Queue saving a value (see common.save_value()). A value of None deletes the value. Returns the queued operation.
+        """
+
+        return self._set_value("save_value" if value is not None else "delete_value", abspath, name, value)
+
+
+
+    def save_values(self,
+            abspath:str,
+            values:dict[str, tuple[Any,int]|None]
+        )-> list[BatchOperation]:
+        """
+        Queue saving several values to a key (see common.save_values()). Returns the queued operations, one per value.
+        """
+
+        return [self.save_value(abspath, name, values[name]) for name in values]
+
+
+
+    def delete_value(self,
+            abspath:str,
+            name:str
+        )-> BatchOperation:
+        """
+        Queue deleting a value (see common.delete_value()). Returns the queued operation.
+
+        Unlike common.delete_value(), the key is not created if it does not exist.
+        """
+
+        return self._set_value("delete_value", abspath, name, None)
+
+
+
+    def delete_key(self,
+            abspath:str
+        )-> BatchOperation:
+        """
+        Queue deleting a key and all of its subkeys (see common.delete_key()). Returns the queued operation.
+
+        Operations queued earlier for the key or its subkeys are cancelled. Operations queued later are applied
+        after the deletion.
+        """
+
+        op, path = self._queue("delete_key", abspath)
+        if path is None:
+            return op
+        if path.depth == 0:
+            op.status, op.error = BatchOperation.FAILED, ValueError("Cannot delete a hive")
+            return op
+
+        # Cancel everything queued so far under the deleted key
+        for cachekey, batchkey in list(self._keys.items()):
+            if batchkey.path.relative_to(path) is not None:
+                self._cancel(batchkey.create)
+                self._cancel(batchkey.values.values())
+                del self._keys[cachekey]
+        for cachekey, (deleted, previous) in list(self._deletes.items()):
+            if deleted.relative_to(path) is not None:
+                previous.status = BatchOperation.CANCELLED
+                del self._deletes[cachekey]
+        self._deletes[path.key] = (path, op)
+        return op
+
+
+
+    def commit(self)-> list[BatchOperation]:
+        """
+        Apply all queued operations, then clear the queue.
+
+        Returns
+        -------
+        report
+            All operations queued in this batch, in order, with their status and result:
+             - result of create_key, save_value and delete_value: absolute path of the modified key (or None).
+             - result of delete_key: list of paths of keys which were deleted.
+        """
+
+        session = self.session
+        backend = __get_backend__(session)
+
+        # Delete keys first; operations queued before a deletion were cancelled, and those queued after it recreate the key
+        for path, op in self._deletes.values():
+            if backend is None:
+                op.status, op.error = BatchOperation.FAILED, RuntimeError("No registry backend is set")
+                continue
+            errors = []
+            op.result = delete_key(op.abspath, session=session, progress=lambda path, error: errors.append(error) if error is not None else None)
+            op.status = BatchOperation.APPLIED if len(errors) == 0 else BatchOperation.FAILED
+            op.error = errors[0] if errors else None
+
+        # Apply the remaining operations key by key, with parents before children
+        batchkeys = sorted(self._keys.values(), key=lambda batchkey: (batchkey.path.hive, tuple(c.casefold() for c in batchkey.path.components)))
+        for i, batchkey in enumerate(batchkeys):
+            ops = batchkey.create + list(batchkey.values.values())
+            if len(ops) == 0:
+                continue
+            creates = len(batchkey.create) > 0 or any(op.value is not None for op in batchkey.values.values())
+
+            # Creating a subkey also creates this key, so a key which is only created does not need a handle of its own
+            if len(batchkey.values) == 0 and i+1 < len(batchkeys):
+                child = batchkeys[i+1]
+                if child.path.relative_to(batchkey.path) is not None and (child.create or any(op.value is not None for op in child.values.values())):
+                    for op in batchkey.create:
+                        op.status, op.result = BatchOperation.APPLIED, batchkey.path.abspath
+                    continue
+
+            self._apply(backend, batchkey, ops, creates)
+
+        self._keys = {}
+        self._deletes = {}
+        return self.report
@@ -1,7 +1,12 @@
-import winreg
 import os
-from typing import Any
-from itertools import compress
+import ntpath
+import functools
+import collections
+import threading
+from typing import Any, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from .backend import winreg, get_backend
 
 # Error handling
 DEBUG_LEVEL = 0
@@ -12,6 +17,13 @@ MODE_WRITE = 1
 MODE_BOTH = 2
 MODE_DELETE = 3
 
+# Maps access modes to registry access rights
+MODE_ACCESS = {
+    MODE_READ:  winreg.KEY_READ,
+    MODE_WRITE: winreg.KEY_WRITE,
+    MODE_BOTH:  winreg.KEY_ALL_ACCESS
+}
+
 # Registry Value Types
 TYPE_NONE = winreg.REG_NONE             # No defined value type.
 TYPE_BINARY = winreg.REG_BINARY         # Binary data in any form.
@@ -68,6 +80,23 @@ HIVE_NAMES_SHORT = {
 HIVE_INTS = {v: k for k, v in HIVE_NAMES_LONG.items()}
 HIVE_INTS_SHORT = {v: k for k, v in HIVE_NAMES_SHORT.items()}
 
+# Registry path separator (independent of os.sep, so paths are handled the same on every platform)
+PATH_SEP = "\\"
+
+# Default size of the path parsing cache (see enable_path_cache())
+PATH_CACHE_MAXSIZE = 4096
+
+# Default size of the read cache (see enable_read_cache())
+READ_CACHE_MAXSIZE = 1024
+
+# Parallel walks (walk(), iter_subkeys() with parallel=True) read at most this many keys per worker thread
+# ahead of the caller
+PARALLEL_READAHEAD = 4
+
+# load_values() queries values by name if at most this fraction of the key's values are requested,
+# and enumerates all of the key's values otherwise
+LOAD_VALUES_QUERY_RATIO = 0.5
+
 
 
 ###############################################################################
@@ -85,10 +114,23 @@ def __print_error__(
         raise exception
 
 
+def __get_backend__(
+        session:"Session|None" = None
+    )-> Any|None:
+    """
+    Returns the backend of the session, or the current backend (see get_backend()) if session is None.
+    """
+
+    if session is not None:
+        return session.backend
+    return get_backend()
+
+
 def __open_handle__(
         abspath:str,
-        mode:int
-    )-> winreg.HKEYType|None:
+        mode:int,
+        session:"Session|None" = None
+    )-> Any|None:
     """
     Opens an IO handle to the specified key.
 
@@ -102,11 +144,15 @@ def __open_handle__(
         - MODE_WRITE:  creates the key if it does not exist, and opens a handle for writing.
         - MODE_BOTH:   creates the key if it does not exist, and opens a handle for both reading and writing.
         - MODE_DELETE: deletes the key if it exists and has no subkeys. Also see delete_key().
+    session (Optional; Default=None)
+        Session to open the handle through. If None, a new handle is opened with the current backend.
     
     Returns:
     --------
     handle | None
         Handle object for the specified key, or None if errors occurred.
+
+        The handle is a context manager. Handles owned by a session are returned to it (not closed) on exit.
     """
 
     # Validate abspath
@@ -117,30 +163,46 @@ def __open_handle__(
     localpath = tup[1]
     abspath = tup[2]
 
+    backend = __get_backend__(session)
+    if backend is None:
+        __print_error__(RuntimeError("No registry backend is set"), f"Error opening handle for key: \"{abspath}\" (no backend)")
+        return None
+
+    # Reuse or cache the handle in the session
+    if session is not None and mode in MODE_ACCESS:
+        try:
+            return session.open(hive, localpath, mode)
+        except Exception as e:
+            __print_error__(e, f"Error opening handle for key: \"{abspath}\"")
+            return None
+
     if mode == MODE_READ:
         try:    
-            return winreg.OpenKeyEx(hive, localpath, 0, winreg.KEY_READ)
+            return backend.open_key(hive, localpath, winreg.KEY_READ)
         except Exception as e:
             __print_error__(e, f"Error opening READ handle for key: \"{abspath}\"")
             return None
 
     elif mode == MODE_WRITE:
         try:    
-            return winreg.CreateKeyEx(hive, localpath, 0, winreg.KEY_WRITE)
+            return backend.create_key(hive, localpath, winreg.KEY_WRITE)
         except Exception as e:
             __print_error__(e, f"Error opening WRITE handle for key: \"{abspath}\"")
             return None
 
     elif mode == MODE_BOTH:
         try:    
-            return winreg.CreateKeyEx(hive, localpath, 0, winreg.KEY_ALL_ACCESS)
+            return backend.create_key(hive, localpath, winreg.KEY_ALL_ACCESS)
         except Exception as e:
             __print_error__(e, f"Error opening READ/WRITE handle for key: \"{abspath}\"")
             return None
 
     elif mode == MODE_DELETE:
+        if session is not None:
+            session.discard(hive, localpath)    # Cached handles to the key become invalid
         try:    
-            winreg.DeleteKeyEx(hive, localpath)
+            backend.delete_key(hive, localpath)
+            __invalidate_read_cache__(backend, abspath, subtree=True)
             return 0
         except Exception as e: # Error deleting key (it may not exist)
             __print_error__(e, f"Error deleting key: \"{abspath}\"")
@@ -152,7 +214,8 @@ def __open_handle__(
 
 
 def __close_handle__(
-        handle:winreg.HKEYType
+        handle:Any,
+        session:"Session|None" = None
     )-> None:
     """
     Close an IO handle.
@@ -161,20 +224,498 @@ def __close_handle__(
     ----------
     handle
         Handle object for an open registry key.
+    session (Optional; Default=None)
+        Session the handle was opened through (see __open_handle__). Its backend closes the handle.
     """
 
     if handle is not None:
-        winreg.CloseKey(handle)
+        __get_backend__(session).close_key(handle)
         handle = None
 
 
 
+def __join_subkey__(
+        abspath:str,
+        name:str
+    )-> str:
+    """
+    Appends a subkey name to a clean absolute path (as returned by split_abspath).
+    """
+
+    if abspath.endswith(":"):   # Hive root, e.g. "HKLM:"
+        return abspath + name
+    return abspath + PATH_SEP + name
+
+
+
+def __read_key__(
+        backend:Any,
+        handle:Any
+    )-> tuple[list[str], dict[str, tuple[Any,int]]]:
+    """
+    Reads the subkey names and values of an open key, with a single QueryInfoKey.
+
+    Returns:
+    --------
+    (subkey_names, values)
+        values = {"name": (data, type), ... }
+    """
+
+    nsubkeys, nvalues = backend.query_info_key(handle)[0:2]
+    names = [backend.enum_key(handle, i) for i in range(nsubkeys)]
+    values = {}
+    for i in range(nvalues):
+        tup = backend.enum_value(handle, i)
+        values[tup[0]] = (tup[1], tup[2])   # tup [0] is name, [1] is data, [2] is type
+    return names, values
+
+
+
+def __read_subkeys__(
+        backend:Any,
+        handle:Any,
+        abspath:str
+    )-> tuple[int, list[str]|None]:
+    """
+    Returns the number of subkeys of an open key, with a single QueryInfoKey, and their names if the read cache
+    is enabled (see enable_read_cache()). Otherwise, the names are left to be enumerated by the caller.
+    """
+
+    nsubkeys, _, last_write = backend.query_info_key(handle)[0:3]
+    entry = __read_cache_entry__(backend, abspath, last_write)
+    if entry is None:
+        return nsubkeys, None
+    names = entry["subkeys"]
+    __read_cache_record__(names is not None)
+    if names is None:
+        names = entry["subkeys"] = [backend.enum_key(handle, i) for i in range(nsubkeys)]
+    return len(names), names
+
+
+
+def __parallel_walk__(
+        backend:Any,
+        handle:Any,
+        abspath:str,
+        topdown:bool,
+        maxdepth:int,
+        onerror:Callable[[OSError],None]|None,
+        max_workers:int|None,
+        names_only:bool = False
+    )-> Iterator[tuple[str, list[str], dict[str, tuple[Any,int]]]]|Iterator[str]:
+    """
+    Same as walk() from the open handle of abspath, but subkeys are read ahead concurrently by a thread pool.
+    If names_only is True, yields subkey paths instead, like iter_subkeys().
+
+    Each subkey is opened relative to its parent's handle. A worker which has read a key queues reads of its
+    own subkeys, so idle workers pick up whichever subtrees are waiting, regardless of the shape of the tree.
+    At most PARALLEL_READAHEAD keys per worker are read ahead of the caller; keys which were not read ahead
+    are read when they are reached. Results are yielded in the same order as the serial walk() / iter_subkeys(),
+    subkey names come from their parent's enumeration (so subkeys which cannot be opened are still listed by
+    iter_subkeys()), and keys which cannot be read are reported to onerror, with the key's path as filename.
+
+    Reads ahead of subkeys removed from subkey_names (topdown=True) are cancelled, along with their own subkeys.
+    """
+
+    workers = max_workers if max_workers is not None else min(32, (os.cpu_count() or 1) + 4)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    readahead = threading.Semaphore(workers * PARALLEL_READAHEAD)  # One per key read ahead, until it is consumed
+
+    def read_key(handle:Any)-> tuple[list[str], dict[str, tuple[Any,int]]]:
+        if names_only:
+            return [backend.enum_key(handle, i) for i in range(backend.query_info_key(handle)[0])], {}
+        return __read_key__(backend, handle)
+
+    def queue(handle:Any, names:list[str], depth:int)-> dict[str,Future]:
+        # Reads subkeys ahead, for as long as there is room
+        children = {}
+        if depth != 0:
+            for name in names:
+                if not readahead.acquire(blocking=False):
+                    break
+                children[name] = executor.submit(read, handle, name, depth-1)
+        return children
+
+    def read(parent:Any, name:str, depth:int)-> tuple[Any, list[str], dict, dict[str,Future]]:
+        # Opens and reads a subkey, and reads its own subkeys ahead. The handle is closed by the caller.
+        handle = backend.open_key(parent, name, winreg.KEY_READ)
+        try:
+            names, values = read_key(handle)
+        except OSError:
+            backend.close_key(handle)
+            raise
+        return handle, names, values, queue(handle, names, depth)
+
+    def discard(future:Future)-> None:
+        # Cancels a read ahead, or waits for it and closes its handle (after discarding its own reads ahead)
+        if not future.cancel():
+            try:
+                handle, _, _, children = future.result()
+                for child in children.values():
+                    discard(child)
+                backend.close_key(handle)
+            except OSError:
+                pass
+        readahead.release()
+
+    def prune(frame:list)-> None:
+        # Discards the reads ahead of subkeys which the caller removed from subkey_names
+        names = set(frame[2])
+        for name in [name for name in frame[4] if name not in names]:
+            discard(frame[4].pop(name))
+
+    def error(e:OSError, path:str)-> None:
+        if e.filename is None:
+            e.filename = path
+        if onerror is not None:
+            onerror(e)
+
+    # Each stack frame is [handle, abspath, subkey names, values, {name: future read ahead}, next subkey index, remaining depth]
+    stack = []
+    try:
+        try:
+            names, values = read_key(handle)
+        except OSError as e:
+            error(e, abspath)
+            return
+        stack.append([handle, abspath, names, values, queue(handle, names, maxdepth), 0, maxdepth])
+        if topdown and not names_only:
+            yield abspath, names, values
+            prune(stack[0])
+
+        while stack:
+            frame = stack[-1]
+            handle, path, names, values, children, index, depth = frame
+            if index >= len(names):     # Finished with this key
+                stack.pop()
+                for future in children.values():
+                    discard(future)
+                if stack:               # The root handle is closed by the caller
+                    backend.close_key(handle)
+                if not topdown and not names_only:
+                    yield path, names, values
+                continue
+            frame[5] = index + 1
+
+            name = names[index]
+            subkey = __join_subkey__(path, name)
+            if names_only:
+                yield subkey
+            if depth == 0:
+                continue    # Below maxdepth
+
+            future = children.pop(name, None)
+            try:
+                if future is None:  # Not read ahead, or added to subkey_names by the caller
+                    child = read(handle, name, depth-1)
+                else:
+                    try:
+                        child = future.result()
+                    finally:
+                        readahead.release()
+            except OSError as e:
+                error(e, subkey)
+                continue
+            stack.append([child[0], subkey, child[1], child[2], child[3], 0, depth-1])
+            if topdown and not names_only:
+                yield subkey, child[1], child[2]
+                prune(stack[-1])
+    finally:
+        for frame in reversed(stack):
+            for future in frame[4].values():
+                discard(future)
+            if frame is not stack[0]:
+                backend.close_key(frame[0])
+        executor.shutdown(wait=True)
+
+
+
+# Path functions which can be memoized: {name: function}, and their caches while enabled: {name: lru_cache}
+__path_functions__ = {}
+__path_caches__ = {}
+__path_cache_maxsize__ = None   # None while the path cache is disabled
+
+
+
+def __memoize_path__(
+        cacheable:Callable[...,bool]|None = None
+    )-> Callable:
+    """
+    Decorator which registers a pure path-parsing function with the path cache (see enable_path_cache()).
+
+    While the cache is disabled, the function is called directly. While it is enabled, results are cached
+    by the function's arguments (the input string and hive name mode).
+
+    Parameters:
+    -----------
+    cacheable (Optional; Default=None)
+        Function which is called with the same arguments, and returns False if the result must not be cached.
+    """
+
+    def decorator(function:Callable)-> Callable:
+        name = function.__name__
+        __path_functions__[name] = function
+        if __path_cache_maxsize__ is not None:  # Cache is already enabled
+            __path_caches__[name] = functools.lru_cache(maxsize=__path_cache_maxsize__)(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            cache = __path_caches__.get(name)
+            if cache is not None and (cacheable is None or cacheable(*args, **kwargs)):
+                try:
+                    return cache(*args, **kwargs)
+                except TypeError:   # Unhashable arguments
+                    pass
+            return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+
+__read_cache__ = collections.OrderedDict()  # {(backend, casefolded abspath): entry}, least recently used first
+__read_cache_maxsize__ = None               # None while the read cache is disabled
+__read_cache_stats__ = {"hits": 0, "misses": 0}
+__read_cache_lock__ = threading.Lock()
+
+
+
+def __read_cache_entry__(
+        backend:Any,
+        abspath:str,
+        last_write:int
+    )-> dict[str,Any]|None:
+    """
+    Returns the read cache entry of a key (see enable_read_cache()), given its last write time from QueryInfoKey.
+
+    If the cached entry was read at a different last write time, it is replaced by an empty one.
+    Returns None if the cache is disabled, or if the backend does not report last write times (0).
+
+    Entry:
+        {"last_write": int,
+         "subkeys": [names] | None,                     # None until read
+         "values": {name: (data, type)} | None,         # All values; None until read
+         "known": {casefolded name: (data, type)|None}} # Values read so far (all of them, if "values" is read)
+    """
+
+    if __read_cache_maxsize__ is None or last_write == 0:
+        return None
+    tup = split_abspath(abspath)
+    if tup is None:
+        return None
+    key = (backend, tup[2].casefold())
+    with __read_cache_lock__:
+        entry = __read_cache__.get(key)
+        if entry is not None and entry["last_write"] == last_write:
+            __read_cache__.move_to_end(key)
+            return entry
+        entry = {"last_write": last_write, "subkeys": None, "values": None, "known": {}}
+        __read_cache__[key] = entry
+        __read_cache__.move_to_end(key)
+        while len(__read_cache__) > __read_cache_maxsize__:
+            __read_cache__.popitem(last=False)
+        return entry
+
+
+
+def __read_cache_record__(
+        hit:bool
+    )-> None:
+    """
+    Counts a read cache hit or miss (see read_cache_info()).
+    """
+
+    with __read_cache_lock__:
+        __read_cache_stats__["hits" if hit else "misses"] += 1
+
+
+
+def __read_cache_copy__(
+        value:tuple[Any,int]|None
+    )-> tuple[Any,int]|None:
+    """
+    Returns a value tuple (data, type) which does not share mutable data (REG_MULTI_SZ lists) with the read cache.
+    Values are copied both when stored in the cache and when returned from it.
+    """
+
+    if value is not None and isinstance(value[0], list):
+        return (list(value[0]), value[1])
+    return value
+
+
+
+def __invalidate_read_cache__(
+        backend:Any,
+        abspath:str,
+        subtree:bool = False
+    )-> None:
+    """
+    Removes a key written by this package from the read cache, along with its parent keys (whose subkeys may
+    have been created), and all of its subkeys if subtree is True (the key was deleted).
+
+    Entries are also validated by last write time, but a write may not change it if it happens within the
+    resolution of the system clock, so writes made through this package are invalidated explicitly.
+    """
+
+    if __read_cache_maxsize__ is None:
+        return
+    tup = split_abspath(abspath)
+    if tup is None:
+        return
+    folded = tup[2].casefold()
+    keys = [folded]
+    path = folded
+    while not path.endswith(":"):   # Parent keys, up to the hive root
+        sep = path.rfind(PATH_SEP)
+        path = path[:sep] if sep >= 0 else path[:path.index(":")+1]
+        keys.append(path)
+    with __read_cache_lock__:
+        for path in keys:
+            __read_cache__.pop((backend, path), None)
+        if subtree:
+            prefix = folded + PATH_SEP if not folded.endswith(":") else folded
+            for key in [key for key in __read_cache__ if key[0] is backend and key[1].startswith(prefix)]:
+                del __read_cache__[key]
+
+
+
 ###############################################################################
 ## Utility Functions
 ###############################################################################
 
 
 
+def enable_path_cache(
+        maxsize:int = PATH_CACHE_MAXSIZE
+    )-> None:
+    """
+    Enables a bounded LRU cache for path parsing and normalization (split_abspath, join_abspath, parse_location).
+
+    Each function has its own cache of up to maxsize entries. Enabling the cache again clears it.
+
+    Parameters:
+    -----------
+    maxsize (Optional; Default=PATH_CACHE_MAXSIZE)
+        Maximum number of cached results per function.
+    """
+
+    global __path_cache_maxsize__
+    __path_cache_maxsize__ = maxsize
+    for name, function in __path_functions__.items():
+        __path_caches__[name] = functools.lru_cache(maxsize=maxsize)(function)
+
+
+
+def disable_path_cache()-> None:
+    """
+    Disables and clears the path cache (see enable_path_cache()).
+    """
+
+    global __path_cache_maxsize__
+    __path_cache_maxsize__ = None
+    __path_caches__.clear()
+
+
+
+def clear_path_cache()-> None:
+    """
+    Clears the path cache (see enable_path_cache()), without disabling it.
+    """
+
+    for cache in __path_caches__.values():
+        cache.cache_clear()
+
+
+
+def path_cache_info()-> dict[str, dict[str,int]]:
+    """
+    Returns statistics of the path cache (see enable_path_cache()).
+
+    Returns:
+    --------
+    info
+        {function name: {"hits", "misses", "maxsize", "currsize"}}, or {} if the cache is disabled.
+    """
+
+    return {name: cache.cache_info()._asdict() for name, cache in __path_caches__.items()}
+
+
+
+def enable_read_cache(
+        maxsize:int = READ_CACHE_MAXSIZE
+    )-> None:
+    """
+    Enables a bounded LRU cache of the subkey names and values read by list_subkeys, list_values, load_value
+    and load_values (and Key.load()).
+
+    Each key's entry is validated by a single QueryInfoKey: if the key's last write time has not changed since
+    it was read, its subkey names and values are returned from the cache instead of being enumerated or
+    queried again. Keys written through this package (save_value, save_values, create_key, delete_key, Batch)
+    are removed from the cache.
+
+    Changes made by other processes are detected by their last write time, which Windows updates with the
+    resolution of the system clock (about 15 ms): a key changed twice within that time may be returned as it
+    was after the first change. Backends which do not report last write times are not cached.
+    Reads with parallel=True, walk() and Key.populate() do not use the cache.
+
+    Enabling the cache again clears it and its statistics.
+
+    Parameters:
+    -----------
+    maxsize (Optional; Default=READ_CACHE_MAXSIZE)
+        Maximum number of cached keys. The least recently used keys are removed first.
+    """
+
+    global __read_cache_maxsize__
+    with __read_cache_lock__:
+        __read_cache_maxsize__ = maxsize
+        __read_cache__.clear()
+        __read_cache_stats__["hits"] = __read_cache_stats__["misses"] = 0
+
+
+
+def disable_read_cache()-> None:
+    """
+    Disables and clears the read cache (see enable_read_cache()) and its statistics.
+    """
+
+    global __read_cache_maxsize__
+    with __read_cache_lock__:
+        __read_cache_maxsize__ = None
+        __read_cache__.clear()
+        __read_cache_stats__["hits"] = __read_cache_stats__["misses"] = 0
+
+
+
+def clear_read_cache()-> None:
+    """
+    Clears the read cache (see enable_read_cache()) and its statistics, without disabling it.
+    """
+
+    with __read_cache_lock__:
+        __read_cache__.clear()
+        __read_cache_stats__["hits"] = __read_cache_stats__["misses"] = 0
+
+
+
+def read_cache_info()-> dict[str,int]:
+    """
+    Returns statistics of the read cache (see enable_read_cache()).
+
+    Returns:
+    --------
+    info
+        {"hits", "misses", "maxsize", "currsize"}. maxsize is None if the cache is disabled.
+    """
+
+    with __read_cache_lock__:
+        return {**__read_cache_stats__, "maxsize": __read_cache_maxsize__, "currsize": len(__read_cache__)}
+
+
+
+
+
+
+@__memoize_path__()
 def split_abspath(
         abspath:str,
         hivename_mode:int = HIVE_SHORTNAME
@@ -209,13 +750,13 @@ def split_abspath(
     # Sanitize input
     if abspath is None:
         return None
-    abspath = abspath.replace("/","\\").strip().strip(os.sep)
+    abspath = abspath.replace("/","\\").strip().strip(PATH_SEP)
     if abspath == "":
         return None
 
     # Split hive and local path
     split_short = abspath.split(":", 1)    # HKLM:...
-    split_long  = abspath.split(os.sep, 1) # HKEY_LOCAL_MACHINE\...
+    split_long  = abspath.split(PATH_SEP, 1) # HKEY_LOCAL_MACHINE\...
     if split_short[0] in HIVE_INTS_SHORT:
         hive = HIVE_INTS_SHORT[split_short[0]]
         localpath = split_short[1] if len(split_short) == 2 else ""
@@ -226,7 +767,7 @@ def split_abspath(
         return None # Invalid hive
     
     # Clean up localpath
-    localpath = os.path.normpath(localpath.strip().strip(os.sep))
+    localpath = ntpath.normpath(localpath.strip().strip(PATH_SEP))
     if localpath == ".":
         localpath = ""
     if " " in localpath or ":" in localpath or ".." in localpath:
@@ -234,7 +775,7 @@ def split_abspath(
 
     # Reconstruct abspath
     if hivename_mode == HIVE_LONGNAME:
-        abspath = os.path.join(HIVE_NAMES_LONG[hive], localpath) if localpath != "" else HIVE_NAMES_LONG[hive]
+        abspath = ntpath.join(HIVE_NAMES_LONG[hive], localpath) if localpath != "" else HIVE_NAMES_LONG[hive]
     else: # hivename_mode == HIVE_SHORTNAME:
         abspath = HIVE_NAMES_SHORT[hive]+":"+localpath
 
@@ -242,6 +783,7 @@ def split_abspath(
 
 
 
+@__memoize_path__()
 def join_abspath(
         hive:int,
         localpath:str,
@@ -271,7 +813,7 @@ def join_abspath(
         return None
 
     # Clean up localpath
-    localpath = os.path.normpath(localpath.replace("/","\\").strip().strip(os.sep))
+    localpath = ntpath.normpath(localpath.replace("/","\\").strip().strip(PATH_SEP))
     if localpath == ".":
         localpath = ""
     if " " in localpath or ":" in localpath or ".." in localpath:
@@ -281,12 +823,159 @@ def join_abspath(
     if hivename_mode == HIVE_SHORTNAME and hive in HIVE_NAMES_SHORT:
         return HIVE_NAMES_SHORT[hive]+":"+localpath
     elif hivename_mode == HIVE_LONGNAME and hive in HIVE_NAMES_LONG:
-        return os.path.join(HIVE_NAMES_LONG[hive], localpath) if localpath != "" else HIVE_NAMES_LONG[hive]
+        return ntpath.join(HIVE_NAMES_LONG[hive], localpath) if localpath != "" else HIVE_NAMES_LONG[hive]
     else:
         return None # Invalid hive
 
 
 
+class RegPath:
+    """
+    Immutable, parsed registry path.
+
+    Parsed and validated once (with split_abspath) at construction. Path operations work on the
+    tuple of key names, so they do not need to parse strings again:
+     - path.parent          Parent key (None at the hive root)
+     - path / "relpath"     Subkey at a relative path (None if invalid)
+     - path.relative_to(p)  Relative path from p to this path (None if not below p)
+
+    Paths are equal, and hash the same, if they refer to the same key (case-insensitive).
+    """
+
+    __slots__ = ("hive", "components", "localpath", "abspath", "key", "_parent")
+
+    def __init__(self,
+            hive:int,
+            components:tuple[str,...]
+        )-> None:
+        """
+        Create a RegPath from already validated parts. Use RegPath.parse() to parse a path string.
+
+        Parameters
+        ----------
+        hive
+            One of the predefined Hive handles (HKLM, HKCU, etc.)
+        components
+            Names of the keys from the hive down to this key.
+        """
+
+        localpath = PATH_SEP.join(components)
+        init = object.__setattr__
+        init(self, "hive", hive)
+        init(self, "components", components)
+        init(self, "localpath", localpath)
+        init(self, "abspath", HIVE_NAMES_SHORT[hive]+":"+localpath)                  # HKLM:path\to\key
+        init(self, "key", (hive, localpath.casefold()))                              # Case-insensitive identity
+        init(self, "_parent", None)
+
+
+    @staticmethod
+    def parse(
+            abspath:str
+        )-> "RegPath|None":
+        """
+        Parse an absolute path (in either format accepted by split_abspath) into a RegPath.
+
+        Returns None if the path is invalid.
+        """
+
+        tup = split_abspath(abspath)
+        if tup is None:
+            return None
+        return RegPath(tup[0], tuple(tup[1].split(PATH_SEP)) if tup[1] != "" else ())
+
+
+    # Properties
+    @property
+    def name(self)-> str:
+        """Name of this key (the last component), or "" at the hive root."""
+        return self.components[-1] if self.components else ""
+
+    @property
+    def longpath(self)-> str:
+        """Absolute path with the long hive name: HKEY_LOCAL_MACHINE\\path\\to\\key. Built on access, as it is rarely needed."""
+        return HIVE_NAMES_LONG[self.hive]+PATH_SEP+self.localpath if self.localpath != "" else HIVE_NAMES_LONG[self.hive]
+
+    @property
+    def depth(self)-> int:
+        """Number of keys below the hive root."""
+        return len(self.components)
+
+    @property
+    def parent(self)-> "RegPath|None":
+        """Parent key, or None if this is the hive root."""
+        if self._parent is None and self.components:
+            object.__setattr__(self, "_parent", RegPath(self.hive, self.components[:-1]))
+        return self._parent
+
+
+    # Private methods
+    def __setattr__(self, __name:str, __value:Any)-> None:
+        raise AttributeError("RegPath is immutable")
+
+    def __eq__(self, other:Any)-> bool:
+        return isinstance(other, RegPath) and self.key == other.key
+
+    def __hash__(self)-> int:
+        return hash(self.key)
+
+    def __str__(self)-> str:
+        return self.abspath
+
+    def __repr__(self)-> str:
+        return f"RegPath(\"{self.abspath}\")"
+
+    def __truediv__(self, relpath:str)-> "RegPath|None":
+        return self.join(relpath)
+
+
+    # Public methods
+    def astuple(self)-> tuple[int, str, str]:
+        """
+        Returns (hive, localpath, abspath), like split_abspath().
+        """
+
+        return (self.hive, self.localpath, self.abspath)
+
+
+
+    def join(self,
+            relpath:str
+        )-> "RegPath|None":
+        """
+        Returns the path of a subkey, relative to this path. Same as path / relpath.
+
+        Returns None if the resulting path is invalid.
+        """
+
+        if relpath is None:
+            return None
+        if relpath == "":
+            return self
+        # Plain key names need no normalization
+        if not any(c in relpath for c in "\\/: ") and ".." not in relpath and relpath != "." and relpath.strip() == relpath:
+            path = RegPath(self.hive, self.components + (relpath,))
+            object.__setattr__(path, "_parent", self)
+            return path
+        return RegPath.parse(self.abspath + PATH_SEP + relpath.strip().strip(PATH_SEP))
+
+
+
+    def relative_to(self,
+            root:"RegPath"
+        )-> str|None:
+        """
+        Returns the relative path from root to this path, or None if this path is not root or one of its subkeys.
+        """
+
+        if self.hive != root.hive:
+            return None
+        if root.key[1] != "" and self.key[1] != root.key[1] and not self.key[1].startswith(root.key[1]+PATH_SEP):
+            return None
+        return PATH_SEP.join(self.components[len(root.components):])
+
+
+
 def get_relpath(
         rootpath:str,
         subkeypath:str
@@ -312,22 +1001,15 @@ def get_relpath(
     """
 
     # Validate paths
-    tup1 = split_abspath(rootpath, HIVE_LONGNAME)
-    if tup1 is None:
+    root = RegPath.parse(rootpath)
+    if root is None:
         return None     # invalid rootpath
-    rootpath = tup1[2]
-    tup2 = split_abspath(subkeypath, HIVE_LONGNAME)
-    if tup2 is None:
+    subkey = RegPath.parse(subkeypath)
+    if subkey is None:
         return None     # invalid subkeypath
-    subkeypath = tup2[2]
 
-    # Get relative path
-    relpath = os.path.relpath(subkeypath, rootpath)
-    if ".." in relpath:
-        return None     # subkeypath is not a subkey of root
-    if relpath == ".":
-        return ""       # subkeypath is the same as root
-    return relpath
+    # Get relative path (None if subkeypath is not a subkey of root)
+    return subkey.relative_to(root)
 
 
 
@@ -335,11 +1017,16 @@ def get_relpath(
 
 def list_subkeys(
         abspath:str,
-        maxdepth:int = -1
+        maxdepth:int = -1,
+        session:"Session|None" = None,
+        parallel:bool = False,
+        max_workers:int|None = None
     )-> list[str]:
     """
     Lists all subkeys under abspath.
 
+    Same as list(iter_subkeys(abspath, maxdepth)).
+
     Parameters:
     -----------
     abspath
@@ -349,6 +1036,12 @@ def list_subkeys(
           - maxdepth = -1 : List all subkeys underneath abspath.
           - maxdepth = 0  : List only subkeys immediately under abspath.
           - maxdepth > 0  : List all subkeys underneath abspath up to the specified depth.
+    session (Optional; Default=None)
+        Session whose cached handles are used. If None, handles are opened and closed by this call.
+    parallel (Optional; Default=False)
+        If True, subtrees are enumerated concurrently by a thread pool. The result is the same.
+    max_workers (Optional; Default=None)
+        Number of threads used if parallel=True. Defaults to ThreadPoolExecutor's default.
     
     Returns:
     --------
@@ -356,31 +1049,215 @@ def list_subkeys(
         Absolute paths to subkeys of abspath.
     """
 
+    return list(iter_subkeys(abspath, maxdepth, session=session, parallel=parallel, max_workers=max_workers))
+
+
+
+def iter_subkeys(
+        abspath:str,
+        maxdepth:int = -1,
+        session:"Session|None" = None,
+        parallel:bool = False,
+        max_workers:int|None = None
+    )-> Iterator[str]:
+    """
+    Iterates over all subkeys under abspath, depth-first (each subkey is followed by its own subkeys).
+
+    Subkeys are opened relative to their parent's handle, and paths are yielded as soon as they are found.
+    Only the handles of the keys along the current path are held open, so memory use is proportional
+    to the depth of the tree rather than its size.
+
+    Parameters:
+    -----------
+    abspath
+        Absolute path of a registry key (including hive).
+    maxdepth (Optional; Default=-1)
+        Search depth for subkeys.
+          - maxdepth = -1 : List all subkeys underneath abspath.
+          - maxdepth = 0  : List only subkeys immediately under abspath.
+          - maxdepth > 0  : List all subkeys underneath abspath up to the specified depth.
+    session (Optional; Default=None)
+        Session whose cached handles are used for abspath. If None, handles are opened and closed by this call.
+    parallel (Optional; Default=False)
+        If True, subtrees are enumerated concurrently by a thread pool. Subkeys are yielded in the same order.
+    max_workers (Optional; Default=None)
+        Number of threads used if parallel=True. Defaults to ThreadPoolExecutor's default.
+    
+    Yields:
+    -------
+    subkey
+        Absolute path to a subkey of abspath.
+    """
+
     # Validate abspath
     tup = split_abspath(abspath)
     if tup is None:
-        return []     # invalid abspath
+        return      # invalid abspath
     abspath = tup[2]
+    backend = __get_backend__(session)
+
+    root = __open_handle__(abspath, MODE_READ, session)
+    if root is None:
+        return      # Error opening handle
+    with root as handle:
+        if parallel:
+            onerror = lambda e: __print_error__(e, f"Error opening READ handle for key: \"{e.filename}\"")
+            yield from __parallel_walk__(backend, handle, abspath, True, maxdepth, onerror, max_workers, names_only=True)
+            return
+
+        # Each stack frame is [handle, abspath, next subkey index, number of subkeys, cached subkey names, remaining depth]
+        stack = [[handle, abspath, 0, *__read_subkeys__(backend, handle, abspath), maxdepth]]
+        try:
+            while stack:
+                frame = stack[-1]
+                handle, path, index, count, names, depth = frame
+                if index >= count:  # Finished with this key
+                    stack.pop()
+                    if stack:       # The root handle is closed by the "with" block
+                        backend.close_key(handle)
+                    continue
+                frame[2] = index + 1
+
+                name = names[index] if names is not None else backend.enum_key(handle, index)
+                subkey = __join_subkey__(path, name)
+                yield subkey
+
+                if depth != 0:      # Search for more subkeys underneath subkey
+                    try:
+                        child = backend.open_key(handle, name, winreg.KEY_READ)
+                    except OSError as e:
+                        __print_error__(e, f"Error opening READ handle for key: \"{subkey}\"")
+                        continue
+                    stack.append([child, subkey, 0, 0, None, depth-1])  # Pushed first, so it is closed if QueryInfoKey fails
+                    stack[-1][3:5] = __read_subkeys__(backend, child, subkey)
+        finally:
+            for frame in stack[1:]:
+                backend.close_key(frame[0])
 
-    try:    # Open handle to root key (abspath)
-        with __open_handle__(abspath, MODE_READ) as handle:
-            # List subkeys
-            subkeys = []
-            for i in range(winreg.QueryInfoKey(handle)[0]):    # [0] is the number of subkeys this key has
-                subkey = os.path.join(abspath, winreg.EnumKey(handle, i))
-                subkeys.append(subkey)      # Add subkey which is directly underneath the root key
-                if maxdepth != 0:
-                    subkeys += list_subkeys(subkey, maxdepth=maxdepth-1)    # Search for more subkeys underneath subkey
-            return subkeys
-    except TypeError: # Error opening handle
-        return []
+
+
+def walk(
+        abspath:str,
+        topdown:bool = True,
+        maxdepth:int = -1,
+        onerror:Callable[[OSError],None]|None = None,
+        session:"Session|None" = None,
+        parallel:bool = False,
+        max_workers:int|None = None
+    )-> Iterator[tuple[str, list[str], dict[str, tuple[Any,int]]]]:
+    """
+    Walks the tree of keys under abspath, like os.walk().
+
+    Each key is read with a single open handle and a single QueryInfoKey: its subkey names and values
+    are returned together, and its subkeys are opened relative to its handle.
+
+    Parameters:
+    -----------
+    abspath
+        Absolute path of a registry key (including hive).
+    topdown (Optional; Default=True)
+        If True, each key is yielded before its subkeys, and the caller may remove names from
+        subkey_names (in place) to skip those subkeys. If False, each key is yielded after its subkeys.
+    maxdepth (Optional; Default=-1)
+        Search depth for subkeys.
+          - maxdepth = -1 : Walk all subkeys underneath abspath.
+          - maxdepth = 0  : Walk only abspath itself.
+          - maxdepth > 0  : Walk subkeys underneath abspath up to the specified depth.
+    onerror (Optional; Default=None)
+        Function called with the OSError if a key cannot be opened or read, with the key's path as its filename
+        (like os.walk()). The key is skipped.
+    session (Optional; Default=None)
+        Session whose cached handles are used for abspath. If None, handles are opened and closed by this call.
+    parallel (Optional; Default=False)
+        If True, subtrees are read ahead concurrently by a thread pool (at most PARALLEL_READAHEAD keys per
+        thread). Keys are yielded in the same order. Subkeys pruned from subkey_names are skipped, but may
+        already have been read.
+    max_workers (Optional; Default=None)
+        Number of threads used if parallel=True. Defaults to ThreadPoolExecutor's default.
+    
+    Yields:
+    -------
+    (keypath, subkey_names, values)
+         - keypath: Absolute path of the key.
+         - subkey_names: Names of the key's direct subkeys.
+         - values: Values dict containing {name: value} pairs of the key.
+
+            values = {"name": (data, type), ... }
+    """
+
+    # Validate abspath
+    tup = split_abspath(abspath)
+    if tup is None:
+        return      # invalid abspath
+    abspath = tup[2]
+    backend = __get_backend__(session)
+
+    root = __open_handle__(abspath, MODE_READ, session)
+    if root is None:
+        if onerror is not None:
+            onerror(FileNotFoundError(2, "Could not open key", abspath))
+        return      # Error opening handle
+    with root as handle:
+        if parallel:
+            yield from __parallel_walk__(backend, handle, abspath, topdown, maxdepth, onerror, max_workers)
+            return
+
+        def error(e:OSError, path:str)-> None:
+            if e.filename is None:
+                e.filename = path
+            if onerror is not None:
+                onerror(e)
+
+        try:
+            names, values = __read_key__(backend, handle)
+        except OSError as e:
+            error(e, abspath)
+            return
+        if topdown:
+            yield abspath, names, values
+
+        # Each stack frame is [handle, abspath, subkey names, values, next subkey index, remaining depth]
+        stack = [[handle, abspath, names, values, 0 if maxdepth != 0 else len(names), maxdepth]]
+        try:
+            while stack:
+                frame = stack[-1]
+                handle, path, names, values, index, depth = frame
+                if index >= len(names):     # Finished with this key
+                    stack.pop()
+                    if stack:               # The root handle is closed by the "with" block
+                        backend.close_key(handle)
+                    if not topdown:
+                        yield path, names, values
+                    continue
+                frame[4] = index + 1
+
+                name = names[index]
+                subkey = __join_subkey__(path, name)
+                try:
+                    child = backend.open_key(handle, name, winreg.KEY_READ)
+                except OSError as e:
+                    error(e, subkey)
+                    continue
+                try:
+                    child_names, child_values = __read_key__(backend, child)
+                except OSError as e:
+                    backend.close_key(child)
+                    error(e, subkey)
+                    continue
+                if topdown:
+                    yield subkey, child_names, child_values
+                stack.append([child, subkey, child_names, child_values, 0 if depth-1 != 0 else len(child_names), depth-1])
+        finally:
+            for frame in stack[1:]:
+                backend.close_key(frame[0])
 
 
 
 # Reads a dict of value tuples {"name": (data, type)} from abspath.
 #   Returns an empty dict {} if no values are present, or None if an error has occurred.
 def list_values(
-        abspath:str
+        abspath:str,
+        session:"Session|None" = None
     )-> dict[str, tuple[Any,int]|None] | None:
     """
     Lists all values under abspath.
@@ -389,6 +1266,8 @@ def list_values(
     -----------
     abspath
         Absolute path of a registry key (including hive).
+    session (Optional; Default=None)
+        Session whose cached handles are used. If None, handles are opened and closed by this call.
     
     Returns:
     --------
@@ -398,21 +1277,38 @@ def list_values(
         values = {"name": (data, type), ... }
     """
 
-    try:    # Open handle to root key (abspath)
-        with __open_handle__(abspath, MODE_READ) as handle:
-            values = {}
-            for i in range(winreg.QueryInfoKey(handle)[1]):    # [1] is the number of values this key has
-                tup = winreg.EnumValue(handle, i)
-                values[tup[0]] = (tup[1], tup[2])   # tup [0] is name, [1] is data, [2] is type 
-            return values
-    except TypeError: # Error opening handle
-        return None
+    backend = __get_backend__(session)
+
+    for retry in (session is not None, False):   # A stale pooled handle is evicted, and retried once (see Session)
+        try:    # Open handle to root key (abspath)
+            lease = __open_handle__(abspath, MODE_READ, session)
+            with lease as handle:
+                nvalues, last_write = backend.query_info_key(handle)[1:3]  # [1] is the number of values this key has
+                entry = __read_cache_entry__(backend, abspath, last_write)
+                if entry is not None:
+                    __read_cache_record__(entry["values"] is not None)
+                    if entry["values"] is not None:
+                        return {name: __read_cache_copy__(value) for name, value in entry["values"].items()}
+                values = {}
+                for i in range(nvalues):
+                    tup = backend.enum_value(handle, i)
+                    values[tup[0]] = (tup[1], tup[2])   # tup [0] is name, [1] is data, [2] is type 
+                if entry is not None:
+                    entry["values"] = {name: __read_cache_copy__(value) for name, value in values.items()}
+                    entry["known"] = {name.casefold(): value for name, value in entry["values"].items()}
+                return values
+        except TypeError: # Error opening handle
+            return None
+        except OSError:
+            if not (retry and lease.stale):
+                raise
 
 
 
 
 def create_key(
-        abspath:str
+        abspath:str,
+        session:"Session|None" = None
     )-> str|None:
     """
     Creates a new key at abspath. Recursively creates all missing keys in the path.
@@ -423,6 +1319,8 @@ def create_key(
     -----------
     abspath
         Absolute path of a registry key (including hive).
+    session (Optional; Default=None)
+        Session whose cached handles are used. If None, handles are opened and closed by this call.
     
     Returns:
     --------
@@ -438,60 +1336,175 @@ def create_key(
     abspath = tup[2]
     if localpath == "":
         return None     # cannot perform this operation on the hive root
-
-    try:    # Open handle to root key (abspath)
-        with __open_handle__(abspath, MODE_WRITE) as handle:
-            return abspath
-    except TypeError: # Error opening handle
-        return None
+    backend = __get_backend__(session)
+
+    for retry in (session is not None, False):   # A stale pooled handle is evicted, and retried once (see Session)
+        try:    # Open handle to root key (abspath)
+            lease = __open_handle__(abspath, MODE_WRITE, session)
+            with lease as handle:
+                if session is not None:     # Fails if the pooled handle's key was deleted since it was opened
+                    backend.close_key(backend.create_key(handle, "", winreg.KEY_WRITE))
+                __invalidate_read_cache__(backend, abspath)
+                return abspath
+        except TypeError: # Error opening handle
+            return None
+        except OSError:
+            if not (retry and lease.stale):
+                raise
         
 
 
 # Deletes the key at abspath, including its values and subkeys.
 #   Returns a list of paths of keys which were deleted.
-def delete_key(
-        abspath:str
-    )-> list[str]:
+def iter_delete_key(
+        abspath:str,
+        session:"Session|None" = None,
+        delete_tree:bool = False
+    )-> Iterator[tuple[str, OSError|None]]:
     """
-    Deletes a key at abspath. Recursively deletes all subkeys and values.
+    Deletes a key at abspath, including all subkeys and values, and reports each key as it is processed.
+
+    Keys are deleted in a single depth-first pass (each key after all of its subkeys). Each key is opened and
+    deleted relative to its parent's handle, and only the handles along the current path are held open,
+    so memory use is proportional to the depth of the tree rather than its size.
+
+    A key which fails to be opened or deleted is skipped, and its parents fail to delete because they still
+    have subkeys; the rest of the tree is still deleted.
 
     Parameters:
     -----------
     abspath
         Absolute path of a registry key (including hive).
+    session (Optional; Default=None)
+        Session whose cached handles to the deleted keys are discarded.
+    delete_tree (Optional; Default=False)
+        If True and the backend supports it (Backend.supports_delete_tree), the whole tree is deleted with
+        a single native call (RegDeleteTree), and only abspath itself is reported.
     
-    Returns:
-    --------
-    deleted_keys | None
-        List of paths of keys which were deleted.
+    Yields:
+    -------
+    (path, error)
+        Absolute path of each key, and None if it was deleted or the OSError which prevented it.
     """
 
     # Validate abspath
     tup = split_abspath(abspath)
     if tup is None:
-        return []     # invalid abspath
+        return      # invalid abspath
+    hive = tup[0]
     localpath = tup[1]
     abspath = tup[2]
     if localpath == "":
-        return []     # cannot perform this operation on the hive root
-
-    # Delete subkeys before deleting the root key (abspath)
-    keys   = [abspath] + list_subkeys(abspath, maxdepth=-1) # Paths of keys to delete, including the root key (abspath)
-    depths = [key.count(os.sep) for key in keys]            # Key depths are the number of '\' in their paths.
-    deleted_keys=[]
-    for depth in range(max(depths), min(depths)-1, -1):     # Delete deepest keys first, and root key last
-        for key in compress(keys, [e==depth for e in depths]):  # Select only keys at the current depth
-            #print(f"Deleting: {key}")
-            if __open_handle__(key, MODE_DELETE) is None:
-                return deleted_keys
-            deleted_keys.append(key)
+        return      # cannot perform this operation on the hive root
+    backend = __get_backend__(session)
+    if backend is None:
+        __print_error__(RuntimeError("No registry backend is set"), f"Error deleting key: \"{abspath}\" (no backend)")
+        return
+    if session is not None:
+        session.discard(hive, localpath)    # Cached handles to the tree become invalid
+    __invalidate_read_cache__(backend, abspath, subtree=True)
+
+    if delete_tree and backend.supports_delete_tree:
+        try:
+            backend.delete_tree(hive, localpath)
+        except OSError as e:
+            __print_error__(e, f"Error deleting key: \"{abspath}\"")
+            yield (abspath, e)
+            return
+        yield (abspath, None)
+        return
+
+    try:
+        root = backend.open_key(hive, localpath, winreg.KEY_READ)
+    except OSError as e:
+        __print_error__(e, f"Error opening READ handle for key: \"{abspath}\"")
+        yield (abspath, e)
+        return
+
+    # Each stack frame is [handle, abspath, name relative to the parent handle, next subkey index, number of subkeys].
+    # Deleted subkeys shift the remaining ones down, so the index only advances past subkeys which could not be deleted.
+    stack = [[root, abspath, localpath, 0, 0]]
+    try:
+        stack[0][4] = backend.query_info_key(root)[0]
+        while stack:
+            frame = stack[-1]
+            handle, path, name, index, count = frame
+            if index < count:   # Descend into the next subkey
+                subname = backend.enum_key(handle, index)
+                subpath = __join_subkey__(path, subname)
+                try:
+                    child = backend.open_key(handle, subname, winreg.KEY_READ)
+                except OSError as e:
+                    __print_error__(e, f"Error opening READ handle for key: \"{subpath}\"")
+                    frame[3] += 1
+                    yield (subpath, e)
+                    continue
+                stack.append([child, subpath, subname, 0, 0])   # Pushed first, so it is closed if QueryInfoKey fails
+                stack[-1][4] = backend.query_info_key(child)[0]
+                continue
+
+            # All subkeys have been processed; delete this key from its parent
+            stack.pop()
+            backend.close_key(handle)
+            parent = stack[-1] if stack else None
+            try:
+                backend.delete_key(parent[0] if parent else hive, name)
+            except OSError as e:
+                __print_error__(e, f"Error deleting key: \"{path}\"")
+                if parent:
+                    parent[3] += 1
+                yield (path, e)
+                continue
+            if parent:
+                parent[4] -= 1
+            yield (path, None)
+    finally:
+        for frame in stack:
+            backend.close_key(frame[0])
+
+
+
+def delete_key(
+        abspath:str,
+        session:"Session|None" = None,
+        progress:Callable[[str, OSError|None],None]|None = None,
+        delete_tree:bool = False
+    )-> list[str]:
+    """
+    Deletes a key at abspath. Recursively deletes all subkeys and values. Also see iter_delete_key().
+
+    Parameters:
+    -----------
+    abspath
+        Absolute path of a registry key (including hive).
+    session (Optional; Default=None)
+        Session whose cached handles to the deleted keys are discarded.
+    progress (Optional; Default=None)
+        Function called as progress(path, error) for each key processed, with error=None if the key was deleted,
+        or the OSError which prevented it.
+    delete_tree (Optional; Default=False)
+        If True, use the backend's native tree deletion where available (see iter_delete_key()).
+    
+    Returns:
+    --------
+    deleted_keys | None
+        List of paths of keys which were deleted (subkeys before their parents).
+    """
+
+    deleted_keys = []
+    for path, error in iter_delete_key(abspath, session=session, delete_tree=delete_tree):
+        if progress is not None:
+            progress(path, error)
+        if error is None:
+            deleted_keys.append(path)
     return deleted_keys
 
 
 
 def load_value(
         abspath:str,
-        name:str
+        name:str,
+        session:"Session|None" = None
     )-> tuple[Any,int]|None:
     """
     Loads an individual value from abspath.
@@ -502,6 +1515,8 @@ def load_value(
         Absolute path of a registry key (including hive).
     name
         Name of value to load from the key.
+    session (Optional; Default=None)
+        Session whose cached handles are used. If None, handles are opened and closed by this call.
     
     Returns:
     --------
@@ -513,22 +1528,41 @@ def load_value(
 
     if name is None:
         return None
-
-    try:    # Open handle to root key (abspath)
-        with __open_handle__(abspath, MODE_READ) as handle:
-            try:
-                return winreg.QueryValueEx(handle, name)   # tup [0] is data, [1] is type
-            except: # Value does not exist
-                return None
-    except TypeError: # Error opening handle
-        return None
+    backend = __get_backend__(session)
+
+    for retry in (session is not None, False):   # A stale pooled handle is evicted, and retried once (see Session)
+        try:    # Open handle to root key (abspath)
+            lease = __open_handle__(abspath, MODE_READ, session)
+            with lease as handle:
+                entry = None
+                if __read_cache_maxsize__ is not None:
+                    entry = __read_cache_entry__(backend, abspath, backend.query_info_key(handle)[2])
+                if entry is not None:
+                    folded = name.casefold()
+                    hit = folded in entry["known"] or entry["values"] is not None   # All values were read: it does not exist
+                    __read_cache_record__(hit)
+                    if hit:
+                        return __read_cache_copy__(entry["known"].get(folded))
+                try:
+                    value = tuple(backend.query_value(handle, name))   # tup [0] is data, [1] is type
+                except: # Value does not exist
+                    value = None
+                if entry is not None:
+                    entry["known"][folded] = __read_cache_copy__(value)
+                return value
+        except TypeError: # Error opening handle
+            return None
+        except OSError:
+            if not (retry and lease.stale):
+                raise
 
 
 
 def save_value(
         abspath:str,
         name:str,
-        value:tuple[Any,int]|None
+        value:tuple[Any,int]|None,
+        session:"Session|None" = None
     )-> str|None:
     """
     Saves an individual value to abspath.
@@ -545,6 +1579,8 @@ def save_value(
         Value tuple (data, type) to save to the registry.
 
         Set to tuple to None to delete from the key.
+    session (Optional; Default=None)
+        Session whose cached handles are used. If None, handles are opened and closed by this call.
 
     Returns:
     --------
@@ -560,25 +1596,33 @@ def save_value(
     if tup is None:
         return []     # invalid abspath
     abspath = tup[2]
+    backend = __get_backend__(session)
 
-    try:    # Open handle to root key (abspath)
-        with __open_handle__(abspath, MODE_WRITE) as handle:
-            if value is not None:   # Write a single value to the registry
-                winreg.SetValueEx(handle, name, 0, value[1], value[0])   # value tuple must be (data, type)
-            else:                   # Delete a single value from the registry
-                try:
-                    winreg.DeleteValue(handle, name)
-                except FileNotFoundError:  # This is fine, because we were trying to delete the value anyway
-                    pass
-            return abspath
-    except TypeError: # Error opening handle
-        return None
+    for retry in (session is not None, False):   # A stale pooled handle is evicted, and retried once (see Session)
+        try:    # Open handle to root key (abspath)
+            lease = __open_handle__(abspath, MODE_WRITE, session)
+            with lease as handle:
+                if value is not None:   # Write a single value to the registry
+                    backend.set_value(handle, name, value[1], value[0])   # value tuple must be (data, type)
+                else:                   # Delete a single value from the registry
+                    try:
+                        backend.delete_value(handle, name)
+                    except FileNotFoundError:  # This is fine, because we were trying to delete the value anyway
+                        pass
+                __invalidate_read_cache__(backend, abspath)
+                return abspath
+        except TypeError: # Error opening handle
+            return None
+        except OSError:
+            if not (retry and lease.stale):
+                raise
 
 
 
 def delete_value(
         abspath:str,
-        name:str
+        name:str,
+        session:"Session|None" = None
     )-> str|None:
     """
     Deletes an individual value from abspath.
@@ -591,6 +1635,8 @@ def delete_value(
         Absolute path of a registry key (including hive).
     name
         Name of value to save to the key.
+    session (Optional; Default=None)
+        Session whose cached handles are used. If None, handles are opened and closed by this call.
 
     Returns:
     --------
@@ -598,17 +1644,29 @@ def delete_value(
         Absolute path of modified key, or None if errors occurred.
     """
 
-    return save_value(abspath, name, None)
+    return save_value(abspath, name, None, session=session)
+
+
+
+# Number of load_values() calls which used each strategy: {strategy: count}
+__load_values_strategies__ = {"query": 0, "enumerate": 0}
+__load_values_lock__ = threading.Lock()
 
 
 
 def load_values(
         abspath:str,
-        values:dict[str, tuple[Any,int]|None]
+        values:dict[str, tuple[Any,int]|None],
+        session:"Session|None" = None
     )-> dict[str, tuple[Any,int]|None] | None:
     """
     Loads the specified values from abspath.
 
+    The values are either queried individually by name (QueryValueEx), or read by enumerating all of the key's
+    values (EnumValue), whichever needs fewer calls: values are queried if at most LOAD_VALUES_QUERY_RATIO of
+    the key's values (according to QueryInfoKey) are requested. The number of calls which used each strategy
+    is reported by load_values_info().
+
     Parameters:
     -----------
     abspath
@@ -617,35 +1675,100 @@ def load_values(
         Values dict containing {name: value} pairs to load from the registry.
 
         values = {"name": (data, type), ... }
+    session (Optional; Default=None)
+        Session whose cached handles are used. If None, handles are opened and closed by this call.
     
     Returns:
     --------
     values | None
         Values dict containing updated {name: value} pairs, or None if an error has occurred.
 
-        Individual value tuples are None if they do not exist in abspath.
+        Individual value tuples are None if they do not exist in abspath. Names are case-insensitive.
 
         values = {"name": (data, type), ... }
     """
 
-    # Get all values in the key
-    new_values = list_values(abspath)
-    if new_values is None:
-        return None # Could not access the key
+    backend = __get_backend__(session)
+
+    for retry in (session is not None, False):   # A stale pooled handle is evicted, and retried once (see Session)
+        try:    # Open handle to root key (abspath)
+            lease = __open_handle__(abspath, MODE_READ, session)
+            with lease as handle:
+                nvalues, last_write = backend.query_info_key(handle)[1:3]  # [1] is the number of values this key has
+                entry = __read_cache_entry__(backend, abspath, last_write)
+                if entry is not None:
+                    known = entry["known"]
+                    hit = entry["values"] is not None or all(name.casefold() in known for name in values)
+                    __read_cache_record__(hit)
+                    if hit:
+                        for name in values:
+                            values[name] = __read_cache_copy__(known.get(name.casefold()))
+                        return values
+
+                strategy = "query" if len(values) <= nvalues * LOAD_VALUES_QUERY_RATIO else "enumerate"
+                with __load_values_lock__:
+                    __load_values_strategies__[strategy] += 1
+
+                if strategy == "query":
+                    for name in values:
+                        try:
+                            values[name] = tuple(backend.query_value(handle, name))
+                        except OSError:     # Value does not exist in key
+                            values[name] = None
+                        if entry is not None:
+                            entry["known"][name.casefold()] = __read_cache_copy__(values[name])
+                    return values
+
+                # Get all values in the key
+                new_values = {}
+                all_values = {}
+                for i in range(nvalues):
+                    tup = backend.enum_value(handle, i)
+                    new_values[tup[0].casefold()] = all_values[tup[0]] = (tup[1], tup[2])  # tup [0] is name, [1] is data, [2] is type
+                for name in values:
+                    values[name] = new_values.get(name.casefold())      # None if the value does not exist in key
+                if entry is not None:
+                    entry["values"] = {name: __read_cache_copy__(value) for name, value in all_values.items()}
+                    entry["known"] = {name.casefold(): value for name, value in entry["values"].items()}
+                return values
+        except TypeError: # Error opening handle
+            return None
+        except OSError:
+            if not (retry and lease.stale):
+                raise
+
+
+
+def load_values_info()-> dict[str,int]:
+    """
+    Returns the number of load_values() calls which used each strategy since the last reset_load_values_info().
+
+    Returns:
+    --------
+    info
+        {"query": count, "enumerate": count}
+    """
+
+    with __load_values_lock__:
+        return dict(__load_values_strategies__)
+
+
+
+def reset_load_values_info()-> None:
+    """
+    Resets the counters reported by load_values_info().
+    """
+
+    with __load_values_lock__:
+        for strategy in __load_values_strategies__:
+            __load_values_strategies__[strategy] = 0
     
-    # Update values
-    for name in values:
-        if name in new_values:  # Value exists in key
-            values[name] = new_values[name]
-        else:                   # Value does not exist in key
-            values[name] = None
-    return values
     
 
-
 def save_values(
         abspath:str,
-        values:dict[str, tuple[Any,int]|None]
+        values:dict[str, tuple[Any,int]|None],
+        session:"Session|None" = None
     )-> str|None:
     """
     Saves the specified values to abspath.
@@ -662,6 +1785,8 @@ def save_values(
           - Set whole dict to None to delete all values from the key.
 
         values = {"name": (data, type), ... }
+    session (Optional; Default=None)
+        Session whose cached handles are used. If None, handles are opened and closed by this call.
     
     Returns:
     --------
@@ -677,31 +1802,40 @@ def save_values(
 
     # Delete all values if values=None
     if values is None:
-        values = list_values(abspath)
+        values = list_values(abspath, session=session)
         if values is None:
             return None     # Error reading from key
         for name in values:
             values[name] = None # mark each value for deletion
     
-    try:    # Open handle to root key (abspath)
-        with __open_handle__(abspath, MODE_WRITE) as handle:
-            for name in values:
-                value = values[name]
-                if value is not None:   # Write a single value to the registry
-                    winreg.SetValueEx(handle, name, 0, value[1], value[0])   # value tuple must be (data, type)
-                else:                   # Delete a single value from the registry
-                    try:
-                        winreg.DeleteValue(handle, name)
-                    except FileNotFoundError:  # This is fine, because we were trying to delete the value anyway
-                        pass
-            return abspath
-    except TypeError: # Error opening handle
-        return None
+    backend = __get_backend__(session)
+
+    for retry in (session is not None, False):   # A stale pooled handle is evicted, and retried once (see Session)
+        try:    # Open handle to root key (abspath)
+            lease = __open_handle__(abspath, MODE_WRITE, session)
+            with lease as handle:
+                for name in values:
+                    value = values[name]
+                    if value is not None:   # Write a single value to the registry
+                        backend.set_value(handle, name, value[1], value[0])   # value tuple must be (data, type)
+                    else:                   # Delete a single value from the registry
+                        try:
+                            backend.delete_value(handle, name)
+                        except FileNotFoundError:  # This is fine, because we were trying to delete the value anyway
+                            pass
+                __invalidate_read_cache__(backend, abspath)
+                return abspath
+        except TypeError: # Error opening handle
+            return None
+        except OSError:
+            if not (retry and lease.stale):
+                raise
 
     
 
 def delete_all_values(
-        abspath:str
+        abspath:str,
+        session:"Session|None" = None
     )-> str|None:
     """
     Deletes all values from abspath.
@@ -712,6 +1846,8 @@ def delete_all_values(
     -----------
     abspath
         Absolute path of a registry key (including hive).
+    session (Optional; Default=None)
+        Session whose cached handles are used. If None, handles are opened and closed by this call.
     
     Returns:
     --------
@@ -719,4 +1855,4 @@ def delete_all_values(
         Absolute path of modified key, or None if errors occurred.
     """
 
-    return save_values(abspath, None)
+    return save_values(abspath, None, session=session)
@@ -0,0 +1,204 @@
+from typing import Any, Iterator
+
+from .common import *
+from .key import Key
+
+
+
+class Difference:
+    """
+    One difference between two registry trees, reported by diff().
+
+    Keys are identified by their path relative to the root of each tree, so trees at different locations
+    (or on different machines) can be compared.
+    """
+
+    ADDED = "added"         # Only in the second tree (new is set, old is None)
+    REMOVED = "removed"     # Only in the first tree (old is set, new is None)
+    CHANGED = "changed"     # In both trees, with different data or types (values only)
+
+    __slots__ = ("change", "relpath", "name", "old", "new")
+
+    def __init__(self, change:str, relpath:str, name:str|None, old:Any, new:Any)-> None:
+        self.change = change
+        self.relpath = relpath  # Path of the key, relative to the root of the trees ("" for the root itself)
+        self.name = name        # Name of the value, or None if the difference is a key
+        self.old = old          # Value tuple (data, type) in the first tree, or for keys, the key's values dict
+        self.new = new          # Value tuple (data, type) in the second tree, or for keys, the key's values dict
+
+
+    # Properties (read-only)
+    @property
+    def is_key(self)-> bool:
+        return self.name is None
+
+
+    # Private methods
+    def __eq__(self, other:Any)-> bool:
+        if not isinstance(other, Difference):
+            return NotImplemented
+        return (self.change, self.relpath, self.name, self.old, self.new) == (other.change, other.relpath, other.name, other.old, other.new)
+
+    def __repr__(self)-> str:
+        target = f"key \"{self.relpath}\"" if self.is_key else f"value \"{self.relpath}\" [\"{self.name}\"]"
+        return f"Difference({self.change} {target})"
+
+
+
+###############################################################################
+## Internal Functions
+###############################################################################
+
+def __diff_values__(
+        relpath:str,
+        values_a:dict[str, tuple[Any,int]|None],
+        values_b:dict[str, tuple[Any,int]|None]
+    )-> Iterator[Difference]:
+    """
+    Yields the differences between the values of a key in two trees, sorted by casefolded value name.
+    Values which are None (not in the registry) are treated as missing.
+    """
+
+    folded_a = {name.casefold(): name for name in values_a if values_a[name] is not None}
+    folded_b = {name.casefold(): name for name in values_b if values_b[name] is not None}
+    for folded in sorted(folded_a.keys() | folded_b.keys()):
+        name_a = folded_a.get(folded)
+        name_b = folded_b.get(folded)
+        if name_b is None:
+            yield Difference(Difference.REMOVED, relpath, name_a, values_a[name_a], None)
+        elif name_a is None:
+            yield Difference(Difference.ADDED, relpath, name_b, None, values_b[name_b])
+        elif tuple(values_a[name_a]) != tuple(values_b[name_b]):
+            yield Difference(Difference.CHANGED, relpath, name_b, values_a[name_a], values_b[name_b])
+
+
+
+def __source_location__(
+        source:Any
+    )-> RegPath|None:
+    """
+    Returns the location of the root key of a tree accepted by iter_keys(), or None if it is invalid.
+    """
+
+    if isinstance(source, Key):
+        return source.location
+    if isinstance(source, RegPath):
+        return source
+    if isinstance(source, str):
+        return RegPath.parse(source)
+    return getattr(source, "root", None)    # TreeStore, SnapshotBackend
+
+
+
+###############################################################################
+## Sources
+###############################################################################
+
+def iter_keys(
+        source:Any,
+        session:"Session|None" = None
+    )-> Iterator[tuple[tuple[str,...], dict[str, tuple[Any,int]]]]:
+    """
+    Iterates over the keys of a tree in sorted, case-insensitive depth-first order (each key is followed by its subkeys,
+    and subkeys are sorted by their casefolded names). This is the order in which diff() compares trees.
+
+    Parameters:
+    -----------
+    source
+        One of the following:
+         - Absolute path (str) or RegPath of a key in the registry, which is walked one level at a time.
+         - Key object, and its members which are subkeys of it (for example, after Key.populate()).
+         - Any object with an iter_keys() method which yields keys in the same order, such as a TreeStore.
+    session (Optional; Default=None)
+        Session used to read from the registry, if source is a path.
+
+    Yields:
+    -------
+    (components, values)
+         - components: Names of the keys from the root of the tree to the key (() for the root itself).
+         - values: Values dict containing {name: value} pairs of the key.
+    """
+
+    if hasattr(source, "iter_keys"):
+        yield from source.iter_keys()
+
+    elif isinstance(source, Key):
+        if source.location is None:
+            return
+        yield (), source.values
+        members = []
+        for member in source.members.values():
+            if member.location is None:
+                continue
+            relpath = member.location.relative_to(source.location)
+            if relpath is not None and relpath != "":   # Only subkeys are part of the tree
+                components = member.location.components[source.location.depth:]
+                members.append((tuple(name.casefold() for name in components), components, member.values))
+        members.sort(key=lambda tup: tup[0])
+        for _, components, values in members:
+            yield components, values
+
+    else:
+        root = source.abspath if isinstance(source, RegPath) else source
+        tup = split_abspath(root)
+        if tup is None:
+            return
+        root = tup[2]
+        prefix = len(root) if root.endswith(":") else len(root) + 1
+        for keypath, subkey_names, values in walk(root, session=session):
+            subkey_names.sort(key=str.casefold)     # walk() descends into the subkeys in this order
+            yield (tuple(keypath[prefix:].split(PATH_SEP)) if len(keypath) > prefix else ()), values
+
+
+
+###############################################################################
+## Diff
+###############################################################################
+
+def diff(
+        a:Any,
+        b:Any,
+        session:"Session|None" = None,
+        other_session:"Session|None" = None
+    )-> Iterator[Difference]:
+    """
+    Compares two registry trees, and yields their differences as they are found.
+
+    Both trees are read in the same sorted order (see iter_keys()) and merged, so only the keys along the
+    current path of each tree are held in memory. Names of keys and values are compared case-insensitively.
+
+    Parameters:
+    -----------
+    a, b
+        Trees to compare: absolute paths (str) of keys in the registry, Key objects, TreeStores, or
+        any other source accepted by iter_keys().
+    session (Optional; Default=None)
+        Session used to read a (and b, unless other_session is set) from the registry.
+    other_session (Optional; Default=None)
+        Session used to read b from the registry, for example to compare with another backend.
+
+    Yields:
+    -------
+    difference
+        Difference object for each key or value which was added, removed or changed, in tree order.
+        A key is reported before its values and subkeys; the values of added and removed keys are reported
+        with the key (in Difference.new / Difference.old), not separately.
+    """
+
+    # Each key is (casefolded components, components, values); keys are compared by their casefolded components
+    keys_a = ((tuple(name.casefold() for name in tup[0]),) + tup for tup in iter_keys(a, session=session))
+    keys_b = ((tuple(name.casefold() for name in tup[0]),) + tup for tup in iter_keys(b, session=other_session if other_session is not None else session))
+    key_a = next(keys_a, None)
+    key_b = next(keys_b, None)
+
+    while key_a is not None or key_b is not None:
+        if key_b is None or (key_a is not None and key_a[0] < key_b[0]):    # Key only in a
+            yield Difference(Difference.REMOVED, PATH_SEP.join(key_a[1]), None, key_a[2], None)
+            key_a = next(keys_a, None)
+        elif key_a is None or key_b[0] < key_a[0]:                          # Key only in b
+            yield Difference(Difference.ADDED, PATH_SEP.join(key_b[1]), None, None, key_b[2])
+            key_b = next(keys_b, None)
+        else:                                                               # Key in both; compare values
+            yield from __diff_values__(PATH_SEP.join(key_b[1]), key_a[2], key_b[2])
+            key_a = next(keys_a, None)
+            key_b = next(keys_b, None)
@@ -0,0 +1,340 @@
+import sys
+import time
+import bisect
+import threading
+from typing import Any, Callable
+
+from .backend import Backend, set_backend
+from .common import *
+from .common import __print_error__
+
+# Operation category of each backend method. Other methods (notify, cancel_notify) are passed through uncounted.
+STATS_OPERATIONS = {
+    "open_key":         "open",
+    "create_key":       "open",
+    "close_key":        "close",
+    "query_info_key":   "query",
+    "query_value":      "query",
+    "enum_key":         "enum",
+    "enum_value":       "enum",
+    "set_value":        "set",
+    "delete_value":     "delete",
+    "delete_key":       "delete",
+    "delete_tree":      "delete"
+}
+
+# Upper bounds (in seconds) of the latency histogram buckets. The last bucket counts slower calls.
+STATS_LATENCY_BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0)
+
+
+
+###############################################################################
+## Internal Functions
+###############################################################################
+
+# Recorded calls: {(function, hive, operation): [count, errors, total seconds, max seconds, *histogram]}
+__stats__ = {}
+__stats_lock__ = threading.Lock()
+__package_name__ = __name__.rpartition(".")[0]
+
+
+
+def __stats_caller__(
+        frame:Any
+    )-> str:
+    """
+    Returns the qualified name of the outermost public function or method of this package on the stack
+    (for example, "load_values" or "Key.load"), starting from frame. Returns "<other>" if the call was not
+    made by this package (for example, a direct call to the backend).
+    """
+
+    caller = "<other>"
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith(__package_name__ + ".") and module != __name__:
+            code = frame.f_code
+            if not code.co_name.startswith(("_", "<")):
+                caller = getattr(code, "co_qualname", code.co_name)
+        frame = frame.f_back
+    return caller
+
+
+
+def __stats_record__(
+        function:str,
+        hive:str,
+        operation:str,
+        seconds:float,
+        error:OSError|None
+    )-> None:
+    """
+    Adds one call to the recorded statistics.
+    """
+
+    bucket = bisect.bisect_left(STATS_LATENCY_BUCKETS, seconds)
+    key = (function, hive, operation)
+    with __stats_lock__:
+        record = __stats__.get(key)
+        if record is None:
+            record = __stats__[key] = [0, 0, 0.0, 0.0] + [0] * (len(STATS_LATENCY_BUCKETS) + 1)
+        record[0] += 1
+        record[1] += error is not None
+        record[2] += seconds
+        record[3] = max(record[3], seconds)
+        record[4 + bucket] += 1
+
+
+
+def __stats_merge__(
+        summary:dict[str,Any]|None,
+        record:list
+    )-> dict[str,Any]:
+    """
+    Adds a recorded [count, errors, total, max, *histogram] to a summary dict (see stats()).
+    """
+
+    if summary is None:
+        summary = {"count": 0, "errors": 0, "seconds": 0.0, "max": 0.0, "histogram": [0] * (len(STATS_LATENCY_BUCKETS) + 1)}
+    summary["count"] += record[0]
+    summary["errors"] += record[1]
+    summary["seconds"] += record[2]
+    summary["max"] = max(summary["max"], record[3])
+    summary["histogram"] = [a + b for a, b in zip(summary["histogram"], record[4:])]
+    return summary
+
+
+
+###############################################################################
+## Instrumented Backend
+###############################################################################
+
+class InstrumentedHandle:
+    """
+    Handle returned by InstrumentedBackend. Wraps the inner backend's handle, and remembers its hive.
+    """
+
+    __slots__ = ("backend", "handle", "hive")
+
+    def __init__(self, backend:"InstrumentedBackend", handle:Any, hive:str)-> None:
+        self.backend = backend
+        self.handle = handle
+        self.hive = hive
+
+    def Close(self)-> None:
+        self.backend.close_key(self)
+
+    def __enter__(self)-> "InstrumentedHandle":
+        return self
+
+    def __exit__(self, *args)-> None:
+        self.Close()
+
+
+
+class InstrumentedBackend(Backend):
+    """
+    Backend which passes every call to another backend, and records its operation (see STATS_OPERATIONS),
+    hive, latency, and the public function of this package which made it (see stats()).
+
+    Usually installed by enable_stats(). Instrumentation only costs anything while this backend is in use:
+    the functions in common.py and Key methods are not changed.
+    """
+
+    def __init__(self,
+            backend:Backend,
+            hook:Callable[[str, str, str, float, OSError|None],None]|None = None
+        )-> None:
+        """
+        Create a new InstrumentedBackend.
+
+        Parameters
+        ----------
+        backend
+            Backend which performs the calls.
+        hook (Optional; Default=None)
+            Function called after each call as hook(function, hive, method, seconds, error), with error=None
+            if the call succeeded, or the OSError it raised.
+        """
+
+        self.backend = backend
+        self.hook = hook
+        self.supports_delete_tree = backend.supports_delete_tree
+        self.supports_notify = backend.supports_notify
+
+
+    # Private methods
+    def __getattr__(self, name:str)-> Any:
+        return getattr(self.backend, name)  # Methods specific to the inner backend (for example, close())
+
+    def _unwrap(self, key:Any)-> tuple[Any, str]:
+        # Returns (inner handle or hive, hive name)
+        if isinstance(key, InstrumentedHandle):
+            return key.handle, key.hive
+        return key, HIVE_NAMES_SHORT.get(key, str(key))
+
+    def _call(self, method:str, key:Any, *args:Any)-> Any:
+        inner, hive = self._unwrap(key)
+        error = None
+        start = time.perf_counter()
+        try:
+            return getattr(self.backend, method)(inner, *args)
+        except OSError as e:
+            error = e
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            function = __stats_caller__(sys._getframe(1))
+            __stats_record__(function, hive, STATS_OPERATIONS[method], seconds, error)
+            if self.hook is not None:
+                try:
+                    self.hook(function, hive, method, seconds, error)
+                except Exception as e:
+                    __print_error__(e, f"Error in stats hook for {method} on hive: \"{hive}\"")
+
+
+    # Backend methods
+    def open_key(self, key, sub_key, access):
+        return InstrumentedHandle(self, self._call("open_key", key, sub_key, access), self._unwrap(key)[1])
+
+    def create_key(self, key, sub_key, access):
+        return InstrumentedHandle(self, self._call("create_key", key, sub_key, access), self._unwrap(key)[1])
+
+    def close_key(self, handle):
+        self._call("close_key", handle)
+
+    def query_info_key(self, handle):
+        return self._call("query_info_key", handle)
+
+    def enum_key(self, handle, index):
+        return self._call("enum_key", handle, index)
+
+    def enum_value(self, handle, index):
+        return self._call("enum_value", handle, index)
+
+    def query_value(self, handle, name):
+        return self._call("query_value", handle, name)
+
+    def set_value(self, handle, name, type, data):
+        self._call("set_value", handle, name, type, data)
+
+    def delete_value(self, handle, name):
+        self._call("delete_value", handle, name)
+
+    def delete_key(self, key, sub_key):
+        self._call("delete_key", key, sub_key)
+
+    def delete_tree(self, key, sub_key):
+        self._call("delete_tree", key, sub_key)
+
+    def notify(self, key, sub_key, subtree, callback):
+        return self.backend.notify(self._unwrap(key)[0], sub_key, subtree, callback)
+
+    def cancel_notify(self, token):
+        self.backend.cancel_notify(token)
+
+
+
+###############################################################################
+## Statistics
+###############################################################################
+
+def enable_stats(
+        hook:Callable[[str, str, str, float, OSError|None],None]|None = None
+    )-> InstrumentedBackend|None:
+    """
+    Starts recording statistics of registry calls (see stats()), by replacing the current backend
+    (see set_backend()) with an InstrumentedBackend around it.
+
+    Sessions which were created with another backend keep using it, and are not recorded.
+    If stats are already enabled, only the hook is replaced.
+
+    Parameters:
+    -----------
+    hook (Optional; Default=None)
+        Function called after each registry call as hook(function, hive, method, seconds, error).
+        See InstrumentedBackend.
+
+    Returns:
+    --------
+    backend | None
+        The InstrumentedBackend now in use, or None if no backend is set.
+    """
+
+    backend = get_backend()
+    if backend is None:
+        return None
+    if isinstance(backend, InstrumentedBackend):
+        backend.hook = hook
+        return backend
+    backend = InstrumentedBackend(backend, hook=hook)
+    set_backend(backend)
+    return backend
+
+
+
+def disable_stats(
+    )-> None:
+    """
+    Stops recording statistics, by restoring the backend which enable_stats() replaced.
+    The statistics recorded so far are kept (see reset_stats()).
+    """
+
+    backend = get_backend()
+    if isinstance(backend, InstrumentedBackend):
+        set_backend(backend.backend)
+
+
+
+def stats(
+        reset:bool = False
+    )-> dict[str, dict]:
+    """
+    Returns a snapshot of the statistics recorded since stats were enabled or last reset.
+
+    Each statistic is a dict:
+        {"count": calls, "errors": calls which raised OSError, "seconds": total time, "max": slowest call,
+         "histogram": [calls per latency bucket]}
+    where histogram[i] counts the calls which took at most STATS_LATENCY_BUCKETS[i] seconds (and more than
+    the previous bucket), and the last item counts slower calls.
+
+    Parameters:
+    -----------
+    reset (Optional; Default=False)
+        If True, the statistics are reset after taking the snapshot, atomically.
+
+    Returns:
+    --------
+    stats
+        {"operations": {operation: statistic},
+         "hives":      {hive: {operation: statistic}},
+         "functions":  {function: {operation: statistic}}}
+
+        Operations are "open", "close", "query", "enum", "set" and "delete" (see STATS_OPERATIONS).
+        Functions are the outermost public functions or methods of this package which made the calls
+        (for example, "Key.load" rather than the load_values() it calls), or "<other>".
+    """
+
+    with __stats_lock__:
+        records = [(key, list(record)) for key, record in __stats__.items()]
+        if reset:
+            __stats__.clear()
+
+    snapshot = {"operations": {}, "hives": {}, "functions": {}}
+    for (function, hive, operation), record in records:
+        snapshot["operations"][operation] = __stats_merge__(snapshot["operations"].get(operation), record)
+        hives = snapshot["hives"].setdefault(hive, {})
+        hives[operation] = __stats_merge__(hives.get(operation), record)
+        functions = snapshot["functions"].setdefault(function, {})
+        functions[operation] = __stats_merge__(functions.get(operation), record)
+    return snapshot
+
+
+
+def reset_stats(
+    )-> None:
+    """
+    Resets the statistics reported by stats().
+    """
+
+    with __stats_lock__:
+        __stats__.clear()
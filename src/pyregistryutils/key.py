@@ -1,14 +1,28 @@
-from typing import Union, Any
+from typing import Union, Any, Iterator
 
 from .common import *
+from .common import __memoize_path__
 
 
 
-def parse_location(
-        location:Union[str, int, "Key", tuple["Key",str], tuple[int,str] ]
-    )-> tuple[int, str, str]|None:
+def __location_cacheable__(
+        location:Any
+    )-> bool:
     """
-    Parses a "location" into a hive handle (int), hive-relative localpath (str), and absolute path (str).
+    Locations relative to Key objects cannot be cached, because the Key's own location may change.
+    """
+
+    if isinstance(location, tuple):
+        location = location[0] if len(location) > 0 else None
+    return not isinstance(location, Key)
+
+
+
+def parse_regpath(
+        location:Union[str, int, RegPath, "Key", tuple["Key",str], tuple[int,str] ]
+    )-> RegPath|None:
+    """
+    Parses a "location" into a RegPath.
     
     Parameters:
     -----------
@@ -16,6 +30,7 @@ def parse_location(
         One of the following:
          - abspath(str): Absolute path to a key (including hive)
          - hivehandle(int): One of the predefined Hive handles (HKLM, HKCU, etc.)
+         - path(RegPath): Parsed path
          - key(Key): Key object
          - (key(Key), relpath(str)): Key object and relative path
          - (hivehandle(int), localpath(str)): Hive handle and relative path
@@ -26,56 +41,218 @@ def parse_location(
     
     Returns:
     --------
-    (hive, localpath, abspath) | None
-         - hive: One of the predefined Hive handles (HKLM, HKCU, etc.)
-         - localpath: Path relative to the hive.
-         - abspath: Absolute path to the key (including hive), cleaned and validated.
-
-        Returns None if errors occurred.
+    path | None
+        Parsed path, or None if errors occurred.
     """
 
     if location is None:
         return None
 
+    # Location (RegPath) is already parsed
+    elif isinstance(location, RegPath):
+        return location
+
     # Location (str) is an absolute registry path
     elif isinstance(location, str):
-        abspath = location
+        return RegPath.parse(location)
 
     # Location (int) is a registry hive:
     elif isinstance(location, int):
-        hive = location
-        localpath = ""
-        abspath = join_abspath(hive, localpath)
+        return RegPath(location, ()) if location in HIVE_NAMES_SHORT else None
 
     # Location (Key) is a Key object:
     elif isinstance(location, Key):
-        abspath = location.abspath
+        return location.location
 
     # Location (Key, str) is path relative to another key
     elif isinstance(location, tuple) and len(location)==2 and isinstance(location[0], Key) and isinstance(location[1], str):
-        rootpath = location[0].abspath
-        relpath = location[1].strip().strip(os.sep)
-        abspath = os.path.join(rootpath, relpath)
+        root = location[0].location
+        return root / location[1] if root is not None else None
     
     # Location (int, str) is a path relative to a registry hive
     elif isinstance(location, tuple) and len(location)==2 and isinstance(location[0], int) and isinstance(location[1], str):
-        hive = location[0]
-        localpath = location[1]
-        abspath = join_abspath(hive, localpath)
+        abspath = join_abspath(location[0], location[1])
+        return RegPath.parse(abspath) if abspath is not None else None
     
     # Invalid location
     else:
         return None
+
+
+
+@__memoize_path__(__location_cacheable__)
+def parse_location(
+        location:Union[str, int, RegPath, "Key", tuple["Key",str], tuple[int,str] ]
+    )-> tuple[int, str, str]|None:
+    """
+    Parses a "location" into a hive handle (int), hive-relative localpath (str), and absolute path (str).
     
-    return split_abspath(abspath)
+    Parameters:
+    -----------
+    location
+        One of the following:
+         - abspath(str): Absolute path to a key (including hive)
+         - hivehandle(int): One of the predefined Hive handles (HKLM, HKCU, etc.)
+         - path(RegPath): Parsed path
+         - key(Key): Key object
+         - (key(Key), relpath(str)): Key object and relative path
+         - (hivehandle(int), localpath(str)): Hive handle and relative path
+        
+        Both formats are allowed for absolute paths:
+         - HKEY_LOCAL_MACHINE\\relative\\path\\to\\key
+         - HKLM:relative\\path\\to\\key
+    
+    Returns:
+    --------
+    (hive, localpath, abspath) | None
+         - hive: One of the predefined Hive handles (HKLM, HKCU, etc.)
+         - localpath: Path relative to the hive.
+         - abspath: Absolute path to the key (including hive), cleaned and validated.
+
+        Returns None if errors occurred.
+    """
+
+    path = parse_regpath(location)
+    if path is None:
+        return None
+    return path.astuple()
+
+
+
+class MemberDict(dict):
+    """
+    Dict of member keys {"name": key_object}, indexed by the members' locations.
+
+    The index maps each member's RegPath.key (hive and casefolded localpath) to the name of the member
+    at that location, or to a list of names if there are several (members with no location are indexed
+    under None), and is kept up to date by every method which adds or removes members. Each member
+    remembers the MemberDicts it belongs to, so that reassigning its location moves only its own entries
+    in their indexes. The index is created with the first member, so empty MemberDicts stay small.
+    """
+
+    __slots__ = ("_index",)
+
+    def __init__(self, members:dict[str, "Key"]|None = None)-> None:
+        super().__init__()
+        self._index = None  # {RegPath.key | None: name | [names]}, or None while empty
+        if members is not None:
+            self.update(members)
+
+
+    # Private methods
+    def _index_add(self, key:tuple|None, names:list[str])-> None:
+        if self._index is None:
+            self._index = {}
+        indexed = self._index.get(key)
+        if indexed is None and len(names) == 1:
+            self._index[key] = names[0]
+        elif indexed is None:
+            self._index[key] = list(names)
+        elif isinstance(indexed, str):
+            self._index[key] = [indexed] + names
+        else:
+            indexed += names
+
+    def _index_remove(self, key:tuple|None, names:list[str])-> None:
+        indexed = self._index.get(key) if self._index is not None else None
+        if isinstance(indexed, str):
+            if indexed in names:
+                del self._index[key]
+        elif indexed is not None:
+            indexed[:] = [name for name in indexed if name not in names]
+            if len(indexed) == 0:
+                del self._index[key]
+
+    def _add(self, name:str, member:"Key")-> None:
+        self._index_add(member.location.key if member.location is not None else None, [name])
+        member._owners.append(self)
+
+    def _remove(self, name:str, member:"Key")-> None:
+        self._index_remove(member.location.key if member.location is not None else None, [name])
+        for i, owner in enumerate(member._owners):   # Compared by identity: MemberDicts are dicts, and compare by value
+            if owner is self:
+                del member._owners[i]
+                break
+
+    def _relocated(self, member:"Key", old:RegPath|None, new:RegPath|None)-> None:
+        # Moves the names of a member whose location was reassigned from old to new
+        old_key = old.key if old is not None else None
+        new_key = new.key if new is not None else None
+        indexed = self._index.get(old_key) if self._index is not None else None
+        if old_key == new_key or indexed is None:
+            return
+        moved = [name for name in ([indexed] if isinstance(indexed, str) else indexed) if dict.get(self, name) is member]
+        if len(moved) > 0:
+            self._index_remove(old_key, moved)
+            self._index_add(new_key, moved)
+
+
+    # dict methods which add or remove members
+    def __setitem__(self, name:str, member:"Key")-> None:
+        if name in self:
+            self._remove(name, self[name])
+        super().__setitem__(name, member)
+        self._add(name, member)
+
+    def __delitem__(self, name:str)-> None:
+        self._remove(name, self[name])
+        super().__delitem__(name)
+
+    def __ior__(self, other:Any)-> "MemberDict":
+        self.update(other)
+        return self
+
+    def pop(self, name:str, *default:Any)-> Any:
+        if name in self:
+            self._remove(name, self[name])
+        return super().pop(name, *default)
+
+    def popitem(self)-> tuple[str, "Key"]:
+        name, member = super().popitem()
+        self._remove(name, member)
+        return (name, member)
+
+    def setdefault(self, name:str, member:"Key"=None)-> "Key":
+        if name not in self:
+            self[name] = member
+        return self[name]
+
+    def update(self, *args:Any, **kwargs:Any)-> None:
+        for name, member in dict(*args, **kwargs).items():
+            self[name] = member
+
+    def clear(self)-> None:
+        for name, member in list(self.items()):
+            self._remove(name, member)
+        super().clear()
+        self._index = None
+
+
+    # Public methods
+    def find(self,
+            path:RegPath
+        )-> str|None:
+        """
+        Return the name of the first member at path (case-insensitive), or None if there is none.
+        """
+
+        names = self._index.get(path.key) if self._index is not None else None
+        if not names:
+            return None
+        return names if isinstance(names, str) else names[0]
 
 
 
 class Key:
     """
     Class representing a Windows Registry key and its values.
+
+    Keys use __slots__ (and MemberDicts create their index with their first member), so that the Key objects
+    created by populate() for large hierarchies cost as little memory as possible.
     """
 
+    __slots__ = ("location", "members", "values", "_baseline", "_owners", "__weakref__")
+
     POPULATE_ALL_SUBKEYS = True
     POPULATE_VALUES = False
     
@@ -92,9 +269,11 @@ class Key:
         ----------
         location (Optional; Default=None)
             Absolute path (str) of this key, or some other value parsable by parse_location.
+            Parsed once, and stored as a RegPath in self.location.
         members (Optional; Default={})
             Dict of Key objects to track: {"name": key_object}.
             Tracked members are loaded and saved with load() and save().
+            Stored as a MemberDict (a copy of the dict), which indexes members by location.
         values (Optional; Default={})
             Dict of Value tuples to track: {"name": (data, type)} .
             Tracked values are loaded and saved with load() and save().
@@ -102,9 +281,11 @@ class Key:
             Argument to populate() function, or None to skip population.
         """
         
+        self._owners = []       # MemberDicts which this key is a member of (once per name), to update their indexes
         self.location = location
         self.members = members
         self.values = values
+        self._baseline = None   # Values last loaded from or saved to the registry, or None if the key has not been synced
         if populate is not None:
             self.populate(populate)
     
@@ -112,32 +293,36 @@ class Key:
     # Properties (read-only) and attributes (may have special actions on write)
     @property
     def hive(self)-> int:
-        tup = parse_location(self.location)
         if self.location is None:
             return None
-        return tup[0]
+        return self.location.hive
 
     @property
     def localpath(self)-> str:
-        tup = parse_location(self.location)
-        if tup is None:
+        if self.location is None:
             return None
-        return tup[1]
+        return self.location.localpath
 
     @property
     def abspath(self)-> str:
-        tup = parse_location(self.location)
-        if tup is None:
+        if self.location is None:
             return None
-        return tup[2]
+        return self.location.abspath
     
     def __setattr__(self, __name:str, __value:Any)-> None:
-        if __name == "members":
-            __value = {} if __value is None else __value
+        if __name == "location":
+            __value = parse_regpath(__value)
+            if hasattr(self, "location"):
+                old = self.location
+                for owner in self._owners:      # Update the indexes of the MemberDicts this key belongs to
+                    owner._relocated(self, old, __value)
+                object.__setattr__(self, "_baseline", None)     # Not synced with the new location: the next save() writes all values
+        elif __name == "members":
+            __value = __value if isinstance(__value, MemberDict) else MemberDict(__value)
         elif __name == "values":
             __value = {} if __value is None else __value
 
-        self.__dict__[__name] = __value
+        object.__setattr__(self, __name, __value)
     
 
     # Private methods
@@ -147,11 +332,23 @@ class Key:
     def __repr__(self)-> str:
         return self.__str__()
 
+    def _mark_clean(self, values:dict[str, tuple[Any,int]|None])-> None:
+        # Record values as matching the registry. Lists (REG_MULTI_SZ) are copied, so that changes made in place are detected.
+        if self._baseline is None:
+            self._baseline = {}
+        for name, value in values.items():
+            if value is not None and isinstance(value[0], list):
+                value = (list(value[0]), value[1])
+            self._baseline[name] = value
+
 
 
     # Public methods
     def populate(self,
-            recurse:bool|int=-1
+            recurse:bool|int=-1,
+            session:"Session|None"=None,
+            parallel:bool=False,
+            max_workers:int|None=None
         )-> None:
         """
         Populates self.values and self.members with values and subkeys from the registry.
@@ -159,7 +356,7 @@ class Key:
         All values in the referenced registry key are added to self.values, overwriting any existing values with the same names.
 
         All subkeys (up to the specified depth) are added to self.members, unless a member for that key already exists.
-        Subkey members are populated with values, but 
+        Subkey members are populated with values, but not with members of their own.
 
         Parameters
         ----------
@@ -170,35 +367,86 @@ class Key:
              - -1 (Default): Add all subkeys as members.
              - 0: Add only the subkeys immediately beneath this key.
              - >0: Add subkeys only up to the specified depth.
+        session (Optional; Default=None)
+            Session whose cached handles are used (see Session).
+        parallel (Optional; Default=False)
+            If True, subtrees are read concurrently by a thread pool (see walk()). The result is the same.
+        max_workers (Optional; Default=None)
+            Number of threads used if parallel=True.
         """
 
-        abspath = self.abspath
+        for _ in self._iter_populate(recurse=recurse, session=session, parallel=parallel, max_workers=max_workers):
+            pass
 
-        # List all values in this key, and add them to self.values
-        newvals = list_values(abspath)
-        if newvals is None:
-            return  # Could not access key
-        self.values |= newvals
 
-        if recurse is None or recurse is False:  
-            return # Do not add subkeys as members
-        
-        # List subkeys and add them to self.members
-        maxdepth = -1 if recurse is True else recurse
-        subkeys = list_subkeys(abspath, maxdepth)
-        if subkeys is None:
-            return  # Could not access key
-        for subkey_path in subkeys:
-            tup = self.get_member_by_location(subkey_path)
-            if tup is None: # member does not exist for the subkey
-                self.add_member(Key(subkey_path, populate=Key.POPULATE_VALUES))
-            else:           # member exists
-                self.members[tup[0]].populate(recurse=Key.POPULATE_VALUES)
+
+    def _iter_populate(self,
+            recurse:bool|int=-1,
+            session:"Session|None"=None,
+            parallel:bool=False,
+            max_workers:int|None=None
+        )-> Iterator[RegPath]:
+        """
+        Generator version of populate(), which yields the location of each key once it has been added.
+        Used to populate a key in steps (see aio.populate_key()). Closing it stops populating.
+        """
+
+        # Walk the key and its subkeys (up to the specified depth), reading the values of each key once
+        if recurse is None or recurse is False:
+            maxdepth = 0    # Do not add subkeys as members
+        elif recurse is True or recurse < 0:
+            maxdepth = -1
+        else:
+            maxdepth = recurse + 1  # walk() counts the key itself as depth 0
+
+        # Paths of subkeys which have been found, but not walked yet: {abspath: RegPath}
+        pending = {}
+        def onerror(e:OSError)-> None:
+            # Subkeys which were found, but cannot be read, are still added as (empty) members
+            path = pending.pop(e.filename, None)
+            if path is not None and self.get_member_by_location(path) is None:
+                self.add_member(Key(path))
+        walker = walk(self.abspath, maxdepth=maxdepth, onerror=onerror, session=session, parallel=parallel, max_workers=max_workers)
+
+        def add_pending(path:RegPath, subkey_names:list[str])-> None:
+            for name in subkey_names:
+                child = path / name
+                if child is not None:   # Skip invalid key names
+                    pending[child.abspath] = child
+
+        try:
+            # Add all values in this key to self.values
+            tup = next(walker, None)
+            if tup is None:
+                return  # Could not access key
+            self.values |= tup[2]
+            self._mark_clean(tup[2])
+            add_pending(self.location, tup[1])
+            yield self.location
+
+            # Add subkeys to self.members
+            for subkey_path, subkey_names, newvals in walker:
+                path = pending.pop(subkey_path, None)
+                if path is None:
+                    continue    # Invalid key name
+                add_pending(path, subkey_names)
+
+                tup = self.get_member_by_location(path)
+                if tup is None: # member does not exist for the subkey
+                    member = self.add_member(Key(path, values=newvals))[1]
+                else:           # member exists
+                    member = self.members[tup[0]]
+                    member.values |= newvals
+                member._mark_clean(newvals)
+                yield path
+        finally:
+            walker.close()  # Closes its handles, if this generator is closed early
             
-                 
+
 
     def load(self,
-            recurse:bool = True
+            recurse:bool = True,
+            session:"Session|None" = None
         )-> None:
         """
         Load from registry all values tracked by this key and its members.
@@ -207,32 +455,45 @@ class Key:
         ----------
         recurse (Optional; Default=True)
             If True, also calls load(recurse=True) on each member key.
+        session (Optional; Default=None)
+            Session whose cached handles are used (see Session).
         """
 
         # Load all tracked values (if the key exists)
-        values = load_values(self.abspath, self.values)
+        values = load_values(self.abspath, self.values, session=session)
         if values is not None:
             self.values = values
+            self._mark_clean(values)
+        else:
+            self._baseline = None
 
         # Load all member keys
         if recurse is True:
             for name in self.members:
-                self.members[name].load(recurse=recurse)
+                self.members[name].load(recurse=recurse, session=session)
     
 
 
     def save(self, 
-            recurse:bool = True
+            recurse:bool = True,
+            session:"Session|None" = None,
+            force:bool = False
         )-> list[str]:
         """
         Save to the registry all values tracked by this key and its members.
 
-        All missing keys and values are created during this process.       
+        All missing keys and values are created during this process.
+        Only values which changed since they were last loaded or saved are written (see changes()),
+        and keys with no changes are skipped without accessing the registry.
 
         Parameters
         ----------
         recurse (Optional; Default=True)
             If True, also calls save(recurse=True) on each member key.
+        session (Optional; Default=None)
+            Session whose cached handles are used (see Session).
+        force (Optional; Default=False)
+            If True, write all tracked values, whether or not they changed.
         
         Returns
         -------
@@ -242,23 +503,62 @@ class Key:
 
         modified_keys = []
 
-        # Save all tracked values
-        key = save_values(self.abspath, self.values)
-        if key is not None:
-            modified_keys.append(key)
+        # Save all changed values (or create the key, if it has not been synced yet)
+        values = self.values if force else self.changes()
+        if force or self._baseline is None or len(values) > 0:
+            key = save_values(self.abspath, values, session=session)
+            if key is not None:
+                modified_keys.append(key)
+                self._mark_clean(values)
 
         # Save all tracked member keys
         if recurse is True:
             for name in self.members:
-                key = self.members[name].save(recurse=recurse)
+                key = self.members[name].save(recurse=recurse, session=session, force=force)
                 if key is not None:
                     modified_keys += (key)
         return modified_keys
 
 
 
-    def delete(self,
+    def changes(self)-> dict[str, tuple[Any,int]|None]:
+        """
+        Return the tracked values which changed since they were last loaded from or saved to the registry.
+
+        Returns
+        -------
+        values
+            Values dict containing the changed {name: value} pairs. Values set to None are deleted by save().
+        """
+
+        baseline = self._baseline if self._baseline is not None else {}
+        return {name: value for name, value in self.values.items() if name not in baseline or baseline[name] != value}
+
+
+
+    def is_dirty(self,
             recurse:bool = True
+        )-> bool:
+        """
+        Return True if save() would write to the registry: if a tracked value changed, or the key has not been synced.
+
+        Parameters
+        ----------
+        recurse (Optional; Default=True)
+            If True, also checks each member key.
+        """
+
+        if self._baseline is None or len(self.changes()) > 0:
+            return True
+        if recurse is True:
+            return any(self.members[name].is_dirty(recurse=recurse) for name in self.members)
+        return False
+
+
+
+    def delete(self,
+            recurse:bool = True,
+            session:"Session|None" = None
         )-> list[str]:
         """
         Delete this key, its members, and all subkeys and values from the registry.
@@ -267,6 +567,8 @@ class Key:
         ----------
         recurse (Optional; Default=True)
             If True, also calls delete(recurse=True) on each member key.
+        session (Optional; Default=None)
+            Session whose cached handles are used (see Session).
         
         Returns
         -------
@@ -277,14 +579,25 @@ class Key:
         deleted_keys = []
         
         # Delete this key
-        keys = delete_key(self.abspath)
+        keys = delete_key(self.abspath, session=session)
         if keys is not None:
             deleted_keys += keys
 
+        # The whole subtree is deleted, whether or not members are deleted below: the next save() rewrites all
+        # values of this key and of every tracked member
+        stack = [self]
+        unsynced = set()
+        while stack:
+            key = stack.pop()
+            if id(key) not in unsynced:
+                unsynced.add(id(key))
+                key._baseline = None
+                stack += key.members.values()
+
         # Delete all tracked members (recursively)
         if recurse is True:
             for name in self.members:
-                deleted_keys += self.members[name].delete(recurse=recurse)
+                deleted_keys += self.members[name].delete(recurse=recurse, session=session)
         return deleted_keys
     
 
@@ -312,9 +625,9 @@ class Key:
             Tuple containing the name and member object.
         """
         
-        if name is None:
+        if name is None and self.location is not None and key.location is not None:
             # Assume key is a subkey, and name it the same as its relative path
-            name = get_relpath(self.abspath, key.abspath) 
+            name = key.location.relative_to(self.location)
         if name is None:
             # Key is not a subkey, so name it after its absolute path
             name = key.abspath
@@ -351,7 +664,8 @@ class Key:
             location:Any
         )-> tuple[str,"Key"]|None:
         """
-        Return tracked member key by location.
+        Return tracked member key by location. Locations are compared case-insensitively,
+        using the members index (see MemberDict).
 
         Parameters:
         -----------
@@ -364,16 +678,14 @@ class Key:
             Tuple containing the name and member object, or None if no member exists at that location.
         """
 
-        tup = parse_location(location)
-        if tup is None:
+        path = parse_regpath(location)
+        if path is None:
             return None # invalid location
-        abspath = tup[2]
 
-        for name in self.members:
-            member = self.members[name]
-            if abspath == member.abspath:
-                return (name, member)
-        return None # member not found
+        name = self.members.find(path)   # Case-insensitive
+        if name is None:
+            return None # member not found
+        return (name, self.members[name])
 
             
 
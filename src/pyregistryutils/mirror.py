@@ -0,0 +1,227 @@
+import sqlite3
+from typing import Any
+
+from .common import *
+from .common import __get_backend__, __open_handle__, __join_subkey__
+from .regf import __regf_raw__
+
+# Mirror database schema. Keys and values are stored once each, and can be queried with SQL:
+#   keys        One row per key: absolute path, casefolded absolute path (unique), name, parent key, last write time.
+#   key_values  One row per value: key, name, casefolded name, type, raw data (as the registry stores it, see
+#               regf.__regf_data__() to convert it back), string data (REG_SZ, REG_EXPAND_SZ, and REG_MULTI_SZ joined
+#               by newlines), and integer data (REG_DWORD, REG_QWORD; QWORDs above 2**63-1 are stored as negative
+#               numbers, as in a signed 64-bit integer).
+#   value_text  Full-text (FTS5) index of the string data of key_values, by rowid, if SQLite has FTS5.
+# Deleting a key deletes its subkeys and values.
+MIRROR_SCHEMA_VERSION = 1
+MIRROR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS keys (
+    id          INTEGER PRIMARY KEY,
+    parent      INTEGER REFERENCES keys(id) ON DELETE CASCADE,
+    path        TEXT NOT NULL,
+    folded      TEXT NOT NULL UNIQUE,
+    name        TEXT NOT NULL,
+    last_write  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS keys_parent ON keys(parent);
+CREATE TABLE IF NOT EXISTS key_values (
+    id          INTEGER PRIMARY KEY,
+    key         INTEGER NOT NULL REFERENCES keys(id) ON DELETE CASCADE,
+    name        TEXT NOT NULL,
+    folded      TEXT NOT NULL,
+    type        INTEGER NOT NULL,
+    data        BLOB NOT NULL,
+    text        TEXT,
+    number      INTEGER
+);
+CREATE INDEX IF NOT EXISTS key_values_key ON key_values(key);
+CREATE INDEX IF NOT EXISTS key_values_folded ON key_values(folded);
+CREATE INDEX IF NOT EXISTS key_values_type ON key_values(type);
+"""
+MIRROR_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS value_text USING fts5(text);
+CREATE TRIGGER IF NOT EXISTS key_values_insert AFTER INSERT ON key_values WHEN new.text IS NOT NULL BEGIN
+    INSERT INTO value_text(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS key_values_delete AFTER DELETE ON key_values WHEN old.text IS NOT NULL BEGIN
+    DELETE FROM value_text WHERE rowid = old.id;
+END;
+"""
+
+
+
+###############################################################################
+## Internal Functions
+###############################################################################
+
+def __mirror_connect__(
+        db:"str|sqlite3.Connection"
+    )-> sqlite3.Connection:
+    """
+    Opens a mirror database, and creates its tables if they do not exist. The full-text index is created if
+    SQLite was built with FTS5, and skipped otherwise.
+    """
+
+    connection = sqlite3.connect(db) if isinstance(db, str) else db
+    connection.execute("PRAGMA foreign_keys = ON")
+    if connection.execute("PRAGMA user_version").fetchone()[0] == 0:
+        with connection:
+            connection.executescript(MIRROR_SCHEMA)
+            try:
+                connection.executescript(MIRROR_FTS_SCHEMA)
+            except sqlite3.OperationalError:    # No FTS5 module
+                pass
+            connection.execute(f"PRAGMA user_version = {MIRROR_SCHEMA_VERSION}")
+    return connection
+
+
+
+def __mirror_row__(
+        key:int,
+        name:str,
+        value:tuple[Any,int]
+    )-> tuple:
+    """
+    Returns the key_values row of a value: (key, name, folded, type, data, text, number).
+    """
+
+    data, type = value
+    text = number = None
+    if isinstance(data, str):
+        text = data
+    elif isinstance(data, list):
+        text = "\n".join(data)
+    elif isinstance(data, int):
+        number = data - 2**64 if data >= 2**63 else data
+    return (key, name, name.casefold(), type, __regf_raw__(data, type), text, number)
+
+
+
+###############################################################################
+## Mirroring
+###############################################################################
+
+def mirror_to_sqlite(
+        root:str,
+        db:"str|sqlite3.Connection",
+        session:"Session|None" = None,
+        refresh:bool = True
+    )-> dict[str,int]|None:
+    """
+    Mirrors a key and all of its subkeys and values into an SQLite database, so they can be queried offline
+    with SQL. See MIRROR_SCHEMA for the tables. For example, to find the keys under HKCR whose
+    shell\\open\\command mentions "python":
+
+        SELECT k.path FROM keys k JOIN key_values v ON v.key = k.id
+        WHERE k.folded LIKE 'hkcr:%\\shell\\open\\command' AND v.text LIKE '%python%'
+
+    Keys are stored by their casefolded absolute path, so a database can hold several mirrored trees.
+    If the tree was already mirrored, it is refreshed incrementally: keys whose last write time has not changed
+    keep their rows, and only their subkey names are read. Changed keys are rewritten, and keys which no
+    longer exist are deleted (with their subkeys and values). The refresh is a single transaction.
+
+    To find the deleted keys, the refresh holds the folded path, id and last write time of every key already
+    mirrored under root in memory while it runs: refreshing a whole hive (such as HKCR) holds one entry per
+    key of the hive.
+
+    Parameters:
+    -----------
+    root
+        Absolute path of the key to mirror (including hive).
+    db
+        Path of the database file (created if it does not exist), or an open sqlite3 connection.
+    session (Optional; Default=None)
+        Session used to read from the registry.
+    refresh (Optional; Default=True)
+        If False, every key is rewritten, even if its last write time has not changed.
+
+    Returns:
+    --------
+    counts | None
+        {"added": n, "updated": n, "unchanged": n, "deleted": n} numbers of keys, or None if root could not
+        be read (the database is not changed).
+    """
+
+    path = RegPath.parse(root)
+    if path is None:
+        return None
+    backend = __get_backend__(session)
+    handle = __open_handle__(path.abspath, MODE_READ, session)
+    if handle is None:
+        return None
+    counts = {"added": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+
+    with handle:    # Closed even if the database cannot be opened
+        connection = __mirror_connect__(db)
+        try:
+            with connection:
+                # Keys already mirrored under root: {folded: (id, last write time)}
+                folded = path.abspath.casefold()
+                prefix = folded + PATH_SEP if path.depth > 0 else folded    # Paths of subkeys start with prefix
+                existing = {row[0]: (row[1], row[2]) for row in connection.execute(
+                    "SELECT folded, id, last_write FROM keys WHERE folded = ? OR (folded >= ? AND folded < ?)",
+                    (folded, prefix, prefix[:-1] + chr(ord(prefix[-1])+1)))}
+                parent = connection.execute("SELECT id FROM keys WHERE folded = ?", (path.parent.abspath.casefold(),)).fetchone() if path.parent is not None else None
+
+                def mirror(handle:Any, abspath:str, name:str, parent:int|None)-> tuple[int, list[str]]:
+                    # Mirrors one key. Returns (key id, subkey names).
+                    nsubkeys, nvalues, last_write = backend.query_info_key(handle)[0:3]
+                    names = [backend.enum_key(handle, i) for i in range(nsubkeys)]
+                    row = existing.pop(abspath.casefold(), None)
+                    if row is not None and refresh and row[1] == last_write and last_write != 0:
+                        # The parent may have been mirrored after this key (for example, by mirroring a subtree first)
+                        connection.execute("UPDATE keys SET parent = ? WHERE id = ? AND parent IS NOT ?", (parent, row[0], parent))
+                        counts["unchanged"] += 1
+                        return row[0], names
+                    values = [backend.enum_value(handle, i) for i in range(nvalues)]
+                    if row is None:
+                        id = connection.execute("INSERT INTO keys (parent, path, folded, name, last_write) VALUES (?, ?, ?, ?, ?)",
+                                                (parent, abspath, abspath.casefold(), name, last_write)).lastrowid
+                        counts["added"] += 1
+                    else:
+                        id = row[0]
+                        connection.execute("UPDATE keys SET parent = ?, path = ?, name = ?, last_write = ? WHERE id = ?", (parent, abspath, name, last_write, id))
+                        connection.execute("DELETE FROM key_values WHERE key = ?", (id,))
+                        counts["updated"] += 1
+                    connection.executemany("INSERT INTO key_values (key, name, folded, type, data, text, number) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                           (__mirror_row__(id, tup[0], (tup[1], tup[2])) for tup in values))
+                    return id, names
+
+                # Depth-first, with each subkey opened relative to its parent's handle, like walk()
+                # Each stack frame is [handle, abspath, key id, subkey names, next subkey index]
+                id, names = mirror(handle, path.abspath, path.name, parent[0] if parent is not None else None)
+                stack = [[handle, path.abspath, id, names, 0]]
+                try:
+                    while stack:
+                        frame = stack[-1]
+                        handle, abspath, id, names, index = frame
+                        if index >= len(names):     # Finished with this key
+                            stack.pop()
+                            if stack:               # The root handle is closed by the "with" block
+                                backend.close_key(handle)
+                            continue
+                        frame[4] = index + 1
+
+                        subkey = __join_subkey__(abspath, names[index])
+                        try:
+                            child = backend.open_key(handle, names[index], winreg.KEY_READ)
+                        except OSError:
+                            continue    # Deleted while mirroring, or access denied: mirrored as missing
+                        try:
+                            child_id, child_names = mirror(child, subkey, names[index], id)
+                        except OSError:
+                            backend.close_key(child)
+                            continue
+                        stack.append([child, subkey, child_id, child_names, 0])
+                finally:
+                    for frame in stack[1:]:
+                        backend.close_key(frame[0])
+
+                # Keys which were not found (subkeys of deleted keys are deleted with them)
+                if existing:
+                    counts["deleted"] = len(existing)
+                    connection.executemany("DELETE FROM keys WHERE id = ?", ((row[0],) for row in existing.values()))
+        finally:
+            if isinstance(db, str):
+                connection.close()
+    return counts
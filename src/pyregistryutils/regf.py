@@ -0,0 +1,552 @@
+import mmap
+import struct
+import time
+from typing import Any, BinaryIO, Iterator
+
+from .backend import FILETIME_EPOCH_OFFSET, MountedBackend
+from .common import *
+from .diff import iter_keys, __source_location__
+
+# Registry hive file (regf) layout. All integers are little-endian.
+#   base block  REGF_BASE_BLOCK_SIZE bytes, starting with REGF_BASE
+#   hive bins   Starting at REGF_BASE_BLOCK_SIZE. Each bin starts with an HBIN_HEADER, followed by cells.
+# Cells are addressed by their offset from the start of the first hive bin. Each cell starts with its size (int32,
+# negative if the cell is allocated), followed by a record: nk (key), vk (value), lf/lh/li/ri (subkey lists),
+# db (big data), or raw data (value data and value lists).
+REGF_SIGNATURE = b"regf"
+HBIN_SIGNATURE = b"hbin"
+REGF_BASE_BLOCK_SIZE = 4096
+HBIN_SIZE = 4096                                # Hive bins are multiples of this size
+REGF_BASE = struct.Struct("<4sIIQIIIIIII")      # signature, sequence numbers (2), last written, major version, minor version, file type, file format, root cell offset, hive bins size, clustering factor
+REGF_VERSION = (1, 5)                           # Version written by save_hive() (Windows XP and later; lh subkey lists)
+REGF_CHECKSUM_OFFSET = 508                      # XOR of the first 127 uint32s of the base block
+HBIN_HEADER = struct.Struct("<4sIIQQI")         # signature, offset of this bin, size of this bin, reserved, timestamp, spare
+REGF_CELL = struct.Struct("<i")                 # cell size
+REGF_NK = struct.Struct("<2sHQ15IHH")           # "nk", flags, last written, access bits, parent, subkeys, volatile subkeys, subkey list, volatile subkey list, values, value list,
+                                                #   security, class name, largest subkey name, largest subkey class name, largest value name, largest value data, workvar, name length, class name length
+REGF_VK = struct.Struct("<2sHIIIHH")            # "vk", name length, data size, data offset, data type, flags, spare
+REGF_LIST = struct.Struct("<2sH")               # "lf"/"lh"/"li"/"ri", number of elements
+REGF_DB = struct.Struct("<2sHI")                # "db", number of segments, segment list offset
+REGF_SK = struct.Struct("<2sHIIII")             # "sk", reserved, next and previous security cells, reference count, descriptor size
+REGF_UINT32 = struct.Struct("<I")
+
+KEY_HIVE_ENTRY = 0x0004         # nk flag: root key of the hive
+KEY_NO_DELETE = 0x0008          # nk flag: key cannot be deleted
+KEY_COMP_NAME = 0x0020          # nk flag: name is stored as Latin-1 (otherwise UTF-16LE)
+VALUE_COMP_NAME = 0x0001        # vk flag: name is stored as Latin-1 (otherwise UTF-16LE)
+DATA_INLINE = 0x80000000        # vk data size flag: data (up to 4 bytes) is stored in the data offset field
+BIG_DATA_SEGMENT = 16344        # Maximum size of a data cell; larger data is split into segments listed by a db record
+NO_CELL = 0xFFFFFFFF            # Offset of a missing cell
+REGF_LIST_MAX = 1012            # Maximum number of elements save_hive() writes in an lh list; larger lists are split under an ri list
+REGF_ROOT_NAME = "ROOT"         # Name of the root key of a hive saved from the root of a registry hive
+
+
+
+###############################################################################
+## Internal Functions
+###############################################################################
+
+def __regf_name__(
+        raw:memoryview,
+        compressed:bool
+    )-> str:
+    """
+    Decodes the name of a key or value.
+    """
+
+    return str(raw, "latin-1") if compressed else str(raw, "utf-16-le", "surrogatepass")
+
+
+
+def __regf_upcase__(
+        name:str
+    )-> str:
+    """
+    Converts a key name to uppercase one character at a time, like the registry does to compare names.
+    """
+
+    return "".join(c.upper() if len(c.upper()) == 1 else c for c in name)
+
+
+
+def __regf_hash__(
+        name:str
+    )-> int:
+    """
+    Returns the hash of a key name stored in lh subkey lists.
+    """
+
+    hash = 0
+    for c in __regf_upcase__(name):
+        hash = (hash * 37 + ord(c)) & 0xFFFFFFFF
+    return hash
+
+
+
+def __regf_data__(
+        type:int,
+        raw:bytes
+    )-> Any:
+    """
+    Converts raw value data to the form winreg returns it in.
+    """
+
+    if type == winreg.REG_DWORD or type == winreg.REG_QWORD:
+        size = 4 if type == winreg.REG_DWORD else 8
+        return int.from_bytes(raw[:size], "little")
+    if type == winreg.REG_SZ or type == winreg.REG_EXPAND_SZ:
+        string = raw[:len(raw) & ~1].decode("utf-16-le", "surrogatepass")
+        return string.split("\x00", 1)[0]
+    if type == winreg.REG_MULTI_SZ:
+        strings = []
+        for string in raw[:len(raw) & ~1].decode("utf-16-le", "surrogatepass").split("\x00"):
+            if string == "":    # The list ends at the first empty string
+                break
+            strings.append(string)
+        return strings
+    return raw if len(raw) > 0 else None
+
+
+
+def __regf_raw__(
+        data:Any,
+        type:int
+    )-> bytes:
+    """
+    Converts value data, in the form winreg returns it in, to the raw bytes the registry stores.
+    """
+
+    if isinstance(data, str):               # REG_SZ, REG_EXPAND_SZ: UTF-16LE, null-terminated
+        return (data + "\x00").encode("utf-16-le", "surrogatepass")
+    if isinstance(data, list):              # REG_MULTI_SZ: each string null-terminated, followed by an empty string
+        return "".join(s + "\x00" for s in data).encode("utf-16-le", "surrogatepass") + b"\x00\x00"
+    if isinstance(data, int):               # REG_QWORD (or a DWORD stored under another type)
+        return data.to_bytes(8 if type == winreg.REG_QWORD else 4, "little")
+    if data is None:
+        return b""
+    return bytes(data)
+
+
+
+def __regf_encode_name__(
+        name:str
+    )-> tuple[bytes, bool]:
+    """
+    Encodes the name of a key or value. Returns (raw, compressed): names are stored as Latin-1 if possible.
+    """
+
+    try:
+        return name.encode("latin-1"), True
+    except UnicodeEncodeError:
+        return name.encode("utf-16-le", "surrogatepass"), False
+
+
+
+def __regf_security__(
+    )-> bytes:
+    """
+    Returns the security descriptor (self-relative) given to keys in saved hives: full control for SYSTEM and
+    Administrators, and read access for Users, inherited by subkeys. Owner is Administrators, group is SYSTEM.
+    """
+
+    def sid(*subauthorities:int)-> bytes:
+        return struct.pack(f"<BB6s{len(subauthorities)}I", 1, len(subauthorities), (5).to_bytes(6, "big"), *subauthorities)
+    def ace(mask:int, trustee:bytes)-> bytes:
+        return struct.pack("<BBHI", 0, 0x02, 8 + len(trustee), mask) + trustee     # ACCESS_ALLOWED, CONTAINER_INHERIT
+
+    system, administrators, users = sid(18), sid(32, 544), sid(32, 545)
+    aces = ace(winreg.KEY_ALL_ACCESS, system) + ace(winreg.KEY_ALL_ACCESS, administrators) + ace(winreg.KEY_READ, users)
+    dacl = struct.pack("<BBHHH", 2, 0, 8 + len(aces), 3, 0) + aces
+    header = struct.Struct("<BBHIIII")      # revision, reserved, control, offsets of owner, group, SACL, DACL
+    owner = header.size
+    group = owner + len(administrators)
+    offset = group + len(system)
+    control = 0x8000 | 0x0004               # SE_SELF_RELATIVE, SE_DACL_PRESENT
+    return header.pack(1, 0, control, owner, group, 0, offset) + administrators + system + dacl
+
+
+
+###############################################################################
+## Reading Hives
+###############################################################################
+
+class RegfBackend(MountedBackend):
+    """
+    Read-only backend serving the keys and values of an offline registry hive file (regf), such as NTUSER.DAT
+    or a SOFTWARE hive. Does not require winreg, so hives can be read on any platform.
+
+    The file is memory-mapped, and records are decoded from memoryview slices only when they are read, so
+    opening a hive does not read it into memory. The hive's root key is mounted at a location in the registry,
+    and read like the live registry with set_backend() or Session(backend=...):
+
+        hive = RegfBackend("NTUSER.DAT", "HKCU:")
+        values = list_values("HKCU:Software\\MyApp", session=Session(backend=hive))
+
+    Keys are identified by the offset of their nk cell. Volatile keys are not stored in hive files, and
+    pending changes in transaction logs (.LOG1/.LOG2) are not applied. Writes raise PermissionError.
+    """
+
+    def __init__(self,
+            file:str,
+            root:str = "HKLM:"
+        )-> None:
+        """
+        Open a hive file.
+
+        Parameters
+        ----------
+        file
+            Path of a hive file.
+        root (Optional; Default="HKLM:")
+            Absolute path at which the hive's root key appears.
+        """
+
+        self.root = RegPath.parse(root)
+        if self.root is None:
+            raise ValueError(f"Invalid path: \"{root}\"")
+        self._file = open(file, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self._file.close()
+            raise ValueError(f"Not a registry hive file: \"{file}\"") from None
+        self._view = memoryview(self._mmap)
+        if len(self._mmap) < REGF_BASE_BLOCK_SIZE + HBIN_HEADER.size or bytes(self._view[0:4]) != REGF_SIGNATURE:
+            self.close()
+            raise ValueError(f"Not a registry hive file: \"{file}\"")
+        base = REGF_BASE.unpack_from(self._mmap, 0)
+        self.version = (base[4], base[5])
+        self.last_write = base[3]
+        self._root = base[8]
+        try:
+            if self._nk(self._root)[1] & KEY_HIVE_ENTRY == 0:
+                raise OSError("Root cell is not the root key")
+        except OSError:
+            self.close()
+            raise ValueError(f"Corrupt registry hive file (invalid root key): \"{file}\"") from None
+
+
+    # Private methods
+    def _cell(self, offset:int)-> memoryview:
+        # Returns the contents of the cell at offset, without copying it
+        start = REGF_BASE_BLOCK_SIZE + offset
+        if offset == NO_CELL or start + 4 > len(self._mmap):
+            raise OSError(f"Invalid cell offset: {offset:#x}")
+        size = -REGF_CELL.unpack_from(self._mmap, start)[0]    # Allocated cells have negative sizes
+        if size < 4 or start + size > len(self._mmap):
+            raise OSError(f"Invalid cell at offset: {offset:#x}")
+        return self._view[start+4 : start+size]
+
+    def _nk(self, offset:int)-> tuple:
+        cell = self._cell(offset)
+        if len(cell) < REGF_NK.size or cell[0:2] != b"nk":
+            raise OSError(f"Invalid key cell at offset: {offset:#x}")
+        return REGF_NK.unpack_from(cell)
+
+    def _nk_name(self, offset:int)-> str:
+        cell = self._cell(offset)
+        nk = REGF_NK.unpack_from(cell)
+        return __regf_name__(cell[REGF_NK.size : REGF_NK.size + nk[18]], nk[1] & KEY_COMP_NAME != 0)
+
+    def _subkey_lists(self, offset:int)-> Iterator[tuple[bytes, memoryview, int]]:
+        # Yields the leaf subkey lists (lf, lh or li) under a subkey list, with their elements and element size
+        cell = self._cell(offset)
+        signature, count = REGF_LIST.unpack_from(cell)
+        if signature == b"ri":  # Index of other lists
+            for i in range(count):
+                yield from self._subkey_lists(REGF_UINT32.unpack_from(cell, REGF_LIST.size + 4*i)[0])
+        elif signature in (b"lf", b"lh"):   # Elements are (offset, hint or hash)
+            yield signature, cell[REGF_LIST.size : REGF_LIST.size + 8*count], 8
+        elif signature == b"li":            # Elements are offsets
+            yield signature, cell[REGF_LIST.size : REGF_LIST.size + 4*count], 4
+        else:
+            raise OSError(f"Invalid subkey list at offset: {offset:#x}")
+
+    def _values(self, nk:tuple)-> memoryview:
+        # Returns the value list of a key: the offsets of its vk cells
+        if nk[9] == 0:
+            return memoryview(b"")
+        return self._cell(nk[10])[0 : 4*nk[9]]
+
+    def _vk(self, offset:int)-> tuple[tuple, memoryview]:
+        cell = self._cell(offset)
+        if len(cell) < REGF_VK.size or cell[0:2] != b"vk":
+            raise OSError(f"Invalid value cell at offset: {offset:#x}")
+        return REGF_VK.unpack_from(cell), cell
+
+    def _vk_name(self, vk:tuple, cell:memoryview)-> str:
+        return __regf_name__(cell[REGF_VK.size : REGF_VK.size + vk[1]], vk[5] & VALUE_COMP_NAME != 0)
+
+    def _vk_data(self, vk:tuple)-> bytes:
+        size, offset = vk[2], vk[3]
+        if size & DATA_INLINE:      # Stored in the data offset field
+            return REGF_UINT32.pack(offset)[: size & ~DATA_INLINE]
+        if size == 0:
+            return b""
+        cell = self._cell(offset)
+        if size > BIG_DATA_SEGMENT and cell[0:2] == b"db" and self.version >= (1, 4):    # Split into segments
+            _, count, segments = REGF_DB.unpack_from(cell)
+            segments = self._cell(segments)
+            data = bytearray()
+            for i in range(count):
+                segment = self._cell(REGF_UINT32.unpack_from(segments, 4*i)[0])
+                data += segment[: min(len(segment), size - len(data), BIG_DATA_SEGMENT)]
+            return bytes(data)
+        return bytes(cell[:size])
+
+
+    # MountedBackend interface (keys are identified by the offset of their nk cell)
+    def _root_node(self)-> int:
+        return self._root
+
+    def _key_info(self, node:int)-> tuple[int, int, int]:
+        nk = self._nk(node)
+        return (nk[5], nk[9], nk[2])
+
+    def _key_subkey(self, node:int, index:int)-> str:
+        nk = self._nk(node)
+        if 0 <= index < nk[5]:
+            for signature, elements, size in self._subkey_lists(nk[7]):
+                count = len(elements) // size
+                if index < count:
+                    return self._nk_name(REGF_UINT32.unpack_from(elements, index*size)[0])
+                index -= count
+        raise OSError("No more data is available.")
+
+    def _key_find(self, node:int, folded:str)-> int|None:
+        nk = self._nk(node)
+        if nk[5] == 0:
+            return None
+        hash = None
+        for signature, elements, size in self._subkey_lists(nk[7]):
+            for i in range(0, len(elements), size):
+                if signature == b"lh" and folded.isascii():    # Skip subkeys whose name hash does not match, without reading them
+                    if hash is None:
+                        hash = __regf_hash__(folded)
+                    if REGF_UINT32.unpack_from(elements, i+4)[0] != hash:
+                        continue
+                offset = REGF_UINT32.unpack_from(elements, i)[0]
+                if self._nk_name(offset).casefold() == folded:
+                    return offset
+        return None
+
+    def _key_value(self, node:int, index:int)-> tuple[str, Any, int]:
+        values = self._values(self._nk(node))
+        if not 0 <= index < len(values) // 4:
+            raise OSError("No more data is available.")
+        vk, cell = self._vk(REGF_UINT32.unpack_from(values, 4*index)[0])
+        return (self._vk_name(vk, cell), __regf_data__(vk[4], self._vk_data(vk)), vk[4])
+
+    def _key_query(self, node:int, folded:str)-> tuple[Any, int]|None:
+        values = self._values(self._nk(node))
+        for i in range(0, len(values), 4):
+            vk, cell = self._vk(REGF_UINT32.unpack_from(values, i)[0])
+            if self._vk_name(vk, cell).casefold() == folded:
+                return (__regf_data__(vk[4], self._vk_data(vk)), vk[4])
+        return None
+
+
+    def _key_offsets(self, node:int)-> list[int]:
+        # Returns the offsets of a key's subkeys
+        nk = self._nk(node)
+        if nk[5] == 0:
+            return []
+        offsets = []
+        for signature, elements, size in self._subkey_lists(nk[7]):
+            offsets.extend(REGF_UINT32.unpack_from(elements, i)[0] for i in range(0, len(elements), size))
+        return offsets
+
+
+    # Public methods
+    def iter_keys(self)-> Iterator[tuple[tuple[str,...], dict[str, tuple[Any,int]]]]:
+        """
+        Iterate over all keys in the hive, in sorted, case-insensitive depth-first order (see diff.iter_keys()).
+        """
+
+        stack = [((), [self._root])]     # (components of the parent key, offsets of the keys left to visit, in reverse order)
+        while stack:
+            components, offsets = stack[-1]
+            if not offsets:
+                stack.pop()
+                continue
+            node = offsets.pop()
+            if node != self._root:
+                components = components + (self._nk_name(node),)
+            values = {}
+            for index in range(self._nk(node)[9]):
+                name, data, type = self._key_value(node, index)
+                values[name] = (data, type)
+            yield components, values
+            subkeys = sorted(((self._nk_name(offset), offset) for offset in self._key_offsets(node)), key=lambda t: t[0].casefold(), reverse=True)
+            stack.append((components, [offset for _, offset in subkeys]))
+
+
+
+    def close(self)-> None:
+        """
+        Close the hive file. Handles opened from this backend can no longer be used.
+        """
+
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+
+
+###############################################################################
+## Writing Hives
+###############################################################################
+
+def save_hive(
+        source:Any,
+        file:str|BinaryIO,
+        session:"Session|None" = None
+    )-> int|None:
+    """
+    Saves a key and all of its subkeys and values to a registry hive file (regf), which can be loaded by Windows
+    (for example, with "reg load" or as a user profile's NTUSER.DAT) or opened with RegfBackend.
+
+    The tree is read one key at a time (see iter_keys()), and each key is written to the file as it is read:
+    cells are packed into hive bins in order, values larger than 16344 bytes are split into big data segments,
+    and the subkeys of each key are listed in lh lists (hashed, sorted by uppercase name), split under an ri list
+    if there are more than REGF_LIST_MAX. Only the keys from the root key to the current key, and the names of
+    their subkeys, are held in memory. All keys share one security descriptor (see __regf_security__()).
+
+    Parameters:
+    -----------
+    source
+        Tree to save: absolute path (str) of a key in the registry, Key object (with its members),
+        TreeStore, SnapshotBackend, or RegfBackend. The key becomes the root key of the hive.
+    file
+        Path of the file to write, or a binary file object opened for writing, which supports seek().
+    session (Optional; Default=None)
+        Session used to read from the registry, if source is a path.
+
+    Returns:
+    --------
+    nkeys | None
+        Number of keys saved, or None if the source could not be read (nothing is written).
+    """
+
+    root = __source_location__(source)
+    if root is None:
+        return None
+    if isinstance(file, str):
+        with open(file, "wb") as f:
+            return save_hive(source, f, session=session)
+
+    timestamp = time.time_ns() // 100 + FILETIME_EPOCH_OFFSET
+    start = file.tell()
+    file.write(bytes(REGF_BASE_BLOCK_SIZE))
+    bin_end = 0         # Offset of the end of the current hive bin
+    position = 0        # Offset of the next cell
+
+    def alloc(data:bytes)-> int:
+        # Writes a cell, starting a new hive bin if it does not fit in the current one. Returns the cell's offset.
+        nonlocal bin_end, position
+        size = (len(data) + 4 + 7) & ~7
+        if position + size > bin_end:
+            if position < bin_end:  # The rest of the bin is a free cell
+                file.write(REGF_CELL.pack(bin_end - position) + bytes(bin_end - position - 4))
+            bin_size = (HBIN_HEADER.size + size + HBIN_SIZE - 1) // HBIN_SIZE * HBIN_SIZE
+            file.write(HBIN_HEADER.pack(HBIN_SIGNATURE, bin_end, bin_size, 0, timestamp if bin_end == 0 else 0, 0))
+            position = bin_end + HBIN_HEADER.size
+            bin_end += bin_size
+        offset = position
+        file.write(REGF_CELL.pack(-size) + data + bytes(size - 4 - len(data)))
+        position += size
+        return offset
+
+    def patch(offset:int, data:bytes)-> None:
+        # Overwrites the start of a cell that has already been written
+        file.seek(start + REGF_BASE_BLOCK_SIZE + offset + 4)
+        file.write(data)
+        file.seek(start + REGF_BASE_BLOCK_SIZE + position)
+
+    def value(name:str, data:Any, type:int)-> tuple[int, int, int]:
+        # Writes a value and its data. Returns (vk cell offset, name length, data length).
+        raw = __regf_raw__(data, type)
+        encoded, compressed = __regf_encode_name__(name)
+        if len(raw) <= 4:                   # Stored in the vk record
+            size, offset = len(raw) | DATA_INLINE, int.from_bytes(raw, "little")
+        elif len(raw) <= BIG_DATA_SEGMENT:
+            size, offset = len(raw), alloc(raw)
+        else:                               # Split into segments, listed by a db record
+            segments = [alloc(raw[i : i+BIG_DATA_SEGMENT]) for i in range(0, len(raw), BIG_DATA_SEGMENT)]
+            size, offset = len(raw), alloc(REGF_DB.pack(b"db", len(segments), alloc(struct.pack(f"<{len(segments)}I", *segments))))
+        vk = alloc(REGF_VK.pack(b"vk", len(encoded), size, offset, type, VALUE_COMP_NAME if compressed else 0, 0) + encoded)
+        return vk, len(name)*2, len(raw)
+
+    def finish(frame:list)-> None:
+        # Writes the subkey list of a key whose subkeys have all been written, and completes its nk record
+        offset, _, fields, subkeys = frame
+        if subkeys:
+            subkeys.sort()
+            lists = []
+            for i in range(0, len(subkeys), REGF_LIST_MAX):
+                chunk = subkeys[i : i+REGF_LIST_MAX]
+                lists.append(alloc(REGF_LIST.pack(b"lh", len(chunk)) + b"".join(REGF_UINT32.pack(o) + REGF_UINT32.pack(h) for _, o, h in chunk)))
+            fields[5], fields[7] = len(subkeys), lists[0] if len(lists) == 1 else alloc(REGF_LIST.pack(b"ri", len(lists)) + struct.pack(f"<{len(lists)}I", *lists))
+        patch(offset, REGF_NK.pack(*fields))
+
+    security = __regf_security__()
+    sk = alloc(REGF_SK.pack(b"sk", 0, 0, 0, 0, len(security)) + security)
+    path = []           # [nk offset, casefolded name, nk fields, subkeys [(uppercase name, nk offset, hash)]] of the keys from the root key to the current key
+    nkeys = 0
+
+    # Keys are written in depth-first order, so each key's parent has been written before it
+    for components, key_values in iter_keys(source, session=session):
+        folded = [root.name.casefold()] + [name.casefold() for name in components]
+        common = 0
+        while common < len(path) and common < len(folded) and path[common][1] == folded[common]:
+            common += 1
+        while len(path) > common:
+            finish(path.pop())
+
+        # Keys missing from the source (for example, between a Key and a member in a subkey of a subkey) are added without values
+        names = ((root.name or REGF_ROOT_NAME),) + tuple(components)
+        for depth in range(common, len(names)):
+            vks, max_name, max_data = [], 0, 0
+            for value_name, data in (key_values.items() if depth == len(names)-1 else ()):
+                if data is None:    # Not in the registry
+                    continue
+                vk, name_size, data_size = value(value_name, data[0], data[1])
+                vks.append(vk)
+                max_name, max_data = max(max_name, name_size), max(max_data, data_size)
+            valuelist = alloc(struct.pack(f"<{len(vks)}I", *vks)) if vks else NO_CELL
+
+            encoded, compressed = __regf_encode_name__(names[depth])
+            flags = (KEY_COMP_NAME if compressed else 0) | (KEY_HIVE_ENTRY | KEY_NO_DELETE if depth == 0 else 0)
+            parent = path[-1][0] if path else NO_CELL
+            fields = [b"nk", flags, timestamp, 0, parent, 0, 0, NO_CELL, NO_CELL, len(vks), valuelist,
+                      sk, NO_CELL, 0, 0, max_name, max_data, 0, len(encoded), 0]
+            offset = alloc(REGF_NK.pack(*fields) + encoded)
+            if depth == 0:
+                root_offset = offset
+            if path:
+                path[-1][3].append((__regf_upcase__(names[depth]), offset, __regf_hash__(names[depth])))
+                path[-1][2][13] = max(path[-1][2][13], len(names[depth])*2)     # Largest subkey name
+            path.append([offset, folded[depth], fields, []])
+            nkeys += 1
+    if nkeys == 0:
+        file.seek(start)
+        file.truncate()
+        return None
+    while path:
+        finish(path.pop())
+    if position < bin_end:  # The rest of the last bin is a free cell
+        file.write(REGF_CELL.pack(bin_end - position) + bytes(bin_end - position - 4))
+        position = bin_end
+    patch(sk, REGF_SK.pack(b"sk", 0, sk, sk, nkeys, len(security)))
+
+    # Base block, with its checksum
+    base = bytearray(REGF_BASE_BLOCK_SIZE)
+    REGF_BASE.pack_into(base, 0, REGF_SIGNATURE, 1, 1, timestamp, *REGF_VERSION, 0, 1, root_offset, bin_end, 1)
+    checksum = 0
+    for (dword,) in struct.iter_unpack("<I", base[:REGF_CHECKSUM_OFFSET]):
+        checksum ^= dword
+    REGF_UINT32.pack_into(base, REGF_CHECKSUM_OFFSET, {0: 1, 0xFFFFFFFF: 0xFFFFFFFE}.get(checksum, checksum))
+    file.seek(start)
+    file.write(base)
+    file.seek(start + REGF_BASE_BLOCK_SIZE + bin_end)
+    return nkeys
@@ -0,0 +1,126 @@
+from typing import Any, TextIO
+
+from .common import *
+from .diff import iter_keys, __source_location__
+from .regf import __regf_raw__
+
+# First line of a .reg file, as written by regedit
+REGFILE_HEADER = "Windows Registry Editor Version 5.00"
+
+# Continuation lines of hex values start after this many columns, and are wrapped before REGFILE_LINE_WIDTH
+REGFILE_INDENT = 2
+REGFILE_LINE_WIDTH = 80
+
+
+
+###############################################################################
+## Internal Functions
+###############################################################################
+
+def __reg_string__(
+        string:str
+    )-> str:
+    """
+    Quotes a string (value name or REG_SZ data) for a .reg file.
+    """
+
+    return "\"" + string.replace("\\", "\\\\").replace("\"", "\\\"") + "\""
+
+
+
+def __reg_hex__(
+        prefix:str,
+        data:bytes
+    )-> str:
+    """
+    Formats binary data as a comma-separated hex list after prefix (for example, "\"name\"=hex(2):"),
+    wrapped like regedit: each line ends with "," and "\\" before REGFILE_LINE_WIDTH columns.
+    """
+
+    lines = []
+    line = prefix
+    for i, byte in enumerate(data):
+        item = f"{byte:02x}" + ("," if i < len(data)-1 else "")
+        if len(line) + len(item) > REGFILE_LINE_WIDTH - 2 and i < len(data)-1:
+            lines.append(line + "\\")
+            line = " " * REGFILE_INDENT
+        line += item
+    lines.append(line)
+    return "\n".join(lines)
+
+
+
+def __reg_value__(
+        name:str,
+        value:tuple[Any,int]|None
+    )-> str:
+    """
+    Formats one value as a line (or wrapped lines) of a .reg file. A value of None is written as a deletion ("name"=-).
+    """
+
+    prefix = ("@" if name == VALUE_DEFAULT else __reg_string__(name)) + "="
+    if value is None:
+        return prefix + "-"
+    data, type = value
+
+    if type == TYPE_REG_SZ and isinstance(data, str) and not any(c in data for c in "\r\n\x00"):
+        return prefix + __reg_string__(data)
+    if type == TYPE_DWORD and isinstance(data, int):
+        return prefix + f"dword:{data:08x}"
+
+    # All other types (and strings which cannot be quoted) are written as hex, in the format the registry stores them in
+    return __reg_hex__(prefix + ("hex:" if type == TYPE_BINARY else f"hex({type:x}):"), __regf_raw__(data, type))
+
+
+
+###############################################################################
+## Export
+###############################################################################
+
+def export_reg(
+        source:Any,
+        file:str|TextIO,
+        session:"Session|None" = None
+    )-> int|None:
+    """
+    Exports a key and all of its subkeys and values to a .reg file (Windows Registry Editor Version 5.00), like "reg export".
+
+    Keys are read and written one at a time (see iter_keys()), so memory use does not depend on the size of the tree.
+    Values are encoded like regedit: strings as "data", REG_DWORD as dword:, and all other types as hex lists
+    (hex(2): REG_EXPAND_SZ, hex(7): REG_MULTI_SZ, hex(b): REG_QWORD, etc.). Values which are None in a Key object
+    are written as deletions ("name"=-).
+
+    Parameters:
+    -----------
+    source
+        Tree to export: absolute path (str) of a key in the registry, Key object (with its members),
+        TreeStore, SnapshotBackend, or any other source accepted by iter_keys().
+    file
+        Path of the file to write (written as UTF-16 with a byte order mark and CRLF line endings, like regedit),
+        or a text file object to write to.
+    session (Optional; Default=None)
+        Session used to read from the registry, if source is a path.
+
+    Returns:
+    --------
+    nkeys | None
+        Number of keys exported, or None if the source is invalid.
+    """
+
+    root = __source_location__(source)
+    if root is None:
+        return None
+    if isinstance(file, str):
+        with open(file, "w", encoding="utf-16-le", newline="\r\n") as f:
+            f.write("\ufeff")  # Byte order mark
+            return export_reg(source, f, session=session)
+
+    file.write(REGFILE_HEADER + "\n\n")
+    nkeys = 0
+    for components, values in iter_keys(source, session=session):   # Each key is followed by a blank line
+        file.write("[" + PATH_SEP.join((root.longpath,) + tuple(components)) + "]\n")
+        for name, value in values.items():
+            file.write(__reg_value__(name, value) + "\n")
+        file.write("\n")
+        nkeys += 1
+    return nkeys
@@ -0,0 +1,143 @@
+import re
+from typing import Any, Callable, Iterable, Iterator
+
+from .common import *
+
+
+
+###############################################################################
+## Internal Functions
+###############################################################################
+
+def __compile_pattern__(
+        pattern:"str|re.Pattern",
+        regex:bool,
+        ignorecase:bool
+    )-> "re.Pattern":
+    """
+    Compiles a search pattern once, for all keys and values.
+    """
+
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    return re.compile(pattern if regex else re.escape(pattern), re.IGNORECASE if ignorecase else 0)
+
+
+
+def __match_data__(
+        search:Callable[[str], Any],
+        data:Any
+    )-> bool:
+    """
+    Returns True if string data (REG_SZ, REG_EXPAND_SZ, or any string in a REG_MULTI_SZ) matches.
+    Other data (integers and binary data) never matches.
+    """
+
+    if isinstance(data, str):
+        return search(data) is not None
+    if isinstance(data, list):
+        return any(isinstance(s, str) and search(s) is not None for s in data)
+    return False
+
+
+
+###############################################################################
+## Search
+###############################################################################
+
+def search(
+        root:str,
+        pattern:"str|re.Pattern",
+        in_names:bool = True,
+        in_data:bool = True,
+        in_keys:bool = False,
+        types:Iterable[int]|None = None,
+        regex:bool = False,
+        ignorecase:bool = True,
+        limit:int|None = None,
+        onerror:Callable[[OSError],None]|None = None,
+        session:"Session|None" = None,
+        parallel:bool = False,
+        max_workers:int|None = None
+    )-> Iterator[tuple[str, str|None, tuple[Any,int]|None]]:
+    """
+    Searches the tree of keys under root for value names, value data and/or key names matching a pattern,
+    like regedit's Find, and yields the matches as they are found.
+
+    The tree is read with walk(): with parallel=True, subtrees are read concurrently by a thread pool while
+    matches are yielded in tree order. The pattern is compiled once. Values whose type is not in types are
+    skipped before their names or data are matched, and only string data (REG_SZ, REG_EXPAND_SZ and
+    REG_MULTI_SZ) is searched, so binary and integer data is never converted to text.
+
+    Filtering by types does not reduce the amount of data read: walk() reads each value with EnumValue, which
+    returns its name, type and data together, so every value (including large REG_BINARY data) is read from
+    the registry before its type is checked.
+
+    Parameters:
+    -----------
+    root
+        Absolute path of the key to search (including hive).
+    pattern
+        Text to search for. Matches anywhere in a name or string (not only the whole string).
+        Can also be a compiled regular expression, in which case regex and ignorecase are ignored.
+    in_names (Optional; Default=True)
+        If True, search value names.
+    in_data (Optional; Default=True)
+        If True, search value data.
+    in_keys (Optional; Default=False)
+        If True, search key names. Matching keys are yielded with name and value set to None.
+    types (Optional; Default=None)
+        Value types to search (for example, {TYPE_REG_SZ, TYPE_EXPAND_SZ}). If None, all types are searched.
+        Values of other types are still read (see above), but not matched.
+    regex (Optional; Default=False)
+        If True, pattern is a regular expression. Otherwise it is searched for literally.
+    ignorecase (Optional; Default=True)
+        If True, matching is case-insensitive, like names in the registry.
+    limit (Optional; Default=None)
+        Stop after this many matches. If None, the whole tree is searched.
+    onerror (Optional; Default=None)
+        Function called with the OSError if a key cannot be opened or read. The key is skipped.
+    session (Optional; Default=None)
+        Session whose cached handles are used for root.
+    parallel (Optional; Default=False)
+        If True, subtrees are read concurrently by a thread pool (see walk()).
+    max_workers (Optional; Default=None)
+        Number of threads used if parallel=True. Defaults to ThreadPoolExecutor's default.
+
+    Yields:
+    -------
+    (keypath, name, value)
+         - keypath: Absolute path of the key.
+         - name: Name of the matching value, or None if the key name matched.
+         - value: Value tuple (data, type) of the matching value, or None if the key name matched.
+        A value matching by both name and data is yielded once.
+    """
+
+    match = __compile_pattern__(pattern, regex, ignorecase).search
+    types = frozenset(types) if types is not None else None
+    if limit is not None and limit <= 0:
+        return
+    count = 0
+
+    # Closing the walk (when the limit is reached, or the caller stops iterating) cancels the reads still queued
+    keys = walk(root, onerror=onerror, session=session, parallel=parallel, max_workers=max_workers)
+    try:
+        for keypath, _, values in keys:
+            sep = keypath.rfind(PATH_SEP)
+            if in_keys and match(keypath[sep+1:] if sep >= 0 else keypath.partition(":")[2]) is not None:
+                yield keypath, None, None
+                count += 1
+                if count == limit:
+                    return
+            if not (in_names or in_data):
+                continue
+            for name, value in values.items():
+                if types is not None and value[1] not in types:
+                    continue
+                if (in_names and match(name) is not None) or (in_data and __match_data__(match, value[0])):
+                    yield keypath, name, value
+                    count += 1
+                    if count == limit:
+                        return
+    finally:
+        keys.close()
@@ -0,0 +1,250 @@
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from .common import *
+
+
+
+class SessionEntry:
+    """
+    A handle cached by a Session.
+    """
+
+    __slots__ = ("handle", "cachekey", "pins", "evicted")
+
+    def __init__(self, handle:Any, cachekey:tuple)-> None:
+        self.handle = handle
+        self.cachekey = cachekey
+        self.pins = 0           # Number of open leases on this handle
+        self.evicted = False    # True once the entry has left the cache; the handle is closed when it is no longer pinned
+
+
+
+class SessionLease:
+    """
+    Context manager returned by Session.open(). Yields the cached handle, and returns it to the session on exit.
+    If the "with" block raised an OSError (other than PermissionError) on a handle that was reused from the
+    cache, the handle is assumed to be stale: it is evicted, and "stale" is set to True.
+    """
+
+    __slots__ = ("session", "entry", "reused", "stale")
+
+    def __init__(self, session:"Session", entry:SessionEntry, reused:bool = False)-> None:
+        self.session = session
+        self.entry = entry
+        self.reused = reused    # True if the handle was cached, not opened for this lease
+        self.stale = False
+
+    def __enter__(self)-> Any:
+        return self.entry.handle
+
+    def __exit__(self, exc_type, exc, traceback)-> None:
+        self.stale = self.reused and isinstance(exc, OSError) and not isinstance(exc, PermissionError)
+        self.session.release(self.entry, stale=self.stale)
+
+
+
+class Session:
+    """
+    Pool of open key handles, reused across calls to the functions in common.py and Key methods.
+
+    Handles are cached by (hive, localpath, mode) in a bounded LRU. When the pool is full, the least
+    recently used handle is evicted and closed; handles that are in use when evicted are closed as soon
+    as they are returned. All handles are closed by close(), or when leaving a "with" block:
+
+        with Session() as session:
+            reg.save_value("HKCU:Software\\MyApp", "a", (1, reg.TYPE_DWORD), session=session)
+            reg.load_value("HKCU:Software\\MyApp", "a", session=session)
+
+    Cached handles are not revalidated when they are reused: if a key is deleted outside the session, its
+    handle becomes stale, and operations on it raise OSError. A reused handle whose operation raised OSError is
+    evicted, and the functions in common.py then retry the operation once, with a fresh handle. Errors on freshly
+    opened handles, and PermissionError, are not retried.
+    """
+
+    DEFAULT_MAXSIZE = 128
+
+    def __init__(self,
+            maxsize:int = DEFAULT_MAXSIZE,
+            backend:Any|None = None
+        )-> None:
+        """
+        Create a new Session.
+
+        Parameters
+        ----------
+        maxsize (Optional; Default=Session.DEFAULT_MAXSIZE)
+            Maximum number of open handles kept in the pool.
+        backend (Optional; Default=None)
+            Backend to open handles with. If None, uses the current backend (see get_backend()).
+        """
+
+        self.maxsize = max(1, maxsize)
+        self.backend = backend if backend is not None else get_backend()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()   # {(hive, casefolded localpath, mode): SessionEntry}
+        self._lock = threading.RLock()
+
+
+    # Private methods
+    def __enter__(self)-> "Session":
+        return self
+
+    def __exit__(self, *args)-> None:
+        self.close()
+
+    def __len__(self)-> int:
+        return len(self._entries)
+
+    def _evict(self, cachekey:tuple)-> None:
+        entry = self._entries.pop(cachekey)
+        entry.evicted = True
+        if entry.pins == 0:
+            self.backend.close_key(entry.handle)
+
+
+    # Public methods
+    def open(self,
+            hive:int,
+            localpath:str,
+            mode:int
+        )-> SessionLease:
+        """
+        Return a lease on a handle to the specified key, opening it if it is not already cached.
+
+        Parameters
+        ----------
+        hive
+            One of the predefined Hive handles (HKLM, HKCU, etc.)
+        localpath
+            Key path relative to the hive.
+        mode
+            Access mode: MODE_READ, MODE_WRITE or MODE_BOTH (see __open_handle__).
+
+        Returns
+        -------
+        lease
+            Context manager which yields the handle.
+        """
+
+        cachekey = (hive, localpath.casefold(), mode)
+        with self._lock:
+            entry = self._entries.get(cachekey)
+            reused = entry is not None
+            if reused:
+                self.hits += 1
+                self._entries.move_to_end(cachekey)
+            else:
+                self.misses += 1
+                if mode == MODE_READ:
+                    handle = self.backend.open_key(hive, localpath, MODE_ACCESS[mode])
+                else:
+                    handle = self.backend.create_key(hive, localpath, MODE_ACCESS[mode])
+                entry = SessionEntry(handle, cachekey)
+                self._entries[cachekey] = entry
+                while len(self._entries) > self.maxsize:
+                    self._evict(next(iter(self._entries)))
+                    self.evictions += 1
+            entry.pins += 1
+            return SessionLease(self, entry, reused)
+
+
+
+    def release(self,
+            entry:SessionEntry,
+            stale:bool = False
+        )-> None:
+        """
+        Return a handle to the session. Called when a SessionLease exits.
+
+        Parameters
+        ----------
+        entry
+            The leased entry.
+        stale (Optional; Default=False)
+            If True, the handle is evicted (for example, because its key was deleted outside the session).
+        """
+
+        with self._lock:
+            entry.pins -= 1
+            if stale and self._entries.get(entry.cachekey) is entry:
+                self._evict(entry.cachekey)     # Closed now, or when its other leases are returned
+            elif entry.evicted and entry.pins == 0:
+                self.backend.close_key(entry.handle)
+
+
+
+    def discard(self,
+            hive:int,
+            localpath:str
+        )-> int:
+        """
+        Close all cached handles to a key and its subkeys (for example, because the key is being deleted).
+
+        Parameters
+        ----------
+        hive
+            One of the predefined Hive handles (HKLM, HKCU, etc.)
+        localpath
+            Key path relative to the hive.
+
+        Returns
+        -------
+        count
+            Number of handles discarded.
+        """
+
+        folded = localpath.casefold()
+        prefix = folded + "\\" if folded != "" else ""
+        with self._lock:
+            cachekeys = [k for k in self._entries if k[0] == hive and (k[1] == folded or k[1].startswith(prefix))]
+            for cachekey in cachekeys:
+                self._evict(cachekey)
+            return len(cachekeys)
+
+
+
+    def close(self)-> None:
+        """
+        Close all cached handles.
+        """
+
+        with self._lock:
+            for cachekey in list(self._entries):
+                self._evict(cachekey)
+
+
+
+    def stats(self)-> dict[str,int]:
+        """
+        Return the pool's counters, for sizing maxsize.
+
+        Returns
+        -------
+        stats
+            {"hits", "misses", "evictions", "size", "maxsize"}
+        """
+
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize
+            }
+
+
+
+    def reset_stats(self)-> None:
+        """
+        Reset the hit, miss and eviction counters.
+        """
+
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
@@ -0,0 +1,348 @@
+import mmap
+import struct
+from array import array
+from typing import Any, BinaryIO, Iterator
+
+from .backend import MountedBackend
+from .common import *
+from .diff import iter_keys, __source_location__
+
+# Snapshot file layout (all integers are little-endian):
+#   header      SNAPSHOT_HEADER, at offset 0
+#   data        Value data, written as the tree is read
+#   keys        One SNAPSHOT_KEY record per key, sorted by casefolded path (depth-first, as in iter_keys())
+#   children    Key index (uint32) of each subkey; the subkeys of each key are contiguous and sorted by casefolded name
+#   values      One SNAPSHOT_VALUE record per value; the values of each key are contiguous, in registry order
+#   strings     SNAPSHOT_STRING record per string: (offset in the string data, length)
+#   string data UTF-8 strings: key names, casefolded key names, value names and the root path, each stored once
+SNAPSHOT_MAGIC = b"PRUSNAP\x00"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<8sIIIIQQQQQQQQ")  # magic, version, root hive, root localpath (string), reserved, nkeys, nvalues, nstrings, offsets of keys, children, values, strings, string data
+SNAPSHOT_KEY = struct.Struct("<IIiIIIIQ")           # name, casefolded name (strings), parent (-1 for the root), children start, children count, values start, values count, last write time
+SNAPSHOT_VALUE = struct.Struct("<IIIQQ")            # name (string), type, data kind, data offset, data length
+SNAPSHOT_INDEX = struct.Struct("<I")                # subkey index, in the children section
+SNAPSHOT_STRING = struct.Struct("<QQ")              # offset in the string data, length
+
+# Kinds of value data, by the Python type winreg returns them as
+DATA_NONE = 0       # None
+DATA_STR = 1        # str, as UTF-8
+DATA_LIST = 2       # list of str, each as UTF-8 followed by a null character
+DATA_INT = 3        # int, as uint64
+DATA_BYTES = 4      # bytes
+
+
+
+###############################################################################
+## Internal Functions
+###############################################################################
+
+def __encode_data__(
+        data:Any
+    )-> tuple[int, bytes]:
+    """
+    Encodes value data as (kind, bytes) for a snapshot.
+    """
+
+    if data is None:
+        return DATA_NONE, b""
+    if isinstance(data, str):
+        return DATA_STR, data.encode("utf-8", "surrogatepass")
+    if isinstance(data, list):
+        return DATA_LIST, b"".join(s.encode("utf-8", "surrogatepass") + b"\x00" for s in data)
+    if isinstance(data, int):
+        return DATA_INT, struct.pack("<Q", data)
+    return DATA_BYTES, bytes(data)
+
+
+
+def __decode_data__(
+        kind:int,
+        raw:memoryview
+    )-> Any:
+    """
+    Decodes value data stored in a snapshot.
+    """
+
+    if kind == DATA_STR:
+        return str(raw, "utf-8", "surrogatepass")
+    if kind == DATA_LIST:
+        return [s.decode("utf-8", "surrogatepass") for s in bytes(raw).split(b"\x00")[:-1]]
+    if kind == DATA_INT:
+        return struct.unpack("<Q", raw)[0]
+    if kind == DATA_BYTES:
+        return bytes(raw)
+    return None
+
+
+
+###############################################################################
+## Writing Snapshots
+###############################################################################
+
+def save_snapshot(
+        source:Any,
+        file:str|BinaryIO,
+        session:"Session|None" = None
+    )-> int|None:
+    """
+    Saves a key and all of its subkeys and values to a snapshot file, which can be opened with SnapshotBackend.
+
+    The tree is read one key at a time (see iter_keys()), and value data is written to the file as it is read.
+    Until the file is complete, only a few integers per key and value, and each distinct name, are held in memory.
+
+    Parameters:
+    -----------
+    source
+        Tree to save: absolute path (str) of a key in the registry, Key object (with its members),
+        TreeStore, or SnapshotBackend.
+    file
+        Path of the file to write, or a binary file object opened for writing, which supports seek().
+    session (Optional; Default=None)
+        Session used to read from the registry, if source is a path.
+
+    Returns:
+    --------
+    nkeys | None
+        Number of keys saved, or None if the source could not be read (nothing is written).
+    """
+
+    root = __source_location__(source)
+    if root is None:
+        return None
+    if isinstance(file, str):
+        with open(file, "wb") as f:
+            return save_snapshot(source, f, session=session)
+
+    strings = {}                    # {string: index}
+    def intern(string:str)-> int:
+        index = strings.get(string)
+        if index is None:
+            index = strings[string] = len(strings)
+        return index
+
+    fields = 8                      # Number of fields in SNAPSHOT_KEY
+    keys = array("q")               # SNAPSHOT_KEY fields of each key, flattened
+    children = []                   # Subkey indexes of each key: [array]
+    values = bytearray()            # SNAPSHOT_VALUE records
+    nvalues = 0
+    path = []                       # (index, casefolded name) of the keys from the root key to the current key
+    start = file.tell()
+    file.write(bytes(SNAPSHOT_HEADER.size))
+    offset = SNAPSHOT_HEADER.size   # Offset of the next section, relative to start
+
+    # Keys and values, in sorted order
+    for components, key_values in iter_keys(source, session=session):
+        folded = [root.name.casefold()] + [name.casefold() for name in components]
+        common = 0
+        while common < len(path) and common < len(folded) and path[common][1] == folded[common]:
+            common += 1
+        del path[common:]
+
+        # Keys missing from the source (for example, between a Key and a member in a subkey of a subkey) are added without values
+        names = (root.name,) + tuple(components)
+        for depth in range(common, len(names)):
+            index = len(children)
+            parent = path[-1][0] if path else -1
+            path.append((index, folded[depth]))
+            children.append(array("I"))
+            if parent >= 0:
+                children[parent].append(index)
+
+            count = 0
+            for value_name, value in (key_values.items() if depth == len(names)-1 else ()):
+                if value is None:   # Not in the registry
+                    continue
+                kind, raw = __encode_data__(value[0])
+                file.write(raw)
+                values += SNAPSHOT_VALUE.pack(intern(value_name), value[1], kind, offset, len(raw))
+                offset += len(raw)
+                count += 1
+            keys.extend((intern(names[depth]), intern(folded[depth]), parent, 0, 0, nvalues, count, 0))
+            nvalues += count
+    nkeys = len(children)
+    if nkeys == 0:
+        file.seek(start)
+        file.truncate()
+        return None
+
+    keys_offset = offset
+    nchildren = 0
+    for index in range(nkeys):
+        record = keys[index*fields : (index+1)*fields]
+        record[3], record[4] = nchildren, len(children[index])
+        file.write(SNAPSHOT_KEY.pack(*record))
+        nchildren += len(children[index])
+    offset += nkeys * SNAPSHOT_KEY.size
+
+    children_offset = offset
+    for subkeys in children:
+        file.write(struct.pack(f"<{len(subkeys)}I", *subkeys))
+    offset += nchildren * SNAPSHOT_INDEX.size
+
+    values_offset = offset
+    file.write(values)
+    offset += len(values)
+
+    rootpath = intern(root.localpath)
+    encoded = [string.encode("utf-8", "surrogatepass") for string in strings]
+    strings_offset = offset
+    position = 0
+    for raw in encoded:
+        file.write(SNAPSHOT_STRING.pack(position, len(raw)))
+        position += len(raw)
+    offset += len(encoded) * SNAPSHOT_STRING.size
+    stringdata_offset = offset
+    for raw in encoded:
+        file.write(raw)
+
+    end = file.tell()
+    file.seek(start)
+    file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, root.hive, rootpath, 0, nkeys, nvalues, len(encoded),
+                                    keys_offset, children_offset, values_offset, strings_offset, stringdata_offset))
+    file.seek(end)
+    return nkeys
+
+
+
+###############################################################################
+## Reading Snapshots
+###############################################################################
+
+class SnapshotBackend(MountedBackend):
+    """
+    Read-only backend serving the keys and values of a snapshot file (see save_snapshot()).
+
+    The file is memory-mapped, and records are decoded only when they are read: opening a key costs one binary
+    search per path component in the sorted subkey index, so large snapshots open and answer lookups without
+    being read into memory. Use it anywhere the registry is read, with set_backend() or Session(backend=...):
+
+        snapshot = SnapshotBackend("hklm.snapshot")
+        key = Key("HKLM:SOFTWARE\\MyApp", populate=True, session=Session(backend=snapshot))
+
+    Writes raise PermissionError.
+    """
+
+    def __init__(self,
+            file:str
+        )-> None:
+        """
+        Open a snapshot file.
+
+        Parameters
+        ----------
+        file
+            Path of a file written by save_snapshot().
+        """
+
+        self._file = open(file, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self._file.close()
+            raise ValueError(f"Not a snapshot file: \"{file}\"") from None
+        self._view = memoryview(self._mmap)
+        if len(self._mmap) < SNAPSHOT_HEADER.size:
+            self.close()
+            raise ValueError(f"Not a snapshot file: \"{file}\"")
+        header = SNAPSHOT_HEADER.unpack_from(self._mmap, 0)
+        if header[0] != SNAPSHOT_MAGIC or header[1] != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(f"Not a snapshot file (or unsupported version): \"{file}\"")
+        (_, _, hive, rootpath, _, self.nkeys, self.nvalues, self.nstrings,
+            self._keys, self._children, self._values, self._strings, self._stringdata) = header
+        localpath = self._string(rootpath)
+        self.root = RegPath(hive, tuple(localpath.split(PATH_SEP)) if localpath != "" else ())
+
+
+    # Private methods
+    def _string(self, index:int)-> str:
+        offset, length = SNAPSHOT_STRING.unpack_from(self._mmap, self._strings + index*SNAPSHOT_STRING.size)
+        offset += self._stringdata
+        return str(self._view[offset:offset+length], "utf-8", "surrogatepass")
+
+    def _key(self, index:int)-> tuple:
+        return SNAPSHOT_KEY.unpack_from(self._mmap, self._keys + index*SNAPSHOT_KEY.size)
+
+    def _child(self, record:tuple, i:int)-> int:
+        return SNAPSHOT_INDEX.unpack_from(self._mmap, self._children + (record[3] + i)*SNAPSHOT_INDEX.size)[0]
+
+    def _value(self, record:tuple, i:int)-> tuple[str, Any, int]:
+        name, type, kind, offset, length = SNAPSHOT_VALUE.unpack_from(self._mmap, self._values + (record[5] + i)*SNAPSHOT_VALUE.size)
+        return (self._string(name), __decode_data__(kind, self._view[offset:offset+length]), type)
+
+
+    # MountedBackend interface (keys are identified by their index)
+    def _root_node(self)-> int:
+        return 0
+
+    def _key_info(self, node:int)-> tuple[int, int, int]:
+        record = self._key(node)
+        return (record[4], record[6], record[7])
+
+    def _key_subkey(self, node:int, index:int)-> str:
+        record = self._key(node)
+        if not 0 <= index < record[4]:
+            raise OSError("No more data is available.")
+        return self._string(self._key(self._child(record, index))[0])
+
+    def _key_find(self, node:int, folded:str)-> int|None:
+        # Binary search of the subkeys (sorted by casefolded name)
+        record = self._key(node)
+        low, high = 0, record[4]
+        while low < high:
+            middle = (low + high) // 2
+            child = self._child(record, middle)
+            name = self._string(self._key(child)[1])
+            if name == folded:
+                return child
+            if name < folded:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def _key_value(self, node:int, index:int)-> tuple[str, Any, int]:
+        record = self._key(node)
+        if not 0 <= index < record[6]:
+            raise OSError("No more data is available.")
+        return self._value(record, index)
+
+    def _key_query(self, node:int, folded:str)-> tuple[Any, int]|None:
+        record = self._key(node)
+        for i in range(record[6]):
+            offset = self._values + (record[5] + i)*SNAPSHOT_VALUE.size
+            if self._string(SNAPSHOT_VALUE.unpack_from(self._mmap, offset)[0]).casefold() == folded:
+                tup = self._value(record, i)
+                return (tup[1], tup[2])
+        return None
+
+
+    # Public methods
+    def iter_keys(self)-> Iterator[tuple[tuple[str,...], dict[str, tuple[Any,int]]]]:
+        """
+        Iterate over all keys in the snapshot, in sorted, case-insensitive depth-first order (see diff.iter_keys()).
+        Keys are stored in this order, so the file is read sequentially.
+        """
+
+        stack = []  # (index, name) of the keys from the root key to the current key
+        for index in range(self.nkeys):
+            record = self._key(index)
+            while stack and stack[-1][0] != record[2]:  # Return to the parent key
+                stack.pop()
+            stack.append((index, self._string(record[0])))
+            values = {}
+            for i in range(record[6]):
+                tup = self._value(record, i)
+                values[tup[0]] = (tup[1], tup[2])
+            yield tuple(name for _, name in stack[1:]), values
+
+
+
+    def close(self)-> None:
+        """
+        Close the snapshot file. Handles opened from this backend can no longer be used.
+        """
+
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
@@ -0,0 +1,379 @@
+from array import array
+from collections import OrderedDict
+from typing import Any, Iterator
+
+from .common import *
+from .key import Key, parse_regpath
+
+
+
+class TreeStore:
+    """
+    Compact, read-only copy of a key hierarchy, stored in flat arrays.
+
+    Keys are numbered in the order walk() visits them (the root key is 0), and stored as:
+     - parents / first_child / next_sibling: Index arrays linking each key to its relatives (-1 if none).
+     - names: Index of each key's name in name_table. Names are interned, so repeated names are stored once.
+     - value_start: Offset of each key's first value in the value arrays. The values of key i are
+       value_start[i] up to (but not including) value_start[i+1].
+     - value_names / value_types / value_data: Name (index in name_table), type and data of every value.
+
+    A populated hierarchy therefore costs a few array slots per key and value, instead of a Key object
+    with its own members and values dicts per key. Keys are read through KeyView objects, which are
+    created on demand, and can be materialized into regular Key objects with to_key().
+
+    Key itself is not backed by a TreeStore: Key objects are editable (their values and members can be
+    changed, and saved back to the registry), so Key.populate() still creates one Key per subkey, but
+    Keys and empty MemberDicts use __slots__ to keep them small. Use a TreeStore instead of Key.populate()
+    to read large hierarchies, and to_key() to edit part of one.
+
+    Lookups by name (KeyView.subkey(), find()) use an index of children by casefolded name, built on
+    first use. Locations (KeyView.location) are built on access, from the location of the parent key:
+    only the locations of the LOCATION_CACHE_SIZE most recently used parent keys are cached.
+    """
+
+    LOCATION_CACHE_SIZE = 256
+
+    def __init__(self,
+            root:RegPath
+        )-> None:
+        """
+        Create an empty TreeStore. Use TreeStore.from_registry() to populate one from the registry.
+
+        Parameters
+        ----------
+        root
+            Path of the root key (index 0).
+        """
+
+        self.root = root
+        self.parents = array("q")
+        self.first_child = array("q")
+        self.next_sibling = array("q")
+        self.names = array("q")
+        self.name_table = []
+        self.value_start = array("q", [0])
+        self.value_names = array("q")
+        self.value_types = array("q")
+        self.value_data = []
+        self._name_ids = {}     # {name: index in name_table}
+        self._last_child = {}   # {key index: index of its last child}, only while building
+        self._children = None   # {(parent index, casefolded name): child index}, built by child()
+        self._locations = OrderedDict()  # {key index: RegPath} of recently used parent keys (see location())
+
+
+    @staticmethod
+    def from_registry(
+            location:Any,
+            maxdepth:int = -1,
+            session:"Session|None" = None,
+            parallel:bool = False,
+            max_workers:int|None = None
+        )-> "TreeStore|None":
+        """
+        Read a key and its subkeys (up to the specified depth) from the registry into a new TreeStore.
+
+        Parameters
+        ----------
+        location
+            Absolute path (str) of the root key, or some other value parsable by parse_location.
+        maxdepth (Optional; Default=-1)
+            Search depth for subkeys, like list_subkeys().
+        session, parallel, max_workers (Optional)
+            Passed to walk().
+
+        Returns
+        -------
+        store | None
+            New TreeStore, or None if the root key could not be read.
+        """
+
+        root = parse_regpath(location)
+        if root is None:
+            return None
+        store = TreeStore(root)
+        indexes = {}    # {abspath: index} of keys which have been found, but not walked yet
+        for keypath, subkey_names, values in walk(root.abspath, maxdepth=maxdepth+1 if maxdepth >= 0 else -1, session=session, parallel=parallel, max_workers=max_workers):
+            if len(store.parents) == 0:
+                index = store.add(-1, root.name, values)
+            else:
+                parent, name = indexes.pop(keypath, (None, None))
+                if parent is None:
+                    continue
+                index = store.add(parent, name, values)
+            prefix = keypath if keypath.endswith(":") else keypath + PATH_SEP
+            for name in subkey_names:
+                indexes[prefix + name] = (index, name)
+        if len(store.parents) == 0:
+            return None
+        store._last_child.clear()
+        return store
+
+
+    # Private methods
+    def __len__(self)-> int:
+        return len(self.parents)
+
+    def _intern(self, name:str)-> int:
+        id = self._name_ids.get(name)
+        if id is None:
+            id = len(self.name_table)
+            self._name_ids[name] = id
+            self.name_table.append(name)
+        return id
+
+
+    # Public methods
+    def add(self,
+            parent:int,
+            name:str,
+            values:dict[str, tuple[Any,int]]
+        )-> int:
+        """
+        Append a key. Keys must be added after their parent, and the values of earlier keys can no longer change.
+
+        Parameters
+        ----------
+        parent
+            Index of the parent key, or -1 for the root key.
+        name
+            Name of the key.
+        values
+            Values dict containing {name: value} pairs: {"name": (data, type), ... }
+
+        Returns
+        -------
+        index
+            Index of the new key.
+        """
+
+        index = len(self.parents)
+        self.parents.append(parent)
+        self.first_child.append(-1)
+        self.next_sibling.append(-1)
+        self.names.append(self._intern(name))
+        if parent >= 0:
+            last = self._last_child.get(parent, -1)
+            if last < 0:
+                self.first_child[parent] = index
+            else:
+                self.next_sibling[last] = index
+            self._last_child[parent] = index
+            if self._children is not None:
+                self._children.setdefault((parent, name.casefold()), index)
+        for value_name, value in values.items():
+            self.value_names.append(self._intern(value_name))
+            self.value_types.append(value[1])
+            self.value_data.append(value[0])
+        self.value_start.append(len(self.value_data))
+        return index
+
+
+
+    def child(self,
+            parent:int,
+            name:str
+        )-> int:
+        """
+        Return the index of the direct subkey of parent with the given name (case-insensitive), or -1 if it is not stored.
+        """
+
+        if self._children is None:
+            children = {}
+            for index in range(len(self.parents) - 1, 0, -1):   # The first of duplicate names is kept
+                children[(self.parents[index], self.name_table[self.names[index]].casefold())] = index
+            self._children = children
+        return self._children.get((parent, name.casefold()), -1)
+
+
+
+    def location(self,
+            index:int = 0
+        )-> RegPath:
+        """
+        Return the location of the key at index. Same as KeyView.location.
+        """
+
+        if index == 0:
+            return self.root
+        parent = self.parents[index]
+        if parent == 0:
+            location = self.root
+        else:
+            location = self._locations.get(parent)
+            if location is None:    # Built from the grandparent, and cached: its other children need it too
+                location = self.location(parent)
+                self._locations[parent] = location
+                if len(self._locations) > self.LOCATION_CACHE_SIZE:
+                    self._locations.popitem(last=False)
+            else:
+                self._locations.move_to_end(parent)
+        return RegPath(location.hive, location.components + (self.name_table[self.names[index]],))
+
+
+
+    def view(self,
+            index:int = 0
+        )-> "KeyView":
+        """
+        Return a KeyView of the key at index (default: the root key).
+        """
+
+        return KeyView(self, index)
+
+
+
+    def find(self,
+            relpath:str
+        )-> "KeyView|None":
+        """
+        Return a KeyView of the key at a path relative to the root key (case-insensitive), or None if it is not stored.
+        """
+
+        path = self.root / relpath
+        if path is None:
+            return None
+        relpath = path.relative_to(self.root)
+        index = 0
+        for name in (relpath.split(PATH_SEP) if relpath != "" else []):
+            index = self.child(index, name)
+            if index < 0:
+                return None
+        return self.view(index)
+
+
+
+    def iter_keys(self)-> Iterator[tuple[tuple[str,...], dict[str, tuple[Any,int]]]]:
+        """
+        Iterate over all stored keys in sorted, case-insensitive depth-first order (see diff.iter_keys()).
+
+        Yields
+        ------
+        (components, values)
+            Names of the keys from the root key to the key (() for the root key), and the key's values.
+        """
+
+        stack = [((), self.view(0))]
+        while stack:
+            components, view = stack.pop()
+            yield components, view.values
+            children = sorted(view.subkeys(), key=lambda child: child.name.casefold(), reverse=True)
+            stack += [(components + (child.name,), child) for child in children]
+
+
+
+    def to_key(self,
+            index:int = 0
+        )-> Key:
+        """
+        Materialize the key at index as a Key object, with all keys below it as members (like Key.populate()).
+        """
+
+        root = self.view(index)
+        key = Key(root.location, values=root.values)
+        for view in root.descendants():
+            key.add_member(Key(view.location, values=view.values))
+        return key
+
+
+
+class KeyView:
+    """
+    Lightweight view of one key in a TreeStore.
+    """
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store:TreeStore, index:int)-> None:
+        self.store = store
+        self.index = index
+
+
+    # Properties (read-only)
+    @property
+    def name(self)-> str:
+        return self.store.name_table[self.store.names[self.index]]
+
+    @property
+    def parent(self)-> "KeyView|None":
+        parent = self.store.parents[self.index]
+        return KeyView(self.store, parent) if parent >= 0 else None
+
+    @property
+    def location(self)-> RegPath:
+        return self.store.location(self.index)
+
+    @property
+    def abspath(self)-> str:
+        return self.location.abspath
+
+    @property
+    def values(self)-> dict[str, tuple[Any,int]]:
+        store = self.store
+        values = {}
+        for i in range(store.value_start[self.index], store.value_start[self.index+1]):
+            values[store.name_table[store.value_names[i]]] = (store.value_data[i], store.value_types[i])
+        return values
+
+
+    # Private methods
+    def __eq__(self, other:Any)-> bool:
+        return isinstance(other, KeyView) and self.store is other.store and self.index == other.index
+
+    def __hash__(self)-> int:
+        return hash((id(self.store), self.index))
+
+    def __str__(self)-> str:
+        return self.abspath
+
+    def __repr__(self)-> str:
+        return f"KeyView(\"{self.abspath}\")"
+
+
+    # Public methods
+    def subkeys(self)-> Iterator["KeyView"]:
+        """
+        Iterate over the direct subkeys of this key.
+        """
+
+        child = self.store.first_child[self.index]
+        while child >= 0:
+            yield KeyView(self.store, child)
+            child = self.store.next_sibling[child]
+
+
+
+    def subkey(self,
+            name:str
+        )-> "KeyView|None":
+        """
+        Return the direct subkey with the given name (case-insensitive), or None if it is not stored.
+        """
+
+        index = self.store.child(self.index, name)
+        return KeyView(self.store, index) if index >= 0 else None
+
+
+
+    def descendants(self)-> Iterator["KeyView"]:
+        """
+        Iterate over all keys below this key, in the same order as list_subkeys().
+        """
+
+        stack = list(self.subkeys())
+        stack.reverse()
+        while stack:
+            view = stack.pop()
+            yield view
+            children = list(view.subkeys())
+            children.reverse()
+            stack += children
+
+
+
+    def to_key(self)-> Key:
+        """
+        Materialize this key as a Key object, with all keys below it as members (like Key.populate()).
+        """
+
+        return self.store.to_key(self.index)
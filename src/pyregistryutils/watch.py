@@ -0,0 +1,306 @@
+import threading
+from typing import Any, Callable
+
+from .common import *
+from .common import __get_backend__, __print_error__
+from .key import Key
+
+
+
+class Watch:
+    """
+    A key (or tree of keys) watched by a Watcher, returned by Watcher.watch().
+    """
+
+    __slots__ = ("path", "subtree", "callbacks", "keys", "changes", "_token", "_state")
+
+    def __init__(self, path:RegPath, subtree:bool)-> None:
+        self.path = path            # Location of the watched key
+        self.subtree = subtree      # True if changes to subkeys (at any depth) are reported
+        self.callbacks = []         # Functions called with this Watch when a change is detected
+        self.keys = []              # Key objects refreshed when a change is detected
+        self.changes = 0            # Number of changes detected
+        self._token = None          # Backend notification token, if the backend supports notify()
+        self._state = None          # Last write times seen by the last poll, if it does not
+
+    def __repr__(self)-> str:
+        return f"Watch(\"{self.path.abspath}\", subtree={self.subtree}, changes={self.changes})"
+
+
+
+###############################################################################
+## Internal Functions
+###############################################################################
+
+def __last_writes__(
+        backend:Any,
+        path:RegPath,
+        subtree:bool
+    )-> dict[str,int]|None:
+    """
+    Reads the last write times of a key, and of all keys below it if subtree is True.
+    Returns {casefolded path relative to the key: last write time}, or None if the key does not exist.
+    A key's last write time changes with its values and its direct subkeys, so any change shows up here.
+    """
+
+    try:
+        root = backend.open_key(path.hive, path.localpath, winreg.KEY_READ)
+    except OSError:
+        return None
+    state = {}
+    stack = [(root, "")]    # (handle, casefolded relative path) of keys which have been opened, but not read
+    try:
+        while stack:
+            handle, relpath = stack.pop()
+            try:
+                nsubkeys, _, last_write = backend.query_info_key(handle)[0:3]
+                state[relpath] = last_write
+                for name in ([backend.enum_key(handle, i) for i in range(nsubkeys)] if subtree else []):
+                    try:
+                        stack.append((backend.open_key(handle, name, winreg.KEY_READ), (relpath + PATH_SEP + name if relpath else name).casefold()))
+                    except OSError:
+                        continue    # Deleted while reading
+            except OSError:
+                pass                # Deleted while reading
+            finally:
+                backend.close_key(handle)
+    finally:
+        for handle, _ in stack:
+            backend.close_key(handle)
+    return state
+
+
+
+###############################################################################
+## Watcher
+###############################################################################
+
+class Watcher:
+    """
+    Detects changes to registry keys, and refreshes Key objects and calls callbacks only when something changed,
+    instead of re-reading the keys on a timer.
+
+    If the backend supports change notifications (backend.supports_notify: WinregBackend and MemoryBackend),
+    changes are reported by the backend as they happen, and callbacks are called by the thread which reported
+    the change (a background thread for WinregBackend; the thread which made the change for MemoryBackend).
+    Otherwise, the last write times of the watched keys are compared by poll(), called every interval seconds
+    by a background thread (or by the caller, if interval is None).
+
+        with Watcher() as watcher:
+            watcher.watch_key(settings)                                         # settings.load() on change
+            watcher.watch("HKCU:Software\\MyApp", lambda watch: print(watch))   # Any callable
+    """
+
+    DEFAULT_INTERVAL = 1.0
+
+    def __init__(self,
+            session:"Session|None" = None,
+            interval:float|None = DEFAULT_INTERVAL,
+            native:bool = True
+        )-> None:
+        """
+        Create a new Watcher.
+
+        Parameters
+        ----------
+        session (Optional; Default=None)
+            Session whose backend is watched, and which is used to refresh Key objects.
+        interval (Optional; Default=Watcher.DEFAULT_INTERVAL)
+            Seconds between polls, if the backend does not support change notifications.
+            If None, poll() must be called by the caller.
+        native (Optional; Default=True)
+            If False, always poll, even if the backend supports change notifications.
+        """
+
+        self.session = session
+        self.backend = __get_backend__(session)
+        self.interval = interval
+        self.native = native and self.backend is not None and self.backend.supports_notify
+        self._watches = []
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+
+    # Private methods
+    def _changed(self, watch:Watch)-> None:
+        # Handles a change to a watched key: refreshes its Key objects, then calls its callbacks
+        with self._lock:
+            if watch not in self._watches:
+                return  # Unwatched while the change was being reported
+            watch.changes += 1
+            keys, callbacks = list(watch.keys), list(watch.callbacks)
+        for key in keys:
+            self._refresh(key, watch.subtree)
+        for callback in callbacks:
+            try:
+                callback(watch)
+            except Exception as e:
+                __print_error__(e, f"Error in callback for watched key: \"{watch.path.abspath}\"")
+
+    def _refresh(self, key:Key, recurse:bool)-> None:
+        # Reloads the values of a key (and its members), except for values with unsaved changes.
+        # Keys which were never synced have no baseline to compare with (every value counts as changed): they are loaded.
+        changes = key.changes()
+        if key._baseline is None or len(changes) == 0:
+            key.load(recurse=False, session=self.session)
+        else:
+            values = load_values(key.abspath, {name: None for name in key.values if name not in changes}, session=self.session)
+            if values is not None:
+                key.values |= values
+                key._mark_clean(values)
+        if recurse:
+            for name in list(key.members):
+                self._refresh(key.members[name], recurse)
+
+    def _run(self)-> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def __enter__(self)-> "Watcher":
+        return self
+
+    def __exit__(self, *args)-> None:
+        self.close()
+
+
+    # Public methods
+    def watch(self,
+            abspath:str,
+            callback:Callable[[Watch],None]|None = None,
+            subtree:bool = True
+        )-> Watch|None:
+        """
+        Watch a key for changes.
+
+        Parameters
+        ----------
+        abspath
+            Absolute path of the key to watch.
+        callback (Optional; Default=None)
+            Function called with the Watch each time a change is detected. More can be added to Watch.callbacks.
+        subtree (Optional; Default=True)
+            If True, changes to subkeys (at any depth) are also detected. Otherwise, only changes to the key's
+            values and direct subkeys.
+
+        Returns
+        -------
+        watch | None
+            Watch object, to pass to unwatch(), or None if the key could not be watched
+            (with change notifications, the key must exist).
+        """
+
+        path = RegPath.parse(abspath)
+        if path is None or self.backend is None:
+            return None
+        watch = Watch(path, subtree)
+        if callback is not None:
+            watch.callbacks.append(callback)
+        with self._lock:
+            self._watches.append(watch)
+        if self.native:
+            try:
+                watch._token = self.backend.notify(path.hive, path.localpath, subtree, lambda: self._changed(watch))
+            except OSError as e:
+                with self._lock:
+                    self._watches.remove(watch)
+                __print_error__(e, f"Error watching key: \"{path.abspath}\"")
+                return None
+        else:
+            watch._state = __last_writes__(self.backend, path, subtree)
+            if self.interval is not None and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="pyregistryutils-watcher", daemon=True)
+                self._thread.start()
+        return watch
+
+
+
+    def watch_key(self,
+            key:Key,
+            subtree:bool = True,
+            callback:Callable[[Watch],None]|None = None
+        )-> Watch|None:
+        """
+        Watch the location of a Key object, and reload its values (see Key.load()) when it changes.
+
+        Values with unsaved changes (see Key.changes()) are not reloaded, so local changes are not lost.
+
+        Parameters
+        ----------
+        key
+            Key object to refresh.
+        subtree (Optional; Default=True)
+            If True, changes to subkeys are also detected, and the key's members are refreshed too.
+        callback (Optional; Default=None)
+            Function called with the Watch after the key has been refreshed.
+
+        Returns
+        -------
+        watch | None
+            Watch object, to pass to unwatch(), or None if the key could not be watched.
+        """
+
+        watch = self.watch(key.abspath, callback=None, subtree=subtree)
+        if watch is not None:
+            watch.keys.append(key)
+            if callback is not None:
+                watch.callbacks.append(callback)
+        return watch
+
+
+
+    def unwatch(self,
+            watch:Watch
+        )-> None:
+        """
+        Stop watching a key. Changes already being reported may still call its callbacks.
+        """
+
+        with self._lock:
+            if watch not in self._watches:
+                return
+            self._watches.remove(watch)
+        if watch._token is not None:
+            self.backend.cancel_notify(watch._token)
+            watch._token = None
+
+
+
+    def poll(self)-> list[Watch]:
+        """
+        Check the watched keys for changes by comparing their last write times, and handle the changes.
+        Only needed if the backend does not support change notifications and interval is None;
+        otherwise, this is done automatically.
+
+        Returns
+        -------
+        changed
+            Watches for which a change was detected.
+        """
+
+        with self._lock:
+            watches = [watch for watch in self._watches if watch._token is None]
+        changed = []
+        for watch in watches:
+            state = __last_writes__(self.backend, watch.path, watch.subtree)
+            if state != watch._state:
+                watch._state = state
+                changed.append(watch)
+                self._changed(watch)
+        return changed
+
+
+
+    def close(self)-> None:
+        """
+        Stop watching all keys, and stop polling.
+        """
+
+        with self._lock:
+            watches = list(self._watches)
+        for watch in watches:
+            self.unwatch(watch)
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
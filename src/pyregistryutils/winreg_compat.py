@@ -0,0 +1,51 @@
+# Stand-in for the "winreg" module on platforms where it is not available (Linux, macOS).
+#
+# Only the documented constants are provided, with the same names and values as winreg,
+# so that common.py can define its TYPE_* and hive constants everywhere.
+# Registry access itself is done through a Backend (see backend.py); on these platforms
+# that means MemoryBackend or one of the other non-winreg backends.
+
+# Predefined keys (hives)
+HKEY_CLASSES_ROOT = 0x80000000
+HKEY_CURRENT_USER = 0x80000001
+HKEY_LOCAL_MACHINE = 0x80000002
+HKEY_USERS = 0x80000003
+HKEY_PERFORMANCE_DATA = 0x80000004
+HKEY_CURRENT_CONFIG = 0x80000005
+HKEY_DYN_DATA = 0x80000006
+
+# Access rights
+KEY_QUERY_VALUE = 0x0001
+KEY_SET_VALUE = 0x0002
+KEY_CREATE_SUB_KEY = 0x0004
+KEY_ENUMERATE_SUB_KEYS = 0x0008
+KEY_NOTIFY = 0x0010
+KEY_CREATE_LINK = 0x0020
+KEY_WOW64_64KEY = 0x0100
+KEY_WOW64_32KEY = 0x0200
+KEY_READ = 0x20019
+KEY_EXECUTE = 0x20019
+KEY_WRITE = 0x20006
+KEY_ALL_ACCESS = 0xF003F
+
+# Value types
+REG_NONE = 0
+REG_SZ = 1
+REG_EXPAND_SZ = 2
+REG_BINARY = 3
+REG_DWORD = 4
+REG_DWORD_LITTLE_ENDIAN = 4
+REG_DWORD_BIG_ENDIAN = 5
+REG_LINK = 6
+REG_MULTI_SZ = 7
+REG_RESOURCE_LIST = 8
+REG_FULL_RESOURCE_DESCRIPTOR = 9
+REG_RESOURCE_REQUIREMENTS_LIST = 10
+REG_QWORD = 11
+REG_QWORD_LITTLE_ENDIAN = 11
+
+# Change notification filters
+REG_NOTIFY_CHANGE_NAME = 0x1
+REG_NOTIFY_CHANGE_ATTRIBUTES = 0x2
+REG_NOTIFY_CHANGE_LAST_SET = 0x4
+REG_NOTIFY_CHANGE_SECURITY = 0x8
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+import unittest
+
+#   Import modules
+from pyregistryutils import aio
+from pyregistryutils.backend import MemoryBackend, set_backend
+from pyregistryutils.common import *
+from pyregistryutils.key import Key
+
+
+
+class Test_aio(unittest.TestCase):
+
+    class SlowBackend(MemoryBackend):
+        # Each key takes a while to read; tracks how many reads run at the same time
+        def __init__(self):
+            super().__init__()
+            self.delay = 0
+            self.reads = 0
+            self.running = 0
+            self.max_running = 0
+            self.lock = threading.Lock()
+        def query_info_key(self, handle):
+            with self.lock:
+                self.reads += 1
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            time.sleep(self.delay)
+            with self.lock:
+                self.running -= 1
+            return super().query_info_key(handle)
+
+    def setUp(self):
+        self.backend = Test_aio.SlowBackend()
+        self.previous = set_backend(self.backend)
+        for i in range(10):
+            save_value(f"HKCU:Root\\Key{i}\\Sub", "n", (i, TYPE_DWORD))
+        self.previous_workers = aio.set_max_workers(aio.DEFAULT_MAX_WORKERS)
+
+    def tearDown(self):
+        aio.set_max_workers(self.previous_workers)
+        aio.shutdown()
+        set_backend(self.previous)
+
+    def test_functions(self):
+        async def run():
+            self.assertEqual(await aio.save_values("HKCU:Root\\New", {"a": ("x", TYPE_REG_SZ), "b": (2, TYPE_DWORD)}), "HKCU:Root\\New")
+            self.assertEqual(await aio.load_value("HKCU:Root\\New", "a"), ("x", TYPE_REG_SZ))
+            self.assertEqual(await aio.list_values("HKCU:Root\\Key3\\Sub"), {"n": (3, TYPE_DWORD)})
+            self.assertEqual(await aio.list_subkeys("HKCU:Root", maxdepth=0), list_subkeys("HKCU:Root", maxdepth=0))
+            self.assertEqual(await aio.delete_key("HKCU:Root\\New"), ["HKCU:Root\\New"])
+            self.assertEqual(aio.load_value.__doc__, load_value.__doc__)
+        asyncio.run(run())
+
+    def test_walk(self):
+        async def run():
+            actual = []
+            async for keypath, subkey_names, values in aio.walk("HKCU:Root"):
+                actual.append(keypath)
+                subkey_names[:] = [name for name in subkey_names if name != "Key5"]  # Pruned
+            return actual
+        correct = [keypath for keypath, _, _ in walk("HKCU:Root") if "Key5" not in keypath]
+        self.assertEqual(asyncio.run(run()), correct)
+
+    def test_cancel(self):
+        self.backend.delay = 0.02
+        async def run():
+            ticks = 0
+            async def scan():
+                async for _ in aio.walk("HKCU:Root"):
+                    pass
+            task = asyncio.create_task(scan())
+            while ticks < 5:    # The event loop keeps running during the scan
+                await asyncio.sleep(0.01)
+                ticks += 1
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return ticks
+        self.assertEqual(asyncio.run(run()), 5)
+        time.sleep(0.05)
+        self.assertLess(self.backend.reads, 21)     # Stopped before reading the whole tree
+        self.assertEqual(self.backend.running, 0)
+
+    def test_cancel_populate(self):
+        self.backend.delay = 0.02
+        previous, aio.ITERATE_BATCH_SIZE = aio.ITERATE_BATCH_SIZE, 2
+        key = Key("HKCU:Root")
+        async def run():
+            task = asyncio.create_task(aio.populate_key(key))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        try:
+            asyncio.run(run())
+        finally:
+            aio.ITERATE_BATCH_SIZE = previous
+        time.sleep(0.05)
+        self.assertLess(self.backend.reads, 21)     # Stopped between batches
+        self.assertEqual(self.backend.running, 0)
+        self.assertEqual(len(key.members), self.backend.reads - 1)
+
+    def test_batches(self):
+        calls = []
+        next_items = aio.__next_items__
+        aio.__next_items__ = lambda iterator, count: calls.append(count) or next_items(iterator, count)
+        try:
+            self.assertEqual(asyncio.run(aio.list_subkeys("HKCU:Root")), list_subkeys("HKCU:Root"))
+        finally:
+            aio.__next_items__ = next_items
+        self.assertEqual(calls, [aio.ITERATE_BATCH_SIZE])   # 20 subkeys: one thread pool call
+
+    def test_max_workers(self):
+        self.backend.delay = 0.01
+        aio.set_max_workers(2)
+        async def run():
+            return await asyncio.gather(*(aio.list_values(f"HKCU:Root\\Key{i}\\Sub") for i in range(10)))
+        self.assertEqual(asyncio.run(run()), [{"n": (i, TYPE_DWORD)} for i in range(10)])
+        self.assertEqual(self.backend.max_running, 2)
+
+    def test_keys(self):
+        async def run():
+            key = Key("HKCU:Root")
+            await aio.populate_key(key)
+            self.assertEqual(key.members["Key1\\Sub"].values, {"n": (1, TYPE_DWORD)})
+            key.members["Key1\\Sub"].values["n"] = (100, TYPE_DWORD)
+            self.assertEqual(await aio.save_key(key), ["HKCU:Root\\Key1\\Sub"])
+            save_value("HKCU:Root\\Key2\\Sub", "n", (200, TYPE_DWORD))
+            await aio.load_key(key)
+            self.assertEqual(key.members["Key2\\Sub"].values, {"n": (200, TYPE_DWORD)})
+        asyncio.run(run())
+        self.assertEqual(load_value("HKCU:Root\\Key1\\Sub", "n"), (100, TYPE_DWORD))
+
+
+
+if __name__ == '__main__':
+    unittest.main()
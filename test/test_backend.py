@@ -0,0 +1,137 @@
+import unittest
+
+#   Import modules
+from pyregistryutils.backend import *
+from pyregistryutils.common import *
+
+
+
+class Test_MemoryBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = MemoryBackend()
+
+    def test_case_insensitive(self):
+        b = self.backend
+        with b.create_key(HKCU, "Software\\MyApp", winreg.KEY_ALL_ACCESS) as h:
+            b.set_value(h, "Name", TYPE_REG_SZ, "value")
+        with b.open_key(HKCU, "SOFTWARE\\myapp", winreg.KEY_READ) as h:
+            self.assertEqual(b.query_value(h, "NAME"), ("value", TYPE_REG_SZ))
+            self.assertEqual(b.enum_value(h, 0), ("Name", "value", TYPE_REG_SZ))
+        with b.open_key(HKCU, "", winreg.KEY_READ) as h:
+            self.assertEqual(b.enum_key(h, 0), "Software")
+
+    def test_enum_order(self):
+        b = self.backend
+        for name in ["b", "C", "a"]:
+            b.create_key(HKCU, name, winreg.KEY_READ).Close()
+        with b.open_key(HKCU, "", winreg.KEY_READ) as h:
+            names = [b.enum_key(h, i) for i in range(b.query_info_key(h)[0])]
+            self.assertEqual(names, ["a", "b", "C"])
+            self.assertRaises(OSError, b.enum_key, h, 3)
+
+    def test_typed_values(self):
+        testcases = [
+        #   [ (type, data),                     (stored_data)   ],
+            [ (TYPE_REG_SZ, "text"),            ("text")        ],
+            [ (TYPE_REG_SZ, None),              ("")            ],
+            [ (TYPE_EXPAND_SZ, "%PATH%"),       ("%PATH%")      ],
+            [ (TYPE_MULTI_SZ, ["a", "b"]),      (["a", "b"])    ],
+            [ (TYPE_DWORD, 0xFFFFFFFF),         (0xFFFFFFFF)    ],
+            [ (TYPE_QWORD, 1 << 40),            (1 << 40)       ],
+            [ (TYPE_BINARY, bytearray(b"\x01")),(b"\x01")       ],
+            [ (TYPE_BINARY, b""),               (None)          ],
+            [ (TYPE_NONE, None),                (None)          ],
+        ]
+        b = self.backend
+        with b.create_key(HKCU, "Types", winreg.KEY_ALL_ACCESS) as h:
+            for testcase in testcases:
+                type, data = testcase[0]
+                correct = testcase[1]
+                with self.subTest(msg=f"TEST INPUT: args={testcase[0]}"):
+                    b.set_value(h, "v", type, data)
+                    self.assertEqual(b.query_value(h, "v"), (correct, type))
+
+    def test_invalid_values(self):
+        testcases = [
+        #   [ (type, data),                 (exception)     ],
+            [ (TYPE_DWORD, -1),             (OverflowError) ],
+            [ (TYPE_DWORD, 1 << 32),        (OverflowError) ],
+            [ (TYPE_DWORD, "1"),            (TypeError)     ],
+            [ (TYPE_REG_SZ, 1),             (TypeError)     ],
+            [ (TYPE_MULTI_SZ, ["a", 1]),    (TypeError)     ],
+            [ (TYPE_BINARY, "text"),        (TypeError)     ],
+        ]
+        b = self.backend
+        with b.create_key(HKCU, "Types", winreg.KEY_ALL_ACCESS) as h:
+            for testcase in testcases:
+                with self.subTest(msg=f"TEST INPUT: args={testcase[0]}"):
+                    self.assertRaises(testcase[1], b.set_value, h, "v", *testcase[0])
+
+    def test_last_write(self):
+        b = self.backend
+        with b.create_key(HKCU, "Key", winreg.KEY_ALL_ACCESS) as h:
+            t0 = b.query_info_key(h)[2]
+            b.set_value(h, "v", TYPE_DWORD, 1)
+            t1 = b.query_info_key(h)[2]
+            b.create_key(h, "Sub", winreg.KEY_READ).Close()
+            t2 = b.query_info_key(h)[2]
+        self.assertLess(t0, t1)
+        self.assertLess(t1, t2)
+
+    def test_access_rights(self):
+        b = self.backend
+        b.create_key(HKCU, "Key", winreg.KEY_READ).Close()
+        with b.open_key(HKCU, "Key", winreg.KEY_READ) as h:
+            self.assertRaises(PermissionError, b.set_value, h, "v", TYPE_DWORD, 1)
+        with b.open_key(HKCU, "Key", winreg.KEY_WRITE) as h:
+            self.assertRaises(PermissionError, b.query_value, h, "v")
+
+    def test_delete(self):
+        b = self.backend
+        b.create_key(HKCU, "Key\\Sub", winreg.KEY_READ).Close()
+        h = b.open_key(HKCU, "Key\\Sub", winreg.KEY_READ)
+        self.assertRaises(PermissionError, b.delete_key, HKCU, "Key")     # Key has subkeys
+        b.delete_key(HKCU, "Key\\Sub")
+        self.assertRaises(OSError, b.query_info_key, h)                    # Handle to a deleted key
+        b.delete_key(HKCU, "Key")
+        self.assertRaises(FileNotFoundError, b.open_key, HKCU, "Key", winreg.KEY_READ)
+        b.create_key(HKCU, "Tree\\a\\b", winreg.KEY_READ).Close()
+        b.delete_tree(HKCU, "Tree")
+        self.assertRaises(FileNotFoundError, b.open_key, HKCU, "Tree", winreg.KEY_READ)
+
+
+
+class Test_common_with_MemoryBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def test_roundtrip(self):
+        root = "HKCU:Software\\Test"
+        self.assertEqual(create_key(root+"\\a\\b"), root+"\\a\\b")
+        self.assertEqual(create_key(root+"\\c"), root+"\\c")
+        self.assertEqual(list_subkeys(root), [root+"\\a", root+"\\a\\b", root+"\\c"])
+        self.assertEqual(list_subkeys(root, maxdepth=0), [root+"\\a", root+"\\c"])
+        self.assertEqual(save_values(root, {"": ("default", TYPE_REG_SZ), "n": (1, TYPE_DWORD)}), root)
+        self.assertEqual(load_value(root, "N"), (1, TYPE_DWORD))
+        self.assertEqual(list_values(root), {"": ("default", TYPE_REG_SZ), "n": (1, TYPE_DWORD)})
+        self.assertEqual(delete_value(root, "n"), root)
+        self.assertIsNone(load_value(root, "n"))
+        self.assertEqual(delete_key(root), [root+"\\a\\b", root+"\\a", root+"\\c", root])
+        self.assertIsNone(list_values(root))
+
+    def test_no_backend(self):
+        set_backend(None)
+        self.assertEqual(list_subkeys("HKCU:Software"), [])
+        self.assertIsNone(load_value("HKCU:Software", ""))
+
+
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+
+#   Import modules
+from pyregistryutils.backend import MemoryBackend, set_backend
+from pyregistryutils.common import *
+from pyregistryutils.batch import *
+
+
+
+class Test_Batch(unittest.TestCase):
+
+    class CountingBackend(MemoryBackend):
+        # Counts the handles opened and the values written or deleted
+        def __init__(self):
+            super().__init__()
+            self.opens = 0
+            self.writes = 0
+
+        def open_key(self, key, sub_key, access):
+            self.opens += 1
+            return super().open_key(key, sub_key, access)
+
+        def create_key(self, key, sub_key, access):
+            self.opens += 1
+            return super().create_key(key, sub_key, access)
+
+        def set_value(self, handle, name, type, data):
+            self.writes += 1
+            super().set_value(handle, name, type, data)
+
+        def delete_value(self, handle, name):
+            self.writes += 1
+            super().delete_value(handle, name)
+
+    def setUp(self):
+        self.backend = self.CountingBackend()
+        self.previous = set_backend(self.backend)
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def test_coalesce(self):
+        with Batch() as batch:
+            for i in range(100):
+                batch.save_value("HKCU:Root\\a", f"v{i}", (i, TYPE_DWORD))
+                batch.save_value("HKCU:Root\\a", f"v{i}", (i+1, TYPE_DWORD))   # Repeated set
+            batch.save_value("HKCU:Root\\b", "x", ("x", TYPE_REG_SZ))
+            batch.delete_value("HKCU:Root\\B", "X")                          # Set, then delete
+            batch.create_key("HKCU:Root")                                   # Created by its subkeys
+        self.assertEqual((self.backend.opens, self.backend.writes), (2, 100))
+        self.assertEqual(load_value("HKCU:Root\\a", "v99"), (100, TYPE_DWORD))
+        self.assertEqual(list_subkeys("HKCU:Root"), ["HKCU:Root\\a"])    # Only a delete is left for Root\b
+        statuses = [op.status for op in batch.report]
+        self.assertEqual(statuses.count(BatchOperation.CANCELLED), 101)
+        self.assertEqual(statuses.count(BatchOperation.APPLIED), 102)
+
+    def test_delete_key(self):
+        save_value("HKCU:Root\\a\\aa", "old", (1, TYPE_DWORD))
+        batch = Batch()
+        cancelled = batch.save_value("HKCU:Root\\a\\aa", "v", (1, TYPE_DWORD))
+        deleted = batch.delete_key("HKCU:Root\\a")
+        recreated = batch.save_value("HKCU:Root\\a", "v", (2, TYPE_DWORD))
+        self.assertEqual(len(batch), 2)
+        batch.commit()
+        self.assertEqual(cancelled.status, BatchOperation.CANCELLED)
+        self.assertEqual((deleted.status, deleted.result), (BatchOperation.APPLIED, ["HKCU:Root\\a\\aa", "HKCU:Root\\a"]))
+        self.assertEqual((recreated.status, recreated.result), (BatchOperation.APPLIED, "HKCU:Root\\a"))
+        self.assertEqual(list_subkeys("HKCU:Root"), ["HKCU:Root\\a"])
+        self.assertEqual(list_values("HKCU:Root\\a"), {"v": (2, TYPE_DWORD)})
+
+    def test_order(self):
+        with Batch() as batch:
+            batch.save_value("HKCU:Root\\a\\b", "n", (1, TYPE_DWORD))
+            batch.save_value("HKCU:Root\\a", "n", (0, TYPE_DWORD))
+            batch.delete_value("HKCU:Missing", "n")     # Missing keys are not created
+        self.assertEqual(list_subkeys("HKCU:"), ["HKCU:Root", "HKCU:Root\\a", "HKCU:Root\\a\\b"])
+        self.assertEqual([op.result for op in batch.report], ["HKCU:Root\\a\\b", "HKCU:Root\\a", "HKCU:Missing"])
+
+    def test_failures(self):
+        with Batch() as batch:
+            invalid = batch.save_value("HK:Root", "n", (1, TYPE_DWORD))
+            batch.delete_key("HKCU:")
+            bad_value = batch.save_value("HKCU:Root", "n", ("not a number", TYPE_DWORD))
+            batch.save_value("HKCU:Root", "m", (1, TYPE_DWORD))
+        self.assertEqual([op.status for op in batch.report], [BatchOperation.FAILED]*3 + [BatchOperation.APPLIED])
+        self.assertIsInstance(invalid.error, ValueError)
+        self.assertIsNotNone(bad_value.error)
+        self.assertEqual(list_values("HKCU:Root"), {"m": (1, TYPE_DWORD)})
+
+    def test_exception(self):
+        with self.assertRaises(RuntimeError):
+            with Batch() as batch:
+                batch.create_key("HKCU:Root")
+                raise RuntimeError()
+        self.assertEqual(list_subkeys("HKCU:"), [])
+        self.assertEqual(batch.report[0].status, BatchOperation.PENDING)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 
 #   Import modules
 from pyregistryutils.common import *
+from pyregistryutils.backend import MemoryBackend, set_backend
 
 #   All test*.py functions under /test are scanned for TestCase classes.
 #   All classes inheriting from unittest.TestCase are scanned for "test_" functions.
@@ -220,6 +221,475 @@ class Test_get_relpath(unittest.TestCase):
 
 
 
+class Test_RegPath(unittest.TestCase):
+
+    def test_parse(self):
+        path = RegPath.parse("HKEY_CURRENT_USER\\Software\\.\\Classes\\")
+        self.assertEqual(path.hive, HKCU)
+        self.assertEqual(path.components, ("Software", "Classes"))
+        self.assertEqual(path.localpath, "Software\\Classes")
+        self.assertEqual(path.abspath, "HKCU:Software\\Classes")
+        self.assertEqual(path.longpath, "HKEY_CURRENT_USER\\Software\\Classes")
+        self.assertEqual(path.astuple(), split_abspath("HKCU:Software\\Classes"))
+        self.assertEqual(RegPath.parse("HKCU:").longpath, "HKEY_CURRENT_USER")
+        self.assertIsNone(RegPath.parse("HKCU:Path with spaces"))
+
+    def test_identity(self):
+        a = RegPath.parse("HKCU:Software\\Classes")
+        b = RegPath.parse("HKEY_CURRENT_USER\\SOFTWARE\\classes")
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertNotEqual(a, RegPath.parse("HKLM:Software\\Classes"))
+        self.assertRaises(AttributeError, setattr, a, "hive", HKLM)
+
+    def test_parent(self):
+        path = RegPath.parse("HKCU:Software\\Classes")
+        self.assertEqual(path.parent.abspath, "HKCU:Software")
+        self.assertEqual(path.parent.parent.abspath, "HKCU:")
+        self.assertIsNone(path.parent.parent.parent)
+        self.assertIs((path / "Sub").parent, path)
+
+    def test_join(self):
+        root = RegPath.parse("HKCU:Software")
+        testcases = [
+        #   [ (relpath),            (correct_output)                ],
+            [ ("Classes"),          ("HKCU:Software\\Classes")      ],
+            [ ("a\\b"),             ("HKCU:Software\\a\\b")         ],
+            [ ("a/b\\"),            ("HKCU:Software\\a\\b")         ],
+            [ ("..\\Other"),        ("HKCU:Other")                  ],
+            [ (""),                 ("HKCU:Software")               ],
+            [ ("a b"),              (None)                          ],
+            [ ("..\\.."),           (None)                          ],
+        ]
+        for testcase in testcases:
+            with self.subTest(msg=f"TEST INPUT: relpath={testcase[0]}"):
+                actual = root / testcase[0]
+                self.assertEqual(actual.abspath if actual is not None else None, testcase[1])
+
+    def test_relative_to(self):
+        testcases = [
+        #   [ (path, root),                                 (correct_output)    ],
+            [ ("HKCU:Software\\Classes\\.txt", "HKCU:software"),  ("Classes\\.txt") ],
+            [ ("HKCU:Software", "HKCU:"),                   ("Software")        ],
+            [ ("HKCU:Software", "HKCU:SOFTWARE"),           ("")                ],
+            [ ("HKCU:Software", "HKCU:Software\\Classes"),  (None)              ],
+            [ ("HKCU:SoftwareX", "HKCU:Software"),          (None)              ],
+            [ ("HKLM:Software", "HKCU:Software"),           (None)              ],
+        ]
+        for testcase in testcases:
+            path, root = testcase[0]
+            with self.subTest(msg=f"TEST INPUT: args={testcase[0]}"):
+                self.assertEqual(RegPath.parse(path).relative_to(RegPath.parse(root)), testcase[1])
+
+
+
+class Test_path_cache(unittest.TestCase):
+
+    def setUp(self):
+        enable_path_cache(maxsize=2)
+
+    def tearDown(self):
+        disable_path_cache()
+
+    def test_stats(self):
+        for i in range(3):
+            self.assertEqual(split_abspath("HKCU:Software\\Classes"), (HKCU, "Software\\Classes", "HKCU:Software\\Classes"))
+        self.assertEqual(split_abspath("HKCU:Software\\Classes", HIVE_LONGNAME), (HKCU, "Software\\Classes", "HKEY_CURRENT_USER\\Software\\Classes"))
+        info = path_cache_info()["split_abspath"]
+        self.assertEqual((info["hits"], info["misses"], info["currsize"]), (2, 2, 2))
+        split_abspath("HKLM:")     # Evicts the least recently used entry
+        self.assertEqual(path_cache_info()["split_abspath"]["currsize"], 2)
+        clear_path_cache()
+        self.assertEqual(path_cache_info()["split_abspath"]["currsize"], 0)
+
+    def test_disabled(self):
+        disable_path_cache()
+        self.assertEqual(path_cache_info(), {})
+        self.assertEqual(join_abspath(HKCU, "Software"), "HKCU:Software")
+
+    def test_cached_results(self):
+        # Same results with the cache enabled, on the first (miss) and second (hit) call
+        for i in range(2):
+            for testclass in [Test_join_abspath, Test_split_abspath, Test_get_relpath]:
+                testclass("test_equals").test_equals()
+                testclass("test_none").test_none()
+
+
+
+class Test_iter_subkeys(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+        for path in ["a\\aa\\aaa", "a\\ab", "B\\ba", "c"]:
+            create_key("HKCU:Root\\"+path)
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def test_equals(self):
+        testcases = [
+        #   [ (input_args),             (correct_output)      ],
+            [ ("HKCU:Root", -1),        ["a", "a\\aa", "a\\aa\\aaa", "a\\ab", "B", "B\\ba", "c"] ],
+            [ ("HKCU:Root", 0),         ["a", "B", "c"] ],
+            [ ("HKCU:Root", 1),         ["a", "a\\aa", "a\\ab", "B", "B\\ba", "c"] ],
+            [ ("HKCU:Root\\c", -1),     [] ],
+            [ ("HKCU:Missing", -1),     [] ],
+            [ ("HK:Root", -1),          [] ],
+        ]
+        for testcase in testcases:
+            args = testcase[0] if isinstance(testcase[0], tuple) else (testcase[0],) # handle single-element tuples
+            correct = ["HKCU:Root\\"+path for path in testcase[1]]
+            with self.subTest(msg=f"TEST INPUT: args={args}"):
+                self.assertEqual(list(iter_subkeys(*args)), correct)
+                self.assertEqual(list_subkeys(*args), correct)
+
+    def test_hive_root(self):
+        self.assertEqual(list_subkeys("HKEY_CURRENT_USER", maxdepth=0), ["HKCU:Root"])
+
+    def test_streaming(self):
+        backend = get_backend()
+        opened = []
+        open_key = backend.open_key
+        backend.open_key = lambda *args: opened.append(open_key(*args)) or opened[-1]
+        iterator = iter_subkeys("HKCU:Root")
+        self.assertEqual(next(iterator), "HKCU:Root\\a")
+        self.assertEqual(next(iterator), "HKCU:Root\\a\\aa")   # Yielded before the rest of the tree is visited
+        self.assertEqual(len(opened), 2)                        # Only the handles along the current path are open
+        iterator.close()
+        self.assertTrue(all(handle.closed for handle in opened))
+
+
+
+class Test_walk(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+        for path in ["a\\aa", "a\\ab", "b"]:
+            create_key("HKCU:Root\\"+path)
+        save_value("HKCU:Root\\a", "n", (1, TYPE_DWORD))
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def test_topdown(self):
+        correct = [
+            ("HKCU:Root",           ["a", "b"],     {}                      ),
+            ("HKCU:Root\\a",        ["aa", "ab"],   {"n": (1, TYPE_DWORD)}  ),
+            ("HKCU:Root\\a\\aa",    [],             {}                      ),
+            ("HKCU:Root\\a\\ab",    [],             {}                      ),
+            ("HKCU:Root\\b",        [],             {}                      ),
+        ]
+        self.assertEqual(list(walk("HKCU:Root")), correct)
+
+    def test_bottomup(self):
+        actual = [tup[0] for tup in walk("HKCU:Root", topdown=False)]
+        self.assertEqual(actual, ["HKCU:Root\\a\\aa", "HKCU:Root\\a\\ab", "HKCU:Root\\a", "HKCU:Root\\b", "HKCU:Root"])
+
+    def test_maxdepth(self):
+        testcases = [
+        #   [ (maxdepth),   (correct_output)        ],
+            [ (0),          ["HKCU:Root"]           ],
+            [ (1),          ["HKCU:Root", "HKCU:Root\\a", "HKCU:Root\\b"] ],
+        ]
+        for testcase in testcases:
+            with self.subTest(msg=f"TEST INPUT: maxdepth={testcase[0]}"):
+                self.assertEqual([tup[0] for tup in walk("HKCU:Root", maxdepth=testcase[0])], testcase[1])
+                self.assertEqual([tup[0] for tup in walk("HKCU:Root", topdown=False, maxdepth=testcase[0])][-1], "HKCU:Root")
+
+    def test_prune(self):
+        actual = []
+        for keypath, subkey_names, values in walk("HKCU:Root"):
+            actual.append(keypath)
+            if "a" in subkey_names:
+                subkey_names.remove("a")
+        self.assertEqual(actual, ["HKCU:Root", "HKCU:Root\\b"])
+
+    def test_onerror(self):
+        errors = []
+        self.assertEqual(list(walk("HKCU:Missing", onerror=errors.append)), [])
+        self.assertEqual(len(errors), 1)
+
+
+
+class Test_parallel(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+        for i in range(4):
+            for j in range(3):
+                for k in range(2):
+                    create_key(f"HKCU:Root\\k{i}\\k{i}{j}\\k{i}{j}{k}")
+                save_value(f"HKCU:Root\\k{i}\\k{i}{j}", "n", (j, TYPE_DWORD))
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def test_list_subkeys(self):
+        for maxdepth in [-1, 0, 1, 2]:
+            with self.subTest(msg=f"TEST INPUT: maxdepth={maxdepth}"):
+                correct = list_subkeys("HKCU:Root", maxdepth)
+                self.assertEqual(list_subkeys("HKCU:Root", maxdepth, parallel=True, max_workers=4), correct)
+
+    def test_walk(self):
+        for topdown in [True, False]:
+            for maxdepth in [-1, 0, 1]:
+                with self.subTest(msg=f"TEST INPUT: topdown={topdown}, maxdepth={maxdepth}"):
+                    correct = list(walk("HKCU:Root", topdown=topdown, maxdepth=maxdepth))
+                    actual = list(walk("HKCU:Root", topdown=topdown, maxdepth=maxdepth, parallel=True, max_workers=4))
+                    self.assertEqual(actual, correct)
+
+    def test_prune(self):
+        actual = []
+        for keypath, subkey_names, values in walk("HKCU:Root", parallel=True):
+            actual.append(keypath)
+            subkey_names[:] = [name for name in subkey_names if not name.startswith("k1")]
+        self.assertNotIn("HKCU:Root\\k1", actual)
+        self.assertIn("HKCU:Root\\k2\\k21\\k210", actual)
+
+    def test_errors(self):
+        errors = []
+        self.assertEqual(list(walk("HKCU:Missing", parallel=True, onerror=errors.append)), [])
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(list_subkeys("HKCU:Missing", parallel=True), [])
+
+    class LockedBackend(MemoryBackend):
+        # Refuses to open keys named "secret", and counts opened keys
+        opened = 0
+        def open_key(self, key, sub_key, access):
+            if sub_key.casefold().endswith("secret"):
+                raise PermissionError("Access is denied.")
+            self.opened += 1
+            return super().open_key(key, sub_key, access)
+
+    def test_unopenable(self):
+        set_backend(self.LockedBackend())
+        create_key("HKCU:Root\\a\\secret\\x")
+        create_key("HKCU:Root\\a\\b")
+        for maxdepth in [-1, 0, 1]:
+            with self.subTest(msg=f"TEST INPUT: maxdepth={maxdepth}"):
+                correct = list_subkeys("HKCU:Root\\a", maxdepth)
+                self.assertIn("HKCU:Root\\a\\secret", correct)
+                self.assertEqual(list_subkeys("HKCU:Root\\a", maxdepth, parallel=True), correct)
+        for parallel in [False, True]:
+            with self.subTest(msg=f"TEST INPUT: parallel={parallel}"):
+                errors = []
+                self.assertEqual([tup[0] for tup in walk("HKCU:Root", onerror=errors.append, parallel=parallel)],
+                                 ["HKCU:Root", "HKCU:Root\\a", "HKCU:Root\\a\\b"])
+                self.assertEqual([(type(e), e.filename) for e in errors], [(PermissionError, "HKCU:Root\\a\\secret")])
+
+    def test_readahead(self):
+        backend = self.LockedBackend()
+        set_backend(backend)
+        for i in range(200):
+            create_key(f"HKCU:Wide\\k{i:03}\\sub")
+        backend.opened = 0
+        walker = walk("HKCU:Wide", parallel=True, max_workers=2)
+        keypath, subkey_names, values = next(walker)
+        subkey_names[:] = subkey_names[:3]  # Prune all but 3 subtrees
+        self.assertEqual([tup[0] for tup in walker], [f"HKCU:Wide\\k{i:03}" + sub for i in range(3) for sub in ["", "\\sub"]])
+        self.assertLessEqual(backend.opened, 1 + 2 * PARALLEL_READAHEAD + 6)
+
+    def test_session(self):
+        from pyregistryutils.session import Session
+        with Session() as session:
+            for parallel in [False, True]:
+                self.assertEqual(list_subkeys("HKCU:Root", parallel=parallel, session=session), list_subkeys("HKCU:Root"))
+            self.assertEqual((session.misses, session.hits), (1, 1))
+
+
+
+class Test_delete_key(unittest.TestCase):
+
+    class FailingBackend(MemoryBackend):
+        # Refuses to delete keys named "locked"
+        def delete_key(self, key, sub_key):
+            if sub_key.casefold().endswith("locked"):
+                raise PermissionError("Access is denied.")
+            super().delete_key(key, sub_key)
+
+    def setUp(self):
+        self.previous = set_backend(self.FailingBackend())
+        for path in ["a\\aa", "a\\locked\\x", "b", "c\\cc\\ccc"]:
+            create_key("HKCU:Root\\" + path)
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def test_order(self):
+        correct = [keypath for keypath, _, _ in walk("HKCU:Root\\c", topdown=False)]
+        self.assertEqual(delete_key("HKCU:Root\\c"), correct)
+        self.assertEqual(correct, ["HKCU:Root\\c\\cc\\ccc", "HKCU:Root\\c\\cc", "HKCU:Root\\c"])
+        self.assertEqual(list_subkeys("HKCU:Root", maxdepth=0), ["HKCU:Root\\a", "HKCU:Root\\b"])
+
+    def test_partial_failure(self):
+        progress = []
+        deleted = delete_key("HKCU:Root", progress=lambda path, error: progress.append((path, type(error))))
+        self.assertEqual(progress, [
+            ("HKCU:Root\\a\\aa",          type(None)),
+            ("HKCU:Root\\a\\locked\\x",   type(None)),
+            ("HKCU:Root\\a\\locked",      PermissionError),
+            ("HKCU:Root\\a",              PermissionError),   # Still has a subkey
+            ("HKCU:Root\\b",              type(None)),
+            ("HKCU:Root\\c\\cc\\ccc",     type(None)),
+            ("HKCU:Root\\c\\cc",          type(None)),
+            ("HKCU:Root\\c",              type(None)),
+            ("HKCU:Root",                 PermissionError),
+        ])
+        self.assertEqual(deleted, [path for path, error in progress if error is type(None)])
+        self.assertEqual(list_subkeys("HKCU:Root"), ["HKCU:Root\\a", "HKCU:Root\\a\\locked"])
+
+    def test_delete_tree(self):
+        self.assertEqual(list(iter_delete_key("HKCU:Root", delete_tree=True)), [("HKCU:Root", None)])
+        self.assertEqual(list_subkeys("HKCU:", maxdepth=0), [])
+
+    def test_invalid(self):
+        self.assertEqual(delete_key("HKCU:"), [])
+        self.assertEqual(delete_key("HK:Root"), [])
+        self.assertEqual([type(error) for path, error in iter_delete_key("HKCU:Missing")], [FileNotFoundError])
+
+
+
+class CountingBackend(MemoryBackend):
+    # Counts enumerations and queries, to tell cache hits from reads
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+    def enum_key(self, handle, index):
+        self.reads += 1
+        return super().enum_key(handle, index)
+    def enum_value(self, handle, index):
+        self.reads += 1
+        return super().enum_value(handle, index)
+    def query_value(self, handle, name):
+        self.reads += 1
+        return super().query_value(handle, name)
+
+
+
+class Test_read_cache(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = CountingBackend()
+        self.previous = set_backend(self.backend)
+        save_values("HKCU:Root", {"a": (1, TYPE_DWORD), "b": ("text", TYPE_REG_SZ)})
+        save_values("HKCU:Root\\Sub\\Deep", {"c": (2, TYPE_DWORD)})
+        enable_read_cache(maxsize=8)
+
+    def tearDown(self):
+        disable_read_cache()
+        set_backend(self.previous)
+
+    def test_hits(self):
+        testcases = [
+        #   [ (function),                                                       (correct_output)                                ],
+            [ (lambda: list_values("HKCU:Root")),                               ({"a": (1, TYPE_DWORD), "b": ("text", TYPE_REG_SZ)}) ],
+            [ (lambda: load_value("HKEY_CURRENT_USER\\root", "A")),             ((1, TYPE_DWORD))                              ],
+            [ (lambda: load_value("HKCU:Root", "missing")),                     (None)                                          ],
+            [ (lambda: load_values("HKCU:Root", {"B": None, "x": None})),       ({"B": ("text", TYPE_REG_SZ), "x": None})       ],
+            [ (lambda: list_subkeys("HKCU:Root")),                              (["HKCU:Root\\Sub", "HKCU:Root\\Sub\\Deep"])  ],
+        ]
+        for testcase in testcases:
+            with self.subTest(msg=f"TEST INPUT: function={testcase[1]}"):
+                clear_read_cache()
+                self.assertEqual(testcase[0](), testcase[1])
+                reads = self.backend.reads
+                self.assertEqual(testcase[0](), testcase[1])
+                self.assertEqual(self.backend.reads, reads)     # Validated by QueryInfoKey only
+                info = read_cache_info()
+                self.assertGreaterEqual(info["hits"], 1)
+
+    def test_shared_entry(self):
+        list_values("HKCU:Root")
+        reads = self.backend.reads
+        self.assertEqual(load_values("HKCU:Root", {"a": None, "missing": None}), {"a": (1, TYPE_DWORD), "missing": None})
+        self.assertEqual(load_value("HKCU:Root", "b"), ("text", TYPE_REG_SZ))
+        self.assertEqual(self.backend.reads, reads)
+
+    def test_mutable_data(self):
+        save_value("HKCU:Root", "m", (["x", "y"], TYPE_MULTI_SZ))
+        testcases = [
+        #   [ (function),                                                       (function name)     ],
+            [ (lambda: list_values("HKCU:Root")["m"]),                          ("list_values")     ],
+            [ (lambda: load_value("HKCU:Root", "m")),                           ("load_value")      ],
+            [ (lambda: load_values("HKCU:Root", {"m": None})["m"]),             ("load_values")     ],
+            [ (lambda: load_values("HKCU:Root", {"m": None, "a": None, "b": None})["m"]), ("load_values (enumerate)") ],
+        ]
+        for testcase in testcases:
+            with self.subTest(msg=f"TEST INPUT: function={testcase[1]}"):
+                clear_read_cache()
+                testcase[0]()[0].append("stored")   # Stored in the cache
+                testcase[0]()[0].append("returned") # Returned from the cache
+                self.assertEqual(testcase[0](), (["x", "y"], TYPE_MULTI_SZ))
+                self.assertGreaterEqual(read_cache_info()["hits"], 2)
+
+    def test_invalidation(self):
+        list_values("HKCU:Root")
+        list_subkeys("HKCU:Root")
+        save_value("HKCU:Root", "a", (5, TYPE_DWORD))
+        self.assertEqual(load_value("HKCU:Root", "a"), (5, TYPE_DWORD))
+        create_key("HKCU:Root\\Sub\\New\\Deeper")
+        self.assertEqual(list_subkeys("HKCU:Root"), ["HKCU:Root\\Sub", "HKCU:Root\\Sub\\Deep", "HKCU:Root\\Sub\\New", "HKCU:Root\\Sub\\New\\Deeper"])
+        delete_key("HKCU:Root\\Sub\\New")
+        self.assertEqual(list_subkeys("HKCU:Root"), ["HKCU:Root\\Sub", "HKCU:Root\\Sub\\Deep"])
+        delete_all_values("HKCU:Root")
+        self.assertEqual(list_values("HKCU:Root"), {})
+
+    def test_external_write(self):
+        self.assertEqual(load_value("HKCU:Root", "a"), (1, TYPE_DWORD))
+        with self.backend.open_key(HKCU, "Root", winreg.KEY_WRITE) as handle:     # Not through this package: changes the last write time
+            self.backend.set_value(handle, "a", TYPE_DWORD, 7)
+        self.assertEqual(load_value("HKCU:Root", "a"), (7, TYPE_DWORD))
+        self.assertEqual(read_cache_info()["hits"], 0)
+
+    def test_lru(self):
+        enable_read_cache(maxsize=2)
+        for path in ["HKCU:Root", "HKCU:Root\\Sub", "HKCU:Root\\Sub\\Deep"]:
+            list_values(path)
+        self.assertEqual(read_cache_info()["currsize"], 2)
+        list_values("HKCU:Root")   # Evicted
+        self.assertEqual(read_cache_info()["hits"], 0)
+
+    def test_disabled(self):
+        disable_read_cache()
+        list_values("HKCU:Root")
+        list_values("HKCU:Root")
+        self.assertEqual(read_cache_info(), {"hits": 0, "misses": 0, "maxsize": None, "currsize": 0})
+
+
+
+class Test_load_values(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+        save_values("HKCU:Root", {f"v{i}": (i, TYPE_DWORD) for i in range(10)} | {"blob": (b"\x00"*1024, TYPE_BINARY)})
+        reset_load_values_info()
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def test_strategy(self):
+        testcases = [
+        #   [ (requested names),                    (correct_strategy)  ],
+            [ (["v1"]),                             ("query")           ],
+            [ (["V1", "missing"]),                  ("query")           ],
+            [ ([f"v{i}" for i in range(8)]),        ("enumerate")       ],
+            [ ([f"V{i}" for i in range(10)] + ["blob", "missing"]), ("enumerate") ],
+        ]
+        for testcase in testcases:
+            with self.subTest(msg=f"TEST INPUT: names={testcase[0]}"):
+                reset_load_values_info()
+                actual = load_values("HKCU:Root", {name: None for name in testcase[0]})
+                correct = {name: load_value("HKCU:Root", name) for name in testcase[0]}
+                self.assertEqual(actual, correct)
+                info = load_values_info()
+                self.assertEqual(info[testcase[1]], 1)
+                self.assertEqual(sum(info.values()), 1)
+
+    def test_missing_key(self):
+        self.assertIsNone(load_values("HKCU:Missing", {"v1": None}))
+        self.assertEqual(load_values_info(), {"query": 0, "enumerate": 0})
+
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+#   Import modules
+from pyregistryutils.backend import MemoryBackend, set_backend
+from pyregistryutils.common import *
+from pyregistryutils.key import Key
+from pyregistryutils.session import Session
+from pyregistryutils.treestore import TreeStore
+from pyregistryutils.diff import *
+
+
+
+class Test_diff(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+        save_values("HKCU:A", {"same": (1, TYPE_DWORD), "changed": ("old", TYPE_REG_SZ), "removed": (0, TYPE_DWORD)})
+        save_value("HKCU:A\\Same\\Child", "n", (1, TYPE_DWORD))
+        save_value("HKCU:A\\Gone", "n", (1, TYPE_DWORD))
+        create_key("HKCU:A\\Gone\\Sub")
+        save_values("HKCU:B", {"SAME": (1, TYPE_DWORD), "changed": ("new", TYPE_REG_SZ), "added": (b"\x01", TYPE_BINARY)})
+        save_value("HKCU:B\\same\\child", "n", (1, TYPE_DWORD))
+        create_key("HKCU:B\\New")
+        save_value("HKCU:B\\Same\\Z_", "n", (2, TYPE_DWORD))
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def correct(self):
+        return [
+            Difference(Difference.ADDED,   "", "added",   None, (b"\x01", TYPE_BINARY)),
+            Difference(Difference.CHANGED, "", "changed", ("old", TYPE_REG_SZ), ("new", TYPE_REG_SZ)),
+            Difference(Difference.REMOVED, "", "removed", (0, TYPE_DWORD), None),
+            Difference(Difference.REMOVED, "Gone", None, {"n": (1, TYPE_DWORD)}, None),
+            Difference(Difference.REMOVED, "Gone\\Sub", None, {}, None),
+            Difference(Difference.ADDED,   "New", None, None, {}),
+            Difference(Difference.ADDED,   "same\\Z_", None, None, {"n": (2, TYPE_DWORD)}),
+        ]
+
+    def test_sources(self):
+        testcases = [
+        #   [ (a, b)    ],
+            [ ("HKCU:A", "HKEY_CURRENT_USER\\B")                                ],
+            [ (Key("HKCU:A", populate=True), Key("HKCU:B", populate=True))      ],
+            [ (TreeStore.from_registry("HKCU:A"), TreeStore.from_registry("HKCU:B")) ],
+            [ (TreeStore.from_registry("HKCU:A"), "HKCU:B")                     ],
+        ]
+        for testcase in testcases:
+            with self.subTest(msg=f"TEST INPUT: a={testcase[0][0]!r}, b={testcase[0][1]!r}"):
+                self.assertEqual(list(diff(*testcase[0])), self.correct())
+
+    def test_equal(self):
+        self.assertEqual(list(diff("HKCU:A", Key("HKCU:A", populate=True))), [])
+
+    def test_other_session(self):
+        other = MemoryBackend()
+        with other.create_key(HKCU, "A", winreg.KEY_ALL_ACCESS) as handle:
+            other.set_value(handle, "same", TYPE_DWORD, 1)
+        with Session(backend=other) as session:
+            actual = [(d.change, d.relpath, d.name) for d in diff("HKCU:A", "HKCU:A", other_session=session)]
+        self.assertEqual(actual, [
+            (Difference.REMOVED, "", "changed"),
+            (Difference.REMOVED, "", "removed"),
+            (Difference.REMOVED, "Gone", None),
+            (Difference.REMOVED, "Gone\\Sub", None),
+            (Difference.REMOVED, "Same", None),
+            (Difference.REMOVED, "Same\\Child", None),
+        ])
+
+    def test_missing(self):
+        self.assertEqual([d.change for d in diff("HKCU:Missing", "HKCU:A\\Gone")], [Difference.ADDED]*2)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+#   Import modules
+from pyregistryutils.backend import MemoryBackend, get_backend, set_backend
+from pyregistryutils.common import *
+from pyregistryutils.key import Key
+from pyregistryutils.session import Session
+from pyregistryutils.instrument import *
+
+
+
+class Test_stats(unittest.TestCase):
+
+    def setUp(self):
+        self.memory = MemoryBackend()
+        self.previous = set_backend(self.memory)
+        self.calls = []
+        enable_stats(hook=lambda *args: self.calls.append(args))
+        reset_stats()
+
+    def tearDown(self):
+        disable_stats()
+        set_backend(self.previous)
+
+    def counts(self, view):
+        return {name: {operation: stat["count"] for operation, stat in operations.items()} for name, operations in view.items()}
+
+    def test_functions(self):
+        testcases = [
+        #   [ (function),                                                           (function name),    (correct_counts)    ],
+            [ (lambda: save_values("HKCU:App", {"a": (1, TYPE_DWORD), "b": (2, TYPE_DWORD)})), ("save_values"), ({"open": 1, "set": 2, "close": 1}) ],
+            [ (lambda: load_value("HKCU:App", "a")),                                ("load_value"),     ({"open": 1, "query": 1, "close": 1}) ],
+            [ (lambda: list_values("HKCU:App")),                                    ("list_values"),    ({"open": 1, "query": 1, "enum": 2, "close": 1}) ],
+            [ (lambda: Key("HKCU:App").populate()),                                 ("Key.populate"),   ({"open": 1, "query": 1, "enum": 2, "close": 1}) ],
+            [ (lambda: delete_key("HKCU:App")),                                     ("delete_key"),     ({"open": 1, "query": 1, "delete": 1, "close": 1}) ],
+        ]
+        for testcase in testcases:
+            with self.subTest(msg=f"TEST INPUT: function={testcase[1]}"):
+                testcase[0]()
+                snapshot = stats(reset=True)
+                self.assertEqual(self.counts(snapshot["functions"]), {testcase[1]: testcase[2]})
+                self.assertEqual(self.counts(snapshot["hives"]), {"HKCU": testcase[2]})
+
+    def test_errors(self):
+        self.assertIsNone(load_value("HKLM:Missing", "a"))
+        snapshot = stats()
+        self.assertEqual(snapshot["hives"]["HKLM"]["open"]["errors"], 1)
+        self.assertEqual(sum(snapshot["operations"]["open"]["histogram"]), 1)
+        self.assertIsInstance(self.calls[-1][4], FileNotFoundError)
+        self.assertEqual(self.calls[-1][0:3], ("load_value", "HKLM", "open_key"))
+
+    def test_populate_is_linear(self):
+        for n in [10, 40]:
+            with self.subTest(msg=f"TEST INPUT: keys={n}"):
+                for i in range(n):
+                    save_value(f"HKCU:Tree\\{i % 4}\\{i}", "v", (i, TYPE_DWORD))
+                reset_stats()
+                Key("HKCU:Tree").populate()
+                keys = n + 4 + 1
+                self.assertEqual(self.counts(stats()["functions"])["Key.populate"], {"open": keys, "query": keys, "enum": keys - 1 + n, "close": keys})
+                delete_key("HKCU:Tree")
+
+    def test_session(self):
+        save_value("HKCU:App", "a", (1, TYPE_DWORD))
+        reset_stats()
+        with Session() as session:  # Created after enable_stats(), so its handles are recorded
+            for i in range(3):
+                self.assertEqual(load_value("HKCU:App", "a", session=session), (1, TYPE_DWORD))
+        counts = {operation: stat["count"] for operation, stat in stats()["operations"].items()}
+        self.assertEqual(counts, {"open": 1, "query": 3, "close": 1})
+
+    def test_disable(self):
+        self.assertIsInstance(get_backend(), InstrumentedBackend)
+        disable_stats()
+        self.assertIs(get_backend(), self.memory)
+        save_value("HKCU:App", "a", (1, TYPE_DWORD))
+        self.assertEqual(stats(), {"operations": {}, "hives": {}, "functions": {}})
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,276 @@
+import unittest
+
+#   Import modules
+from pyregistryutils.backend import MemoryBackend, set_backend
+from pyregistryutils.common import *
+from pyregistryutils.key import *
+
+
+
+class Test_Key_populate(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+        save_value("HKCU:Root", "", ("root", TYPE_REG_SZ))
+        save_value("HKCU:Root\\a", "n", (1, TYPE_DWORD))
+        save_value("HKCU:Root\\a\\aa", "n", (2, TYPE_DWORD))
+        create_key("HKCU:Root\\b")
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def test_recurse(self):
+        testcases = [
+        #   [ (recurse),            (correct_member_names)      ],
+            [ (Key.POPULATE_VALUES),        []                  ],
+            [ (0),                          ["a", "b"]          ],
+            [ (Key.POPULATE_ALL_SUBKEYS),   ["a", "a\\aa", "b"] ],
+        ]
+        for testcase in testcases:
+            for parallel in [False, True]:
+                with self.subTest(msg=f"TEST INPUT: recurse={testcase[0]}, parallel={parallel}"):
+                    root = Key("HKCU:Root")
+                    root.populate(testcase[0], parallel=parallel)
+                    self.assertEqual(root.values, {"": ("root", TYPE_REG_SZ)})
+                    self.assertEqual(sorted(root.members), testcase[1])
+
+    def test_values(self):
+        root = Key("HKCU:Root", populate=True)
+        self.assertEqual(root.members["a\\aa"].values, {"n": (2, TYPE_DWORD)})
+        self.assertEqual(root.members["a\\aa"].abspath, "HKCU:Root\\a\\aa")
+
+    def test_existing_member(self):
+        root = Key("HKCU:Root")
+        member = Key("HKCU:Root\\a", values={"other": None})
+        root.add_member(member, "custom")
+        root.populate()
+        self.assertIs(root.members["custom"], member)
+        self.assertEqual(member.values, {"other": None, "n": (1, TYPE_DWORD)})
+        self.assertNotIn("a", root.members)
+
+    class LockedBackend(MemoryBackend):
+        # Refuses to open keys named "secret"
+        def open_key(self, key, sub_key, access):
+            if sub_key.casefold().endswith("secret"):
+                raise PermissionError("Access is denied.")
+            return super().open_key(key, sub_key, access)
+
+    def test_unreadable(self):
+        set_backend(self.LockedBackend())
+        save_value("HKCU:Root\\a\\secret\\x", "n", (3, TYPE_DWORD))
+        save_value("HKCU:Root\\a\\z", "n", (4, TYPE_DWORD))
+        for parallel in [False, True]:
+            with self.subTest(msg=f"TEST INPUT: parallel={parallel}"):
+                root = Key("HKCU:Root")
+                root.populate(parallel=parallel)
+                self.assertEqual(list(root.members), ["a", "a\\secret", "a\\z"])   # Found, but cannot be read
+                self.assertEqual(root.members["a\\secret"].values, {})
+                self.assertEqual(root.members["a\\z"].values, {"n": (4, TYPE_DWORD)})
+
+    def test_missing(self):
+        root = Key("HKCU:Missing")
+        root.populate()
+        self.assertEqual(root.values, {})
+        self.assertEqual(root.members, {})
+
+
+
+
+class Test_Key_save(unittest.TestCase):
+
+    class CountingBackend(MemoryBackend):
+        # Records the names of values written or deleted
+        def __init__(self):
+            super().__init__()
+            self.writes = []
+
+        def set_value(self, handle, name, type, data):
+            self.writes.append(name)
+            super().set_value(handle, name, type, data)
+
+        def delete_value(self, handle, name):
+            self.writes.append(name)
+            super().delete_value(handle, name)
+
+    def setUp(self):
+        self.backend = self.CountingBackend()
+        self.previous = set_backend(self.backend)
+        save_values("HKCU:Root", {"a": (1, TYPE_DWORD), "b": (["x"], TYPE_MULTI_SZ)})
+        save_value("HKCU:Root\\sub", "c", ("c", TYPE_REG_SZ))
+        self.backend.writes.clear()
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def test_clean(self):
+        root = Key("HKCU:Root", populate=True)
+        self.assertFalse(root.is_dirty())
+        self.assertEqual(root.save(), [])
+        self.assertEqual(self.backend.writes, [])
+
+    def test_changes(self):
+        root = Key("HKCU:Root", populate=True)
+        root.values["a"] = (2, TYPE_DWORD)
+        root.values["b"][0].append("y")     # Changed in place
+        root.members["sub"].values["c"] = None
+        self.assertEqual(root.changes(), {"a": (2, TYPE_DWORD), "b": (["x", "y"], TYPE_MULTI_SZ)})
+        self.assertEqual(root.save(), ["HKCU:Root", "HKCU:Root\\sub"])
+        self.assertEqual(self.backend.writes, ["a", "b", "c"])
+        self.assertEqual(list_values("HKCU:Root\\sub"), {})
+        self.assertFalse(root.is_dirty())
+
+    def test_force(self):
+        root = Key("HKCU:Root", populate=True)
+        self.assertEqual(root.save(force=True), ["HKCU:Root", "HKCU:Root\\sub"])
+        self.assertEqual(self.backend.writes, ["a", "b", "c"])
+
+    def test_unsynced(self):
+        key = Key("HKCU:New\\Key")
+        self.assertTrue(key.is_dirty())
+        self.assertEqual(key.save(), ["HKCU:New\\Key"])  # Keys which have not been loaded are created
+        self.assertEqual(key.save(), [])
+        key.load()
+        key.values["v"] = (1, TYPE_DWORD)
+        key.delete()
+        self.assertEqual(key.save(), ["HKCU:New\\Key"])
+        self.assertEqual(list_values("HKCU:New\\Key"), {"v": (1, TYPE_DWORD)})
+
+    def test_relocated(self):
+        key = Key("HKCU:Root", populate=False)
+        key.load()
+        self.assertFalse(key.is_dirty(recurse=False))
+        key.location = "HKCU:Moved"
+        self.assertTrue(key.is_dirty(recurse=False))
+        self.assertEqual(key.save(), ["HKCU:Moved"])
+        self.assertEqual(list_values("HKCU:Moved"), {"a": (1, TYPE_DWORD), "b": (["x"], TYPE_MULTI_SZ)})
+
+    def test_delete_without_recurse(self):
+        root = Key("HKCU:Root", populate=True)
+        self.assertEqual(root.delete(recurse=False), ["HKCU:Root\\sub", "HKCU:Root"])
+        self.assertTrue(root.members["sub"].is_dirty())     # Deleted with its parent's subtree
+        self.assertEqual(root.save(), ["HKCU:Root", "HKCU:Root\\sub"])
+        self.assertEqual(list_values("HKCU:Root\\sub"), {"c": ("c", TYPE_REG_SZ)})
+
+
+
+class Test_Key_location(unittest.TestCase):
+
+    def test_regpath(self):
+        root = Key("HKEY_CURRENT_USER\\Software")
+        child = Key((root, "relpath\\to\\child"))
+        self.assertIsInstance(child.location, RegPath)
+        self.assertEqual((child.hive, child.localpath, child.abspath), (HKCU, "Software\\relpath\\to\\child", "HKCU:Software\\relpath\\to\\child"))
+        self.assertEqual(child.location.parent.parent.parent, root.location)
+        root.location = "HKCU:Other"    # Locations are resolved once, when they are set
+        self.assertEqual(child.abspath, "HKCU:Software\\relpath\\to\\child")
+
+    def test_invalid(self):
+        key = Key("HK:Software")
+        self.assertIsNone(key.location)
+        self.assertIsNone(key.abspath)
+
+    def test_add_member(self):
+        root = Key("HKCU:Software")
+        self.assertEqual(root.add_member(Key("HKCU:SOFTWARE\\Classes\\.txt"))[0], "Classes\\.txt")
+        self.assertEqual(root.add_member(Key("HKLM:Software"))[0], "HKLM:Software")
+
+
+
+class Test_Key_members(unittest.TestCase):
+
+    def test_lookup(self):
+        root = Key("HKCU:Software")
+        member = Key("HKCU:Software\\Classes")
+        root.add_member(member)
+        testcases = [
+        #   [ (location),                           (correct_output)            ],
+            [ ("HKCU:Software\\Classes"),           (("Classes", member))       ],
+            [ ("HKEY_CURRENT_USER\\SOFTWARE\\classes"), (("Classes", member))   ],
+            [ ((root, "CLASSES")),                  (("Classes", member))       ],
+            [ ("HKLM:Software\\Classes"),           (None)                      ],
+            [ ("HK:Software"),                      (None)                      ],
+        ]
+        for testcase in testcases:
+            with self.subTest(msg=f"TEST INPUT: location={testcase[0]}"):
+                self.assertEqual(root.get_member_by_location(testcase[0]), testcase[1])
+
+    def test_index(self):
+        root = Key("HKCU:Software")
+        a = Key("HKCU:Software\\a")
+        b = Key("HKCU:Software\\b")
+        root.members = {"a": a}
+        self.assertEqual(root.get_member_by_location("HKCU:Software\\A"), ("a", a))
+        root.members["b"] = b
+        root.members["a"] = b       # Overwriting a name unindexes the old member
+        self.assertIsNone(root.get_member_by_location("HKCU:Software\\a"))
+        root.remove_member("a")
+        self.assertEqual(root.get_member_by_location("HKCU:Software\\b"), ("b", b))
+        del root.members["b"]
+        self.assertIsNone(root.get_member_by_location("HKCU:Software\\b"))
+        root.members |= {"a": a}
+        self.assertEqual(root.get_member_by_location("HKCU:Software\\a"), ("a", a))
+
+    def test_moved_member(self):
+        root = Key("HKCU:Software")
+        member = root.add_member(Key("HKCU:Software\\a"))[1]
+        member.location = "HKCU:Software\\b"
+        self.assertIsNone(root.get_member_by_location("HKCU:Software\\a"))
+        self.assertEqual(root.get_member_by_location("HKCU:Software\\b"), ("a", member))
+
+    def test_moved_member_owners(self):
+        first = Key("HKCU:First")
+        second = Key("HKCU:Second")
+        shared = Key()                  # No location yet
+        first.members = {"x": shared, "y": Key("HKCU:First\\y")}
+        second.add_member(shared, "s")
+        shared.location = "HKCU:Shared"
+        self.assertEqual(first.get_member_by_location("HKCU:shared"), ("x", shared))
+        self.assertEqual(second.get_member_by_location("HKCU:SHARED"), ("s", shared))
+        second.members.clear()          # No longer updates second's index
+        self.assertEqual(shared._owners, [first.members])
+        shared.location = "HKCU:Moved"
+        self.assertIsNone(first.get_member_by_location("HKCU:Shared"))
+        self.assertEqual(first.get_member_by_location("HKCU:Moved"), ("x", shared))
+        self.assertEqual(first.get_member_by_location("HKCU:First\\y")[0], "y")
+
+
+
+class Test_parse_location(unittest.TestCase):
+
+    def tearDown(self):
+        disable_path_cache()
+
+    def test_equals(self):
+        root = Key("HKCU:Software")
+        testcases = [
+        #   [ (location),                       (correct_output)    ],
+            [ ("HKEY_CURRENT_USER\\Software"),  (HKCU, "Software", "HKCU:Software")         ],
+            [ (HKCU),                           (HKCU, "", "HKCU:")                         ],
+            [ ((HKCU, "Software\\Classes")),    (HKCU, "Software\\Classes", "HKCU:Software\\Classes") ],
+            [ (root),                           (HKCU, "Software", "HKCU:Software")         ],
+            [ ((root, "Classes\\")),            (HKCU, "Software\\Classes", "HKCU:Software\\Classes") ],
+        ]
+        for cache in [False, True]:
+            if cache:
+                enable_path_cache()
+            for testcase in testcases:
+                with self.subTest(msg=f"TEST INPUT: location={testcase[0]}, cache={cache}"):
+                    self.assertEqual(parse_location(testcase[0]), testcase[1])
+
+    def test_none(self):
+        for location in [None, "HK:Software", (HKCU, 1), [HKCU, "Software"], 1234]:
+            with self.subTest(msg=f"TEST INPUT: location={location}"):
+                self.assertIsNone(parse_location(location))
+
+    def test_cache(self):
+        enable_path_cache()
+        for i in range(3):
+            parse_location("HKCU:Software")
+            parse_location((Key("HKCU:Software"), "Classes"))    # Only the Key's own location is cached
+        info = path_cache_info()["parse_location"]
+        self.assertEqual((info["misses"], info["currsize"]), (1, 1))
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+#   Import modules
+from pyregistryutils.backend import MemoryBackend, set_backend
+from pyregistryutils.common import *
+from pyregistryutils.mirror import *
+from pyregistryutils.regf import __regf_data__
+
+
+
+class Test_mirror_to_sqlite(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+        save_values("HKCR:Python.File", {"": ("Python File", TYPE_REG_SZ), "EditFlags": (0x10000, TYPE_DWORD)})
+        save_value("HKCR:Python.File\\Shell\\Open\\Command", "", ("\"C:\\Python\\python.exe\" \"%1\" %*", TYPE_EXPAND_SZ))
+        save_value("HKCR:txtfile\\shell\\open\\command", "", ("%SystemRoot%\\notepad.exe %1", TYPE_EXPAND_SZ))
+        save_values("HKCR:Other", {"multi": (["one", "two python"], TYPE_MULTI_SZ), "big": (2**64-1, TYPE_QWORD), "bin": (b"\x00\x01", TYPE_BINARY)})
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "mirror.db")
+
+    def tearDown(self):
+        set_backend(self.previous)
+        self.directory.cleanup()
+
+    def query(self, sql, *params):
+        with sqlite3.connect(self.file) as connection:
+            return connection.execute(sql, params).fetchall()
+
+    def test_mirror(self):
+        self.assertEqual(mirror_to_sqlite("HKCR:", self.file), {"added": 10, "updated": 0, "unchanged": 0, "deleted": 0})
+        self.assertEqual(self.query("SELECT k.path FROM keys k JOIN key_values v ON v.key = k.id "
+                                    "WHERE k.folded LIKE '%\\shell\\open\\command' AND v.text LIKE '%python%'"),
+                         [("HKCR:Python.File\\Shell\\Open\\Command",)])
+        self.assertEqual(self.query("SELECT k.path FROM keys k JOIN keys p ON k.parent = p.id WHERE p.folded = 'hkcr:python.file\\shell'"),
+                         [("HKCR:Python.File\\Shell\\Open",)])
+        self.assertEqual(self.query("SELECT name, number FROM key_values WHERE type = ? ORDER BY name", TYPE_QWORD), [("big", -1)])
+        for path, name, type, data in self.query("SELECT k.path, v.name, v.type, v.data FROM keys k JOIN key_values v ON v.key = k.id"):
+            with self.subTest(msg=f"TEST INPUT: path={path!r}, name={name!r}"):
+                self.assertEqual((__regf_data__(type, data), type), load_value(path, name))
+
+    def test_fts(self):
+        mirror_to_sqlite("HKCR:", self.file)
+        try:
+            actual = self.query("SELECT k.path, v.name FROM value_text t JOIN key_values v ON v.id = t.rowid JOIN keys k ON k.id = v.key WHERE value_text MATCH 'python' ORDER BY k.folded")
+        except sqlite3.OperationalError:
+            self.skipTest("SQLite was built without FTS5")
+        self.assertEqual(actual, [("HKCR:Other", "multi"), ("HKCR:Python.File", ""), ("HKCR:Python.File\\Shell\\Open\\Command", "")])
+
+    def test_refresh(self):
+        mirror_to_sqlite("HKCR:", self.file)
+        self.assertEqual(mirror_to_sqlite("HKCR:", self.file), {"added": 0, "updated": 0, "unchanged": 10, "deleted": 0})
+        save_value("HKCR:Other", "multi", (["three"], TYPE_MULTI_SZ))
+        delete_key("HKCR:Python.File\\Shell")
+        create_key("HKCR:Other\\New")
+        self.assertEqual(mirror_to_sqlite("HKCR:", self.file), {"added": 1, "updated": 2, "unchanged": 5, "deleted": 3})   # Python.File and Other changed
+        self.assertEqual(self.query("SELECT COUNT(*) FROM keys"), [(8,)])
+        self.assertEqual(self.query("SELECT text FROM key_values WHERE name = 'multi'"), [("three",)])
+        self.assertEqual(mirror_to_sqlite("HKCR:", self.file, refresh=False), {"added": 0, "updated": 8, "unchanged": 0, "deleted": 0})
+
+    def test_subtree(self):
+        mirror_to_sqlite("HKCR:txtfile", self.file)
+        self.assertEqual(mirror_to_sqlite("HKCR:Python.File", self.file)["added"], 4)
+        delete_key("HKCR:Python.File\\Shell\\Open\\Command")
+        self.assertEqual(mirror_to_sqlite("HKCR:Python.File", self.file)["deleted"], 1)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM keys WHERE folded LIKE 'hkcr:txtfile%'"), [(4,)])   # Other trees are not changed
+
+    def test_parent_mirrored_later(self):
+        parents = "SELECT k.path, p.path FROM keys k LEFT JOIN keys p ON k.parent = p.id WHERE k.folded LIKE 'hkcr:python.file%' ORDER BY k.folded"
+        mirror_to_sqlite("HKCR:Python.File\\Shell", self.file)
+        self.assertEqual(self.query(parents)[0], ("HKCR:Python.File\\Shell", None))     # Its parent is not mirrored yet
+        for refresh in [True, False]:   # Unchanged keys, and updated keys
+            with self.subTest(msg=f"TEST INPUT: refresh={refresh}"):
+                mirror_to_sqlite("HKCR:", self.file, refresh=refresh)
+                self.assertEqual(self.query(parents), [
+                    ("HKCR:Python.File", "HKCR:"),
+                    ("HKCR:Python.File\\Shell", "HKCR:Python.File"),
+                    ("HKCR:Python.File\\Shell\\Open", "HKCR:Python.File\\Shell"),
+                    ("HKCR:Python.File\\Shell\\Open\\Command", "HKCR:Python.File\\Shell\\Open"),
+                ])
+                self.query("UPDATE keys SET parent = NULL WHERE folded = 'hkcr:python.file\\shell'")
+
+    def test_unopenable_database(self):
+        handles = []
+        class TrackingBackend(MemoryBackend):
+            def open_key(self, key, sub_key, access):
+                handles.append(super().open_key(key, sub_key, access))
+                return handles[-1]
+        set_backend(TrackingBackend())
+        save_value("HKCR:Other", "n", (1, TYPE_DWORD))
+        with self.assertRaises(sqlite3.OperationalError):
+            mirror_to_sqlite("HKCR:Other", os.path.join(self.directory.name, "missing", "mirror.db"))
+        self.assertEqual(len(handles), 1)
+        self.assertTrue(handles[0].closed)      # Not leaked
+
+    def test_invalid(self):
+        self.assertIsNone(mirror_to_sqlite("HKCR:Missing", self.file))
+        self.assertIsNone(mirror_to_sqlite("Invalid", self.file))
+        connection = sqlite3.connect(":memory:")
+        self.assertEqual(mirror_to_sqlite("HKCR:Other", connection)["added"], 1)
+        self.assertEqual(connection.execute("SELECT COUNT(*) FROM key_values").fetchone(), (3,))
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,271 @@
+import os
+import struct
+import tempfile
+import unittest
+
+#   Import modules
+from pyregistryutils.backend import MemoryBackend, set_backend
+from pyregistryutils.common import *
+from pyregistryutils.diff import diff
+from pyregistryutils.key import Key
+from pyregistryutils.session import Session
+from pyregistryutils.regf import *
+from pyregistryutils.regf import __regf_hash__
+
+
+
+class HiveBuilder:
+    """
+    Builds regf files cell by cell, so the tests can use every record format the reader supports.
+    Keys are (name, values, subkeys, list format); values are (name, type, raw data).
+    """
+
+    def __init__(self):
+        self.cells = bytearray(HBIN_HEADER.size)   # Cell offsets are relative to the start of the hive bin
+
+    def alloc(self, data):
+        offset = len(self.cells)
+        size = (len(data) + 4 + 7) & ~7
+        self.cells += struct.pack("<i", -size) + data + b"\x00" * (size - 4 - len(data))
+        return offset
+
+    def name(self, name, flag):
+        try:
+            return name.encode("latin-1"), flag
+        except UnicodeEncodeError:
+            return name.encode("utf-16-le"), 0
+
+    def value(self, name, type, raw):
+        encoded, flags = self.name(name, VALUE_COMP_NAME)
+        if len(raw) <= 4:
+            size, offset = len(raw) | DATA_INLINE, int.from_bytes(raw.ljust(4, b"\x00"), "little")
+        elif len(raw) > BIG_DATA_SEGMENT:
+            segments = [self.alloc(raw[i:i+BIG_DATA_SEGMENT]) for i in range(0, len(raw), BIG_DATA_SEGMENT)]
+            segment_list = self.alloc(struct.pack(f"<{len(segments)}I", *segments))
+            size, offset = len(raw), self.alloc(REGF_DB.pack(b"db", len(segments), segment_list))
+        else:
+            size, offset = len(raw), self.alloc(raw)
+        return self.alloc(REGF_VK.pack(b"vk", len(encoded), size, offset, type, flags, 0) + encoded)
+
+    def key(self, key, parent=0, root=False):
+        name, values, subkeys, format = key
+        encoded, flags = self.name(name, KEY_COMP_NAME)
+        offset = self.alloc(REGF_NK.pack(b"nk", *([0] * 19)) + encoded)
+        children = sorted(((child[0].upper(), self.key(child, offset)) for child in subkeys))
+        if format == "ri":  # Split into li lists of 2 subkeys
+            lists = [self.alloc(REGF_LIST.pack(b"li", len(children[i:i+2])) + b"".join(struct.pack("<I", o) for _, o in children[i:i+2])) for i in range(0, len(children), 2)]
+            sublist = self.alloc(REGF_LIST.pack(b"ri", len(lists)) + struct.pack(f"<{len(lists)}I", *lists))
+        elif format == "li":
+            sublist = self.alloc(REGF_LIST.pack(b"li", len(children)) + b"".join(struct.pack("<I", o) for _, o in children))
+        elif format == "lh":
+            sublist = self.alloc(REGF_LIST.pack(b"lh", len(children)) + b"".join(struct.pack("<II", o, __regf_hash__(n)) for n, o in children))
+        else:
+            sublist = self.alloc(REGF_LIST.pack(b"lf", len(children)) + b"".join(struct.pack("<I4s", o, n.encode("utf-16-le")[:4:2]) for n, o in children))
+        vks = [self.value(*value) for value in values]
+        valuelist = self.alloc(struct.pack(f"<{len(vks)}I", *vks)) if vks else NO_CELL
+        fields = [b"nk", flags | (KEY_HIVE_ENTRY if root else 0), 0x01D0000000000000, 0, parent, len(children), 0, sublist if children else NO_CELL, NO_CELL,
+                  len(vks), valuelist, NO_CELL, NO_CELL, 0, 0, 0, 0, 0, len(encoded), 0]
+        self.cells[offset+4 : offset+4+REGF_NK.size] = REGF_NK.pack(*fields)
+        return offset
+
+    def build(self, root):
+        offset = self.key(root, NO_CELL, root=True)
+        size = (len(self.cells) + HBIN_SIZE - 1) // HBIN_SIZE * HBIN_SIZE
+        self.cells[0 : HBIN_HEADER.size] = HBIN_HEADER.pack(HBIN_SIGNATURE, 0, size, 0, 0, 0)
+        base = REGF_BASE.pack(REGF_SIGNATURE, 1, 1, 0, 1, 5, 0, 1, offset, size, 1)
+        return base.ljust(REGF_BASE_BLOCK_SIZE, b"\x00") + bytes(self.cells).ljust(size, b"\x00")
+
+
+
+class Test_RegfBackend(unittest.TestCase):
+
+    big = bytes(range(256)) * 100   # Stored as 3 big data segments
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "test.hive")
+
+    def tearDown(self):
+        set_backend(self.previous)
+        self.directory.cleanup()
+
+    def write(self, root):
+        with open(self.file, "wb") as f:
+            f.write(HiveBuilder().build(root))
+
+    def tree(self, format):
+        return ("ROOT", [], [
+            ("Values", [
+                ("", winreg.REG_SZ, "default\x00".encode("utf-16-le")),
+                ("sz", winreg.REG_SZ, "été \U0001f600\x00garbage".encode("utf-16-le")),
+                ("path", winreg.REG_EXPAND_SZ, "%PATH%\x00".encode("utf-16-le")),
+                ("multi", winreg.REG_MULTI_SZ, "a\x00b\x00\x00".encode("utf-16-le")),
+                ("dword", winreg.REG_DWORD, struct.pack("<I", 0xFFFFFFFF)),
+                ("qword", winreg.REG_QWORD, struct.pack("<Q", 2**64-1)),
+                ("tiny", winreg.REG_BINARY, b"\x01\x02"),
+                ("bin", winreg.REG_BINARY, b"\x00\x01\x02\x03\x04\x05"),
+                ("none", winreg.REG_BINARY, b""),
+                ("big", winreg.REG_BINARY, self.big),
+                ("名前", winreg.REG_DWORD, struct.pack("<I", 7)),
+            ], [], format),
+            ("Keys", [], [(f"Key{i:02}", [("n", winreg.REG_DWORD, struct.pack("<I", i))], [], format) for i in range(5)] + [("Ключ", [], [], format), ("abc", [], [], format)], format),
+        ], format)
+
+    def test_read(self):
+        correct_values = {
+            "":      ("default", TYPE_REG_SZ),
+            "sz":    ("été \U0001f600", TYPE_REG_SZ),
+            "path":  ("%PATH%", TYPE_EXPAND_SZ),
+            "multi": (["a", "b"], TYPE_MULTI_SZ),
+            "dword": (0xFFFFFFFF, TYPE_DWORD),
+            "qword": (2**64-1, TYPE_QWORD),
+            "tiny":  (b"\x01\x02", TYPE_BINARY),
+            "bin":   (b"\x00\x01\x02\x03\x04\x05", TYPE_BINARY),
+            "none":  (None, TYPE_BINARY),
+            "big":   (self.big, TYPE_BINARY),
+            "名前":  (7, TYPE_DWORD),
+        }
+        correct_subkeys = ["HKLM:SOFTWARE\\Keys\\abc"] + [f"HKLM:SOFTWARE\\Keys\\Key{i:02}" for i in range(5)] + ["HKLM:SOFTWARE\\Keys\\Ключ"]
+        for format in ["lf", "lh", "li", "ri"]:
+            with self.subTest(msg=f"TEST INPUT: format={format}"):
+                self.write(self.tree(format))
+                with RegfBackend(self.file, "HKLM:SOFTWARE") as hive, Session(backend=hive) as session:
+                    self.assertEqual(list_values("HKLM:SOFTWARE\\Values", session=session), correct_values)
+                    self.assertEqual(sorted(list_subkeys("HKLM:SOFTWARE\\Keys", session=session), key=str.casefold), correct_subkeys)
+                    self.assertEqual(load_value("HKLM:software\\keys\\KEY03", "N", session=session), (3, TYPE_DWORD))
+                    self.assertEqual(load_value("HKLM:SOFTWARE\\Keys\\ключ", "", session=session), None)
+                    self.assertEqual(load_value("HKLM:SOFTWARE\\Values", "BIG", session=session), (self.big, TYPE_BINARY))
+                    self.assertIsNone(load_value("HKLM:SOFTWARE\\Missing", "n", session=session))
+                    self.assertEqual(list_subkeys("HKLM:", session=session)[:2], ["HKLM:SOFTWARE", "HKLM:SOFTWARE\\Keys"])
+
+    def test_populate(self):
+        self.write(self.tree("lh"))
+        with RegfBackend(self.file, "HKCU:Hive") as hive:
+            with Session(backend=hive) as session:
+                key = Key("HKCU:Hive")
+                key.populate(session=session)
+            self.assertEqual(len(key.members), 9)
+            self.assertEqual(key.members["Values"].values["dword"], (0xFFFFFFFF, TYPE_DWORD))
+            self.assertEqual([components for components, _ in hive.iter_keys()], [(), ("Keys",), ("Keys", "abc")] + [("Keys", f"Key{i:02}") for i in range(5)] + [("Keys", "Ключ"), ("Values",)])
+            self.assertEqual(list(diff(key, hive)), [])
+
+    def test_read_only(self):
+        self.write(self.tree("lf"))
+        with RegfBackend(self.file) as hive, Session(backend=hive) as session:
+            self.assertIsNone(save_value("HKLM:Values", "x", (1, TYPE_DWORD), session=session))
+            self.assertRaises(PermissionError, hive.delete_key, HKLM, "Keys\\abc")
+            self.assertEqual(load_value("HKLM:Values", "x", session=session), None)
+
+    def test_invalid(self):
+        for content in [b"", b"not a hive" * 1000, REGF_SIGNATURE + b"\x00" * 8000]:
+            with self.subTest(msg=f"TEST INPUT: content={content[:10]!r}"):
+                with open(self.file, "wb") as f:
+                    f.write(content)
+                self.assertRaises(ValueError, RegfBackend, self.file)
+        self.write(self.tree("lf"))
+        self.assertRaises(ValueError, RegfBackend, self.file, "Invalid")
+
+
+
+class Test_save_hive(unittest.TestCase):
+
+    big = bytes(range(256)) * 200   # Stored as 4 big data segments
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+        save_values("HKCU:Software\\Root", {
+            "":      ("default", TYPE_REG_SZ),
+            "sz":    ("été \U0001f600", TYPE_REG_SZ),
+            "path":  ("%PATH%", TYPE_EXPAND_SZ),
+            "multi": (["a", "b"], TYPE_MULTI_SZ),
+            "empty": ([], TYPE_MULTI_SZ),
+            "dword": (0xFFFFFFFF, TYPE_DWORD),
+            "qword": (2**64-1, TYPE_QWORD),
+            "tiny":  (b"\x01", TYPE_BINARY),
+            "bin":   (b"\x00\x01\x02\x03\x04\x05", TYPE_BINARY),
+            "none":  (None, TYPE_BINARY),
+            "big":   (self.big, TYPE_BINARY),
+            "名前":  (7, TYPE_DWORD),
+        })
+        for i in range(20):
+            save_value(f"HKCU:Software\\Root\\Key{i:02}\\Sub", "n", (i, TYPE_DWORD))
+        create_key("HKCU:Software\\Root\\_Underscore")
+        create_key("HKCU:Software\\Root\\Ключ")
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "test.hive")
+
+    def tearDown(self):
+        set_backend(self.previous)
+        self.directory.cleanup()
+
+    def check_structure(self):
+        # Hive bins must cover the file exactly, and the cells in each bin must cover the bin exactly
+        with open(self.file, "rb") as f:
+            data = f.read()
+        base = REGF_BASE.unpack_from(data)
+        self.assertEqual(len(data), REGF_BASE_BLOCK_SIZE + base[9])
+        checksum = 0
+        for (dword,) in struct.iter_unpack("<I", data[:REGF_CHECKSUM_OFFSET]):
+            checksum ^= dword
+        self.assertEqual(struct.unpack_from("<I", data, REGF_CHECKSUM_OFFSET)[0], checksum)
+        offset = 0
+        while offset < base[9]:
+            signature, bin_offset, bin_size, _, _, _ = HBIN_HEADER.unpack_from(data, REGF_BASE_BLOCK_SIZE + offset)
+            self.assertEqual((signature, bin_offset), (HBIN_SIGNATURE, offset))
+            self.assertEqual(bin_size % HBIN_SIZE, 0)
+            cell = offset + HBIN_HEADER.size
+            while cell < offset + bin_size:
+                size = abs(struct.unpack_from("<i", data, REGF_BASE_BLOCK_SIZE + cell)[0])
+                self.assertEqual(size % 8, 0)
+                self.assertGreater(size, 0)
+                cell += size
+            self.assertEqual(cell, offset + bin_size)
+            offset += bin_size
+
+    def test_roundtrip(self):
+        self.assertEqual(save_hive("HKCU:Software\\Root", self.file), 43)
+        self.check_structure()
+        live = Key("HKCU:Software\\Root", populate=True)
+        with RegfBackend(self.file, "HKCU:Software\\Root") as hive, Session(backend=hive) as session:
+            self.assertEqual(list_values("HKCU:Software\\Root", session=session), list_values("HKCU:Software\\Root"))
+            self.assertEqual(load_value("HKCU:SOFTWARE\\root\\KEY07\\sub", "N", session=session), (7, TYPE_DWORD))
+            key = Key("HKCU:Software\\Root")
+            key.populate(session=session)
+            self.assertEqual(list(diff(live, key)), [])
+            self.assertEqual(list(diff("HKCU:Software\\Root", hive)), [])
+
+    def test_sources(self):
+        key = Key("HKCU:Software\\Root", values={"v": (1, TYPE_DWORD), "deleted": None})
+        key.add_member(Key("HKCU:Software\\Root\\a\\b", values={"w": ("w", TYPE_REG_SZ)}))
+        self.assertEqual(save_hive(key, self.file), 3)     # The missing key "a" is added
+        self.check_structure()
+        correct = [((), {"v": (1, TYPE_DWORD)}), (("a",), {}), (("a", "b"), {"w": ("w", TYPE_REG_SZ)})]
+        other = os.path.join(self.directory.name, "copy.hive")
+        with RegfBackend(self.file, "HKLM:Hive") as hive:
+            self.assertEqual(list(hive.iter_keys()), correct)
+            self.assertEqual(save_hive(hive, other), 3)     # Hive to hive
+        with RegfBackend(other) as copy:
+            self.assertEqual(list(copy.iter_keys()), correct)
+
+    def test_large(self):
+        for i in range(3000):     # Split into 3 lh lists under an ri list, over several hive bins
+            create_key(f"HKCU:Large\\K{i}")
+        self.assertEqual(save_hive("HKCU:Large", self.file), 3001)
+        self.check_structure()
+        with RegfBackend(self.file, "HKCU:Large") as hive, Session(backend=hive) as session:
+            self.assertEqual(len(list_subkeys("HKCU:Large", session=session)), 3000)
+            self.assertEqual(list_values("HKCU:Large\\k2999", session=session), {})
+            handle = hive.open_key(HKCU, "Large\\K1234", winreg.KEY_READ)
+            self.assertEqual(hive.query_info_key(handle)[0:2], (0, 0))
+            root = hive._nk(hive._root)
+            self.assertEqual(bytes(hive._cell(root[7])[0:2]), b"ri")
+
+    def test_invalid(self):
+        self.assertIsNone(save_hive("HKCU:Missing", self.file))
+        self.assertEqual(os.path.getsize(self.file), 0)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
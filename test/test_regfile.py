@@ -0,0 +1,93 @@
+import io
+import os
+import tempfile
+import unittest
+
+#   Import modules
+from pyregistryutils.backend import MemoryBackend, set_backend
+from pyregistryutils.common import *
+from pyregistryutils.key import Key
+from pyregistryutils.regfile import *
+
+
+
+class Test_export_reg(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def export(self, source):
+        f = io.StringIO()
+        export_reg(source, f)
+        return f.getvalue()
+
+    def test_values(self):
+        testcases = [
+        #   [ (name, value),                                        (correct_output)    ],
+            [ ("",          ("default", TYPE_REG_SZ)),              ('@="default"')     ],
+            [ ("a\"b\\c",   ("x\"y\\z", TYPE_REG_SZ)),              ('"a\\"b\\\\c"="x\\"y\\\\z"')   ],
+            [ ("lines",     ("a\nb", TYPE_REG_SZ)),                 ('"lines"=hex(1):61,00,0a,00,62,00,00,00') ],
+            [ ("dword",     (10, TYPE_DWORD)),                      ('"dword"=dword:0000000a')  ],
+            [ ("qword",     (1, TYPE_QWORD)),                       ('"qword"=hex(b):01,00,00,00,00,00,00,00') ],
+            [ ("expand",    ("%P%", TYPE_EXPAND_SZ)),               ('"expand"=hex(2):25,00,50,00,25,00,00,00') ],
+            [ ("multi",     (["a", "b"], TYPE_MULTI_SZ)),           ('"multi"=hex(7):61,00,00,00,62,00,00,00,00,00') ],
+            [ ("empty",     ([], TYPE_MULTI_SZ)),                   ('"empty"=hex(7):00,00')    ],
+            [ ("bin",       (b"\x00\xff", TYPE_BINARY)),            ('"bin"=hex:00,ff')         ],
+            [ ("nobin",     (None, TYPE_BINARY)),                   ('"nobin"=hex:')            ],
+            [ ("none",      (b"\x01", TYPE_NONE)),                  ('"none"=hex(0):01')        ],
+            [ ("big",       (b"\x00\x00\x00\x01", TYPE_DWORD_BIG_ENDIAN)), ('"big"=hex(5):00,00,00,01') ],
+            [ ("resources", (b"\x02", TYPE_RESOURCE_REQUIREMENTS_LIST)),   ('"resources"=hex(a):02') ],
+        ]
+        for testcase in testcases:
+            with self.subTest(msg=f"TEST INPUT: name={testcase[0][0]!r}, value={testcase[0][1]!r}"):
+                save_value("HKCU:Export", testcase[0][0], testcase[0][1])
+                output = self.export("HKCU:Export")
+                self.assertEqual(output, f"Windows Registry Editor Version 5.00\n\n[HKEY_CURRENT_USER\\Export]\n{testcase[1]}\n\n")
+                delete_key("HKCU:Export")
+
+    def test_wrapping(self):
+        save_value("HKCU:Export", "bin", (bytes(range(100)), TYPE_BINARY))
+        lines = self.export("HKCU:Export").splitlines()[3:-1]
+        self.assertTrue(all(len(line) <= 80 for line in lines))
+        self.assertTrue(all(line.endswith(",\\") for line in lines[:-1]))
+        self.assertTrue(all(line.startswith("  ") for line in lines[1:]))
+        self.assertEqual("".join(line.strip(" \\") for line in lines), "\"bin\"=hex:" + ",".join(f"{i:02x}" for i in range(100)))
+
+    def test_tree(self):
+        save_value("HKCU:Export\\b", "n", (1, TYPE_DWORD))
+        create_key("HKCU:Export\\A\\Sub")
+        correct = (
+            "Windows Registry Editor Version 5.00\n\n"
+            "[HKEY_CURRENT_USER\\Export]\n\n"
+            "[HKEY_CURRENT_USER\\Export\\A]\n\n"
+            "[HKEY_CURRENT_USER\\Export\\A\\Sub]\n\n"
+            "[HKEY_CURRENT_USER\\Export\\b]\n"
+            "\"n\"=dword:00000001\n\n"
+        )
+        self.assertEqual(self.export("HKCU:Export"), correct)
+        self.assertEqual(self.export(Key("HKCU:Export", populate=True)), correct)
+
+    def test_key_deletions(self):
+        key = Key("HKCU:Export", values={"kept": (1, TYPE_DWORD), "deleted": None})
+        self.assertEqual(self.export(key), "Windows Registry Editor Version 5.00\n\n[HKEY_CURRENT_USER\\Export]\n\"kept\"=dword:00000001\n\"deleted\"=-\n\n")
+
+    def test_file(self):
+        save_value("HKCU:Export", "", ("é", TYPE_REG_SZ))
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "export.reg")
+            self.assertEqual(export_reg("HKCU:Export", file), 1)
+            with open(file, "rb") as f:
+                raw = f.read()
+        self.assertEqual(raw, "\ufeffWindows Registry Editor Version 5.00\r\n\r\n[HKEY_CURRENT_USER\\Export]\r\n@=\"é\"\r\n\r\n".encode("utf-16-le"))
+
+    def test_invalid(self):
+        self.assertIsNone(export_reg("HK:Export", io.StringIO()))
+        self.assertEqual(self.export("HKCU:Missing"), "Windows Registry Editor Version 5.00\n\n")
+
+
+
+if __name__ == '__main__':
+    unittest.main()
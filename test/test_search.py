@@ -0,0 +1,61 @@
+import re
+import unittest
+
+#   Import modules
+from pyregistryutils.backend import MemoryBackend, set_backend
+from pyregistryutils.common import *
+from pyregistryutils.search import *
+
+
+
+class Test_search(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+        save_values("HKLM:Software\\Vendor", {
+            "Path":     ("C:\\Tools\\Evil.exe", TYPE_REG_SZ),
+            "Command":  ("%SystemRoot%\\evil.EXE -q", TYPE_EXPAND_SZ),
+            "List":     (["ok.exe", "c:\\tools\\evil.exe"], TYPE_MULTI_SZ),
+            "Size":     (1234, TYPE_DWORD),
+            "Blob":     (b"evil.exe", TYPE_BINARY),
+            "evil.exe": ("", TYPE_REG_SZ),
+        })
+        save_value("HKLM:Software\\Vendor\\Evil.exe", "Debugger", ("ntsd.exe", TYPE_REG_SZ))
+        save_value("HKLM:Software\\Other", "Path", ("C:\\Windows\\notepad.exe", TYPE_REG_SZ))
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def test_search(self):
+        testcases = [
+        #   [ (kwargs),                                     (correct keypath, name) ],
+            [ {},                                           [("HKLM:Software\\Vendor", "Path"), ("HKLM:Software\\Vendor", "Command"), ("HKLM:Software\\Vendor", "List"), ("HKLM:Software\\Vendor", "evil.exe")] ],
+            [ {"in_names": False},                          [("HKLM:Software\\Vendor", "Path"), ("HKLM:Software\\Vendor", "Command"), ("HKLM:Software\\Vendor", "List")] ],
+            [ {"in_data": False},                           [("HKLM:Software\\Vendor", "evil.exe")] ],
+            [ {"in_data": False, "in_names": False, "in_keys": True}, [("HKLM:Software\\Vendor\\Evil.exe", None)] ],
+            [ {"types": {TYPE_EXPAND_SZ, TYPE_MULTI_SZ}},   [("HKLM:Software\\Vendor", "Command"), ("HKLM:Software\\Vendor", "List")] ],
+            [ {"ignorecase": False},                        [("HKLM:Software\\Vendor", "List"), ("HKLM:Software\\Vendor", "evil.exe")] ],
+            [ {"limit": 2},                                 [("HKLM:Software\\Vendor", "Path"), ("HKLM:Software\\Vendor", "Command")] ],
+            [ {"parallel": True, "limit": 1},               [("HKLM:Software\\Vendor", "Path")] ],
+        ]
+        for testcase in testcases:
+            with self.subTest(msg=f"TEST INPUT: {testcase[0]}"):
+                actual = [(keypath, name) for keypath, name, _ in search("HKLM:Software", "evil.exe", **testcase[0])]
+                self.assertEqual(actual, testcase[1])
+
+    def test_regex(self):
+        self.assertEqual(list(search("HKLM:", r"\\(notepad|ntsd)\.exe$", regex=True)), [("HKLM:Software\\Other", "Path", ("C:\\Windows\\notepad.exe", TYPE_REG_SZ))])
+        self.assertEqual([name for _, name, _ in search("HKLM:", re.compile(r"^[A-Z]\w+$"), in_data=False)], ["Path", "Path", "Command", "List", "Size", "Blob", "Debugger"])    # Keys in registry order: Other, Vendor
+        self.assertEqual(list(search("HKLM:", ".exe")), list(search("HKLM:", re.compile(re.escape(".exe"), re.IGNORECASE))))
+
+    def test_missing(self):
+        errors = []
+        self.assertEqual(list(search("HKLM:Missing", "x", onerror=errors.append)), [])
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(list(search("Invalid", "x")), [])
+        self.assertEqual(list(search("HKLM:", "x", limit=0)), [])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+
+#   Import modules
+from pyregistryutils.backend import *
+from pyregistryutils.common import *
+from pyregistryutils.key import Key
+from pyregistryutils.session import *
+
+
+
+class Test_Session(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+        for name in ["a", "b", "c"]:
+            create_key("HKCU:Software\\"+name)
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def test_hits(self):
+        with Session(maxsize=8) as session:
+            for i in range(5):
+                save_value("HKCU:Software\\a", f"v{i}", (i, TYPE_DWORD), session=session)
+                self.assertEqual(load_value("HKCU:software\\A", f"v{i}", session=session), (i, TYPE_DWORD))
+            stats = session.stats()
+            self.assertEqual(stats["misses"], 2)    # One READ and one WRITE handle
+            self.assertEqual(stats["hits"], 8)
+            self.assertEqual(stats["size"], 2)
+
+    def test_eviction(self):
+        with Session(maxsize=2) as session:
+            with session.open(HKCU, "Software\\a", MODE_READ) as handle_a:
+                pass
+            for name in ["b", "c"]:
+                list_values("HKCU:Software\\"+name, session=session)
+            self.assertTrue(handle_a.closed)    # Least recently used handle is closed on eviction
+            self.assertEqual(session.stats()["evictions"], 1)
+            self.assertEqual(len(session), 2)
+        self.assertEqual(len(session), 0)
+
+    def test_pinned_eviction(self):
+        with Session(maxsize=1) as session:
+            with session.open(HKCU, "Software\\a", MODE_READ) as handle_a:
+                list_values("HKCU:Software\\b", session=session)    # Evicts "a" while it is in use
+                self.assertFalse(handle_a.closed)
+                self.assertEqual(session.backend.query_info_key(handle_a)[0], 0)
+            self.assertTrue(handle_a.closed)
+
+    def test_delete(self):
+        with Session() as session:
+            create_key("HKCU:Software\\a\\sub", session=session)
+            list_values("HKCU:Software\\a\\sub", session=session)
+            self.assertEqual(delete_key("HKCU:Software\\a", session=session), ["HKCU:Software\\a\\sub", "HKCU:Software\\a"])
+            self.assertIsNone(list_values("HKCU:Software\\a\\sub", session=session))
+            self.assertEqual(create_key("HKCU:Software\\a\\sub", session=session), "HKCU:Software\\a\\sub")
+
+    def test_deleted_outside(self):
+        testcases = [
+        #   [ (function),                                                                   (function name),    (correct_output)    ],
+            [ (lambda s: create_key("HKCU:Software\\a", session=s)),                        ("create_key"),     ("HKCU:Software\\a") ],
+            [ (lambda s: save_value("HKCU:Software\\a", "n", (1, TYPE_DWORD), session=s)),  ("save_value"),     ("HKCU:Software\\a") ],
+            [ (lambda s: save_values("HKCU:Software\\a", {"n": (1, TYPE_DWORD)}, session=s)), ("save_values"), ("HKCU:Software\\a") ],
+        ]
+        for testcase in testcases:
+            with self.subTest(msg=f"TEST INPUT: function={testcase[1]}"):
+                with Session() as session:
+                    testcase[0](session)
+                    delete_key("HKCU:Software\\a")      # Outside the session: its WRITE handle becomes stale
+                    self.assertEqual(testcase[0](session), testcase[2])
+                    self.assertEqual(list_subkeys("HKCU:Software"), ["HKCU:Software\\a", "HKCU:Software\\b", "HKCU:Software\\c"])
+                    self.assertEqual(session.stats()["misses"], 2)  # Evicted, and opened again
+        with Session() as session:
+            save_value("HKCU:Software\\a", "n", (1, TYPE_DWORD), session=session)
+            self.assertEqual(load_value("HKCU:Software\\a", "n", session=session), (1, TYPE_DWORD))
+            delete_key("HKCU:Software\\a")
+            self.assertIsNone(load_value("HKCU:Software\\a", "n", session=session))
+            self.assertIsNone(list_values("HKCU:Software\\a", session=session))
+
+    def test_errors_not_retried(self):
+        class FailingBackend(MemoryBackend):
+            error = None
+            def set_value(self, handle, name, type, data):
+                if self.error is not None:
+                    raise self.error
+                super().set_value(handle, name, type, data)
+        testcases = [
+        #   [ (error),                      (reused),   (correct_misses)    ],
+            [ (OSError("Failed.")),         (False),    (1) ],     # Freshly opened handle
+            [ (PermissionError("Denied.")), (True),     (1) ],     # Access denied on a reused handle
+            [ (OSError("Failed.")),         (True),     (2) ],     # Reused handle is stale: evicted, and retried once
+        ]
+        for testcase in testcases:
+            with self.subTest(msg=f"TEST INPUT: error={testcase[0]!r}, reused={testcase[1]}"):
+                backend = FailingBackend()
+                with Session(backend=backend) as session:
+                    set_backend(backend)
+                    if testcase[1]:
+                        save_value("HKCU:Software\\a", "n", (1, TYPE_DWORD), session=session)
+                    backend.error = testcase[0]
+                    with self.assertRaises(type(testcase[0])):
+                        save_value("HKCU:Software\\a", "n", (2, TYPE_DWORD), session=session)
+                    self.assertEqual(session.stats()["misses"], testcase[2])
+                    self.assertEqual(len(session), 1)
+
+    def test_key(self):
+        root = Key("HKCU:Software", values={"n": (1, TYPE_DWORD)})
+        root.add_member(Key("HKCU:Software\\a", values={"n": (2, TYPE_DWORD)}))
+        with Session() as session:
+            root.save(session=session)
+            root.values["n"] = None
+            root.load(session=session)
+            self.assertEqual(root.values["n"], (1, TYPE_DWORD))
+            root.load(session=session)
+            self.assertEqual(session.stats()["hits"], 2)
+
+
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+
+#   Import modules
+from pyregistryutils.backend import MemoryBackend, set_backend
+from pyregistryutils.common import *
+from pyregistryutils.diff import diff
+from pyregistryutils.key import Key
+from pyregistryutils.session import Session
+from pyregistryutils.snapshot import *
+
+
+
+class Test_snapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+        save_values("HKCU:Software\\Root", {
+            "":      ("default", TYPE_REG_SZ),
+            "sz":    ("été \U0001f600", TYPE_REG_SZ),
+            "path":  ("%PATH%", TYPE_EXPAND_SZ),
+            "multi": (["a", "", "b"], TYPE_MULTI_SZ),
+            "empty": ([], TYPE_MULTI_SZ),
+            "dword": (0xFFFFFFFF, TYPE_DWORD),
+            "qword": (2**64-1, TYPE_QWORD),
+            "bin":   (b"\x00\x01\x02", TYPE_BINARY),
+            "none":  (None, TYPE_BINARY),
+        })
+        for i in range(20):
+            save_value(f"HKCU:Software\\Root\\Key{i:02}\\Sub", "n", (i, TYPE_DWORD))
+        create_key("HKCU:Software\\Root\\_Underscore")
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "test.snapshot")
+
+    def tearDown(self):
+        set_backend(self.previous)
+        self.directory.cleanup()
+
+    def test_roundtrip(self):
+        self.assertEqual(save_snapshot("HKCU:Software\\Root", self.file), 42)
+        live = Key("HKCU:Software\\Root", populate=True)
+        with SnapshotBackend(self.file) as snapshot, Session(backend=snapshot) as session:
+            self.assertEqual(snapshot.root, RegPath.parse("HKCU:Software\\Root"))
+            self.assertEqual(list_subkeys("HKCU:Software\\Root", session=session), list_subkeys("HKCU:Software\\Root"))
+            self.assertEqual(list_values("HKCU:Software\\Root", session=session), list_values("HKCU:Software\\Root"))
+            self.assertEqual(load_value("HKCU:SOFTWARE\\root\\KEY07\\sub", "N", session=session), (7, TYPE_DWORD))
+            self.assertIsNone(load_value("HKCU:Software\\Root\\Missing", "n", session=session))
+            key = Key("HKCU:Software\\Root")
+            key.populate(session=session)
+            self.assertEqual(list(diff(live, key)), [])
+            self.assertEqual(list(diff("HKCU:Software\\Root", snapshot)), [])
+
+    def test_ancestors(self):
+        save_snapshot("HKCU:Software\\Root\\Key01", self.file)
+        with SnapshotBackend(self.file) as snapshot, Session(backend=snapshot) as session:
+            self.assertEqual(list_subkeys("HKCU:", session=session), ["HKCU:Software", "HKCU:Software\\Root", "HKCU:Software\\Root\\Key01", "HKCU:Software\\Root\\Key01\\Sub"])
+            self.assertEqual(list_values("HKCU:Software", session=session), {})
+            self.assertEqual(list_subkeys("HKLM:", session=session), [])
+
+    def test_key_source(self):
+        key = Key("HKCU:Software\\Root", values={"v": (1, TYPE_DWORD), "deleted": None})
+        key.add_member(Key("HKCU:Software\\Root\\a\\b", values={"w": ("w", TYPE_REG_SZ)}))
+        self.assertEqual(save_snapshot(key, self.file), 3)     # The missing key "a" is added
+        with SnapshotBackend(self.file) as snapshot:
+            self.assertEqual(list(snapshot.iter_keys()), [((), {"v": (1, TYPE_DWORD)}), (("a",), {}), (("a", "b"), {"w": ("w", TYPE_REG_SZ)})])
+
+    def test_read_only(self):
+        save_snapshot("HKCU:Software\\Root", self.file)
+        with SnapshotBackend(self.file) as snapshot, Session(backend=snapshot) as session:
+            self.assertIsNone(save_value("HKCU:Software\\Root", "x", (1, TYPE_DWORD), session=session))
+            self.assertEqual(delete_key("HKCU:Software\\Root\\Key01", session=session), [])
+            self.assertRaises(PermissionError, snapshot.delete_key, HKCU, "Software\\Root\\Key01\\Sub")
+
+    def test_invalid(self):
+        self.assertIsNone(save_snapshot("HKCU:Missing", self.file))
+        self.assertEqual(os.path.getsize(self.file), 0)
+        self.assertRaises(ValueError, SnapshotBackend, self.file)
+        with open(self.file, "wb") as f:
+            f.write(b"not a snapshot" * 10)
+        self.assertRaises(ValueError, SnapshotBackend, self.file)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+#   Import modules
+from pyregistryutils.backend import MemoryBackend, set_backend
+from pyregistryutils.common import *
+from pyregistryutils.key import Key
+from pyregistryutils.treestore import *
+
+
+
+class Test_TreeStore(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+        save_value("HKCU:Root", "", ("root", TYPE_REG_SZ))
+        save_value("HKCU:Root\\a", "n", (1, TYPE_DWORD))
+        save_values("HKCU:Root\\a\\aa", {"n": (2, TYPE_DWORD), "list": (["x", "y"], TYPE_MULTI_SZ)})
+        create_key("HKCU:Root\\b\\n")
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def test_layout(self):
+        store = TreeStore.from_registry("HKCU:Root")
+        self.assertEqual(len(store), 5)
+        self.assertEqual(list(store.parents), [-1, 0, 1, 0, 3])
+        self.assertEqual(store.name_table.count("n"), 1)    # Key and value names are interned
+        self.assertEqual(list(store.value_start), [0, 1, 2, 4, 4, 4])
+
+    def test_views(self):
+        store = TreeStore.from_registry("HKCU:Root")
+        root = store.view()
+        self.assertEqual(root.abspath, "HKCU:Root")
+        self.assertEqual([view.name for view in root.subkeys()], ["a", "b"])
+        self.assertEqual([view.abspath for view in root.descendants()], list_subkeys("HKCU:Root"))
+        aa = store.find("A\\AA")
+        self.assertEqual(aa.values, list_values("HKCU:Root\\a\\aa"))
+        self.assertEqual(aa.parent, store.find("a"))
+        self.assertEqual(aa.location, RegPath.parse("HKCU:Root\\a\\aa"))
+        self.assertIsNone(store.find("missing"))
+
+    def test_lookup(self):
+        for i in range(50):
+            create_key(f"HKCU:Root\\b\\Key{i}")
+        store = TreeStore.from_registry("HKCU:Root")
+        b = store.find("b")
+        for i in range(50):
+            view = b.subkey(f"KEY{i}")
+            self.assertEqual(view, store.find(f"B\\key{i}"))
+            self.assertEqual(view.abspath, f"HKCU:Root\\b\\Key{i}")
+            self.assertEqual(view.location, RegPath.parse(f"HKCU:Root\\b\\Key{i}"))
+        self.assertIsNone(b.subkey("missing"))
+        self.assertEqual(store.child(0, "A"), store.find("a").index)
+        self.assertEqual(store.child(0, "aa"), -1)   # Only direct subkeys
+
+    def test_location_cache(self):
+        for i in range(20):
+            create_key(f"HKCU:Root\\c\\Key{i}\\Sub")
+        store = TreeStore.from_registry("HKCU:Root")
+        store.LOCATION_CACHE_SIZE = 4
+        self.assertEqual([view.abspath for view in store.view().descendants()], list_subkeys("HKCU:Root"))
+        self.assertLessEqual(len(store._locations), 4)     # Only parent keys, and a bounded number of them
+
+    def test_maxdepth(self):
+        for maxdepth in [0, 1, -1]:
+            with self.subTest(msg=f"TEST INPUT: maxdepth={maxdepth}"):
+                store = TreeStore.from_registry("HKCU:Root", maxdepth=maxdepth, parallel=maxdepth < 0)
+                self.assertEqual([view.abspath for view in store.view().descendants()], list_subkeys("HKCU:Root", maxdepth))
+
+    def test_to_key(self):
+        key = TreeStore.from_registry("HKCU:Root").to_key()
+        correct = Key("HKCU:Root", populate=True)
+        self.assertEqual(key.values, correct.values)
+        self.assertEqual(list(key.members), list(correct.members))
+        for name in key.members:
+            self.assertEqual(key.members[name].values, correct.members[name].values)
+            self.assertEqual(key.members[name].abspath, correct.members[name].abspath)
+
+    def test_missing(self):
+        self.assertIsNone(TreeStore.from_registry("HKCU:Missing"))
+        self.assertIsNone(TreeStore.from_registry("HK:Root"))
+
+
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import threading
+import unittest
+
+#   Import modules
+from pyregistryutils.backend import MemoryBackend, set_backend
+from pyregistryutils.common import *
+from pyregistryutils.key import Key
+from pyregistryutils.session import Session
+from pyregistryutils.watch import *
+
+
+
+class Test_Watcher(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = set_backend(MemoryBackend())
+        save_values("HKCU:App", {"a": (1, TYPE_DWORD), "b": ("b", TYPE_REG_SZ)})
+        save_value("HKCU:App\\Sub\\Deep", "n", (0, TYPE_DWORD))
+        save_value("HKCU:Other", "n", (0, TYPE_DWORD))
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def changes(self, watcher):
+        # Makes one change of each kind, and returns the paths reported by each watch, in order
+        reported = []
+        watches = [
+            watcher.watch("HKCU:App", lambda w: reported.append(("tree", w.path.abspath))),
+            watcher.watch("HKCU:App", lambda w: reported.append(("key", w.path.abspath)), subtree=False),
+        ]
+        actions = [
+            lambda: save_value("HKCU:App", "a", (2, TYPE_DWORD)),           # key, tree
+            lambda: save_value("HKCU:App\\Sub\\Deep", "n", (1, TYPE_DWORD)), # tree
+            lambda: save_value("HKCU:Other", "n", (1, TYPE_DWORD)),         # (none)
+            lambda: create_key("HKCU:App\\New"),                            # key, tree
+            lambda: delete_key("HKCU:App\\Sub"),                            # key, tree
+        ]
+        results = []
+        for action in actions:
+            reported.clear()
+            action()
+            if not watcher.native:
+                watcher.poll()
+            results.append(sorted(kind for kind, _ in reported))
+        return watches, results[:4], results[4]
+
+    def test_native(self):
+        with Watcher() as watcher:
+            self.assertTrue(watcher.native)
+            watches, results, deleted = self.changes(watcher)
+            self.assertEqual(results, [["key", "tree"], ["tree"], [], ["key", "tree"]])
+            self.assertEqual(deleted, ["key", "tree", "tree"])  # Deep is deleted, then Sub
+            self.assertEqual([watch.changes for watch in watches], [5, 3])
+            watcher.unwatch(watches[0])
+            save_value("HKCU:App", "a", (3, TYPE_DWORD))
+            self.assertEqual([watch.changes for watch in watches], [5, 4])
+            self.assertIsNone(watcher.watch("HKCU:Missing"))
+
+    def test_poll(self):
+        with Watcher(interval=None, native=False) as watcher:
+            self.assertFalse(watcher.native)
+            watches, results, deleted = self.changes(watcher)
+            self.assertEqual(results, [["key", "tree"], ["tree"], [], ["key", "tree"]])
+            self.assertEqual(deleted, ["key", "tree"])
+            self.assertEqual(watcher.poll(), [])    # Nothing changed since the last poll
+            watch = watcher.watch("HKCU:Missing")
+            create_key("HKCU:Missing")
+            self.assertEqual(watcher.poll(), [watch])
+
+    def test_poll_thread(self):
+        changed = threading.Event()
+        with Watcher(interval=0.01, native=False) as watcher:
+            watcher.watch("HKCU:App", lambda w: changed.set())
+            save_value("HKCU:App\\Sub", "x", (1, TYPE_DWORD))
+            self.assertTrue(changed.wait(5))
+
+    def test_watch_key(self):
+        key = Key("HKCU:App", populate=True)
+        refreshed = []
+        with Watcher(session=Session()) as watcher:
+            watcher.watch_key(key, callback=lambda w: refreshed.append(w.changes))
+            save_value("HKCU:App", "a", (5, TYPE_DWORD))
+            save_value("HKCU:App\\Sub\\Deep", "n", (6, TYPE_DWORD))
+            self.assertEqual(key.values["a"], (5, TYPE_DWORD))
+            self.assertEqual(key.members["Sub\\Deep"].values["n"], (6, TYPE_DWORD))
+            self.assertEqual(refreshed, [1, 2])
+
+            # Values with unsaved changes are not reloaded
+            key.values["b"] = ("local", TYPE_REG_SZ)
+            save_value("HKCU:App", "a", (7, TYPE_DWORD))
+            self.assertEqual(key.values, {"a": (7, TYPE_DWORD), "b": ("local", TYPE_REG_SZ)})
+            self.assertEqual(key.changes(), {"b": ("local", TYPE_REG_SZ)})
+            key.save()
+            self.assertEqual(list_values("HKCU:App"), {"a": (7, TYPE_DWORD), "b": ("local", TYPE_REG_SZ)})
+            self.assertFalse(key.is_dirty())
+
+    def test_watch_unloaded_key(self):
+        key = Key("HKCU:App", values={"a": None})     # Never loaded
+        with Watcher(interval=None, native=False) as watcher:
+            watcher.watch_key(key)
+            save_value("HKCU:App", "a", (2, TYPE_DWORD))
+            watcher.poll()
+            self.assertEqual(key.values, {"a": (2, TYPE_DWORD)})
+            self.assertFalse(key.is_dirty())
+
+
+
+if __name__ == '__main__':
+    unittest.main()